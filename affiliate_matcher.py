@@ -0,0 +1,154 @@
+import os
+import numpy as np
+import pandas as pd
+from hr_engine import IDENTITY_COLUMN, ordinal_to_month_str
+
+# 📌 전출(퇴사) 후 다른 계열사에 전입(입사)한 것으로 볼 최대 개월 수 (환경 변수 HR_TRANSFER_WINDOW_MONTHS 로 변경 가능)
+DEFAULT_TRANSFER_WINDOW_MONTHS = int(os.environ.get("HR_TRANSFER_WINDOW_MONTHS", 1))
+
+# 📌 결과 시트 이름
+TRANSFER_SHEET_NAME = "계열사간_이동"
+DUPLICATE_SHEET_NAME = "중복_재직"
+
+# 📌 입사자 / 퇴사자 리스트에 추가하는 표시 컬럼
+TRANSFER_FLAG_COLUMN = "계열사 이동"
+
+TRANSFER_COLUMNS = ["성명", "전출 시트", "퇴사월", "전입 시트", "입사월", "일치 기준"]
+DUPLICATE_COLUMNS = ["성명", "시트명", "건수", "일치 기준"]
+
+# 📌 일치 기준 표시 (한쪽이라도 식별키가 없으면 성명만으로 맞춘 것이므로 동명이인일 수 있음)
+MATCH_BY_IDENTITY = "성명 + 식별정보"
+MATCH_BY_NAME = "성명 (동명이인 확인 필요)"
+
+
+def person_frame(df, hire_month, resign_month, sheet_name):
+    """
+    분석용으로 정리된 시트에서 계열사 간 비교에 필요한 값만 꺼내는 함수 (행 라벨은 원래 DataFrame 과 같음)
+    반환값: 시트명 / 성명 / 식별키 / 입사월 / 퇴사월 DataFrame 또는 None(성명 컬럼 없음)
+    """
+    if "성명" not in df.columns:
+        return None
+
+    names = df["성명"].astype("string").str.strip()
+    identity = df[IDENTITY_COLUMN] if IDENTITY_COLUMN in df.columns else pd.Series(None, index=df.index, dtype=object)
+    people = pd.DataFrame({"성명": names, "식별키": identity.astype("string"), "입사월": hire_month, "퇴사월": resign_month}, index=df.index)
+    people = people.loc[people["성명"].notna() & (people["성명"] != "")]
+    people.insert(0, "시트명", sheet_name)
+    return people
+
+
+def build_person_index(people_frames):
+    """
+    모든 시트의 인원을 하나로 합치고 성명 해시 그룹 번호(키)를 붙이는 함수
+    - 두 개 이상의 시트에 나오는 성명의 행만 남김 (이후 비교는 같은 키 안에서만 수행하므로 전체 행 쌍을 비교하지 않음)
+    - 식별키는 같은 키 안에서 비교 (둘 다 있으면 같아야 같은 사람, 한쪽이라도 없으면 성명만으로 맞춤)
+    반환값: 시트명 / 행 / 성명 / 식별키 / 입사월 / 퇴사월 / 키 DataFrame
+    """
+    frames = [frame for frame in people_frames if frame is not None and len(frame)]
+    if not frames:
+        return pd.DataFrame(columns=["시트명", "행", "성명", "식별키", "입사월", "퇴사월", "키"])
+
+    index = pd.concat(frames).rename_axis("행").reset_index()
+    index["키"] = index.groupby("성명", sort=False).ngroup()
+    sheets_per_key = index.groupby("키")["시트명"].transform("nunique")
+    return index.loc[sheets_per_key > 1].reset_index(drop=True)
+
+
+def _match_basis(identified):
+    """ 양쪽 모두 식별키로 맞춘 경우인지에 따라 일치 기준 문구를 고르는 함수 """
+    return np.where(np.asarray(identified, dtype=bool), MATCH_BY_IDENTITY, MATCH_BY_NAME)
+
+
+def _same_person(left, right):
+    """ 같은 성명의 두 행이 같은 사람일 수 있는지 확인하는 함수 (식별키가 둘 다 있으면 같아야 하고, 한쪽이라도 없으면 성명만으로 인정) """
+    return (left == right).fillna(False).astype(bool) | left.isna() | right.isna()
+
+
+def find_transfers(index, month_ordinal, window=DEFAULT_TRANSFER_WINDOW_MONTHS):
+    """
+    같은 사람이 한 계열사에서 퇴사하고 window 개월 안에 다른 계열사에 입사한 경우를 찾는 함수
+    - 퇴사월 또는 입사월이 기준 월(month_ordinal)인 경우만 (입사자 / 퇴사자 리스트에 나오는 인원)
+    - 한쪽이라도 식별키가 없으면 성명만으로 맞추고 일치 기준에 표시
+    반환값: TRANSFER_COLUMNS + 전출 행 / 전입 행 DataFrame
+    """
+    resigned = index.loc[index["퇴사월"].between(month_ordinal - window, month_ordinal), ["키", "시트명", "행", "성명", "식별키", "퇴사월"]]
+    hired = index.loc[index["입사월"].between(month_ordinal - window, month_ordinal + window), ["키", "시트명", "행", "식별키", "입사월"]]
+
+    # ✅ 같은 키(성명) 안에서만 짝지음 (해시 조인)
+    pairs = resigned.merge(hired, on="키", suffixes=("_전출", "_전입"))
+    gap = pairs["입사월"] - pairs["퇴사월"]
+    pairs = pairs.loc[
+        (pairs["시트명_전출"] != pairs["시트명_전입"]) & gap.between(0, window)
+        & ((pairs["퇴사월"] == month_ordinal) | (pairs["입사월"] == month_ordinal))
+        & _same_person(pairs["식별키_전출"], pairs["식별키_전입"])
+    ]
+
+    transfers = pd.DataFrame({
+        "성명": pairs["성명"].to_numpy(dtype=object),
+        "전출 시트": pairs["시트명_전출"].to_numpy(dtype=object),
+        "퇴사월": [ordinal_to_month_str(int(m)) for m in pairs["퇴사월"]],
+        "전입 시트": pairs["시트명_전입"].to_numpy(dtype=object),
+        "입사월": [ordinal_to_month_str(int(m)) for m in pairs["입사월"]],
+        "일치 기준": _match_basis(pairs["식별키_전출"].notna() & pairs["식별키_전입"].notna()),
+        "전출 행": pairs["행_전출"].to_numpy(),
+        "전입 행": pairs["행_전입"].to_numpy(),
+    })
+    return transfers.reset_index(drop=True)
+
+
+def find_duplicate_active(index, month_ordinal):
+    """
+    기준 월에 두 개 이상의 계열사에 동시에 재직 중인 사람을 찾는 함수
+    - 같은 성명 안에서 식별키마다 한 사람으로 보고, 식별키가 없는 행은 같은 성명의 모든 사람(없으면 성명 하나)에 포함
+    반환값: DUPLICATE_COLUMNS DataFrame (사람당 한 행, 시트명은 쉼표로 연결)
+    """
+    active = index.loc[(index["입사월"] <= month_ordinal) & (index["퇴사월"].isna() | (index["퇴사월"] > month_ordinal)), ["키", "시트명", "성명", "식별키"]]
+    identified = active.loc[active["식별키"].notna()]
+    unidentified = active.loc[active["식별키"].isna()].drop(columns="식별키")
+
+    # ✅ 식별키가 없는 행은 같은 성명의 식별키마다 하나씩 펼침 (해시 조인)
+    people = pd.concat([
+        identified.assign(성명만=False),
+        unidentified.merge(identified[["키", "식별키"]].drop_duplicates(), on="키", how="left").assign(성명만=True),
+    ], ignore_index=True)
+
+    grouped = people.groupby(["키", "식별키"], sort=False, dropna=False)
+    sheets = grouped["시트명"].agg(lambda names: list(dict.fromkeys(names)))  # 여러 시트에 나오는 성명만 남아 있으므로 그룹 수가 적음
+    sheets = sheets[sheets.map(len) > 1]
+    if sheets.empty:
+        return pd.DataFrame(columns=DUPLICATE_COLUMNS)
+
+    return pd.DataFrame({
+        "성명": grouped["성명"].first().loc[sheets.index].to_numpy(dtype=object),
+        "시트명": sheets.map(", ".join).to_numpy(dtype=object),
+        "건수": grouped.size().loc[sheets.index].to_numpy(),
+        "일치 기준": _match_basis(~grouped["성명만"].any().loc[sheets.index].to_numpy()),
+    })
+
+
+def flag_transfers(frame, transfers, sheet_column, row_column, other_column, label):
+    """
+    입사자 / 퇴사자 리스트에 계열사 이동 표시 컬럼을 추가하는 함수 (리스트의 행 라벨 = 원래 시트의 행 라벨)
+    - 계열사 간 이동이 없으면 컬럼을 추가하지 않음 (결과 엑셀 양식 유지)
+    예: 전입 인원은 "전입 ← 도이치아우토"
+    """
+    if transfers.empty:
+        return frame
+
+    flags = pd.Series(
+        [f"{label} {other}" for other in transfers[other_column]],
+        index=pd.MultiIndex.from_arrays([transfers[sheet_column], transfers[row_column]]),
+        dtype=object,
+    )
+    flags = flags[~flags.index.duplicated()]
+    keys = pd.MultiIndex.from_arrays([frame["시트명"], frame.index])
+    return frame.assign(**{TRANSFER_FLAG_COLUMN: flags.reindex(keys).to_numpy()})
+
+
+def match_affiliates(people_frames, list_month_ordinal, active_month_ordinal, window=DEFAULT_TRANSFER_WINDOW_MONTHS):
+    """
+    모든 시트의 인원을 한 번에 색인하여 계열사 간 이동과 중복 재직을 찾는 함수
+    반환값: (계열사 간 이동 DataFrame, 중복 재직 DataFrame)
+    """
+    index = build_person_index(people_frames)
+    return find_transfers(index, list_month_ordinal, window), find_duplicate_active(index, active_month_ordinal)
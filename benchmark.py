@@ -0,0 +1,388 @@
+"""
+합성 계열사 인원 현황 / 4대보험 엑셀로 각 처리 단계의 처리량과 메모리를 측정하는 벤치마크
+
+사용 예:
+    python benchmark.py --rows 1000 50000 --files 5
+    python benchmark.py --rows 500000 --files 1 --pipelines hr --trace-memory --json bench.json
+"""
+import os
+import io
+import sys
+import json
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import pandas as pd
+import openpyxl
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
+from openpyxl.worksheet.cell_range import CellRange
+
+from streamlit import config as streamlit_config
+from streamlit.logger import set_log_level
+from hr_engine import parse_excel_files, get_file_stem, EMPLOYEE_TYPE_ORDER, DEFAULT_IDENTITY_KEYWORDS
+from excel_writer import resolve_engine, DEFAULT_WRITER_ENGINE
+from pipeline_metrics import PipelineMetrics, frame_counts
+from upload_sources import NamedBuffer
+from insurance_verifier import read_ledger, verify_premiums, rates_for_month, compute_expected_premiums
+from hr_pipeline import DEFAULT_SHEET_ORDER, DATE_COLUMNS, merge_parsed_files, analyze_sheets, write_merged_workbook
+import streamlit_app_insurance
+import streamlit_app_merge
+
+# Streamlit 실행 환경 밖에서 호출할 때 나오는 경고는 숨김 (설정 파일을 먼저 읽어야 이후에 로그 수준이 초기화되지 않음)
+streamlit_config.get_config_options()
+set_log_level("error")
+
+PIPELINES = ("hr", "insurance", "generic")
+
+# 📌 영문 양식(Starting Date / Contract Type / Remark)을 사용하는 계열사
+ENGLISH_AFFILIATES = {"BAMC"}
+
+KOREAN_HEADERS = ["No", "성명", "사번", "부서명", "직급명", "사원구분명", "입사일", "퇴사일", "주민번호", "경력사항", "연락처"]
+ENGLISH_HEADERS = ["No", "English Name", "성명", "부서명", "직급명", "Starting Date", "Contract Type", "Remark", "주민번호", "연락처"]
+INSURANCE_HEADERS = ["사번", "성명", "보수월액", "국민연금", "건강보험", "장기요양", "고용보험", "합계"]
+INSURANCE_KINDS = ["정기분", "소급분", "정산분"]
+INSURANCE_NAMES = INSURANCE_HEADERS[3:7]
+
+# 📌 보험료 검증 기준 월 (합성 보험료는 이 월의 요율표로 계산)
+PREMIUM_MONTH = "2025-09"
+
+# 📌 보험료 오류를 넣는 간격 (시트마다 이 간격의 행에 보험 하나씩 돌아가며 100원을 더함 — 검증 단계에서 정확히 이만큼 찾아야 함)
+INJECTED_ERROR_EVERY = 50
+INJECTED_ERROR_AMOUNT = 100
+
+# 📌 합성 파일 형식 버전 (형식이 바뀌면 올려서 이전에 만든 파일을 재사용하지 않도록 함)
+DATASET_VERSION = 2
+
+REPORT_COLUMNS = {
+    "pipeline": "파이프라인",
+    "stage": "단계",
+    "rows": "행 수",
+    "cells": "셀 수",
+    "wall_s": "시간(초)",
+    "rows_per_s": "행/초",
+    "cells_per_s": "셀/초",
+    "rss_mb": "종료 RSS(MB)",
+    "peak_rss_mb": "단계 최대 RSS(MB)",
+    "rss_delta_mb": "단계 증가(MB)",
+    "heap_peak_mb": "힙 최대(MB)",
+}
+
+THIN = Side(style="thin")
+TITLE_FONT = Font(bold=True, size=14)
+HEADER_FONT = Font(bold=True)
+HEADER_FILL = PatternFill("solid", fgColor="DDEBF7")
+HEADER_BORDER = Border(left=THIN, right=THIN, top=THIN, bottom=THIN)
+HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="center")
+ROW_FILLS = [PatternFill("solid", fgColor="FFFFFF"), PatternFill("solid", fgColor="F2F2F2")]
+
+
+def affiliate_names(count):
+    """ 합성 계열사 이름 목록 (영문 양식 계열사를 먼저 넣고 기본 시트 정렬 순서를 사용, 모자라면 번호를 붙여 생성) """
+    order = sorted(ENGLISH_AFFILIATES) + [name for name in DEFAULT_SHEET_ORDER if name not in ENGLISH_AFFILIATES]
+    names = order[:count]
+    names += [f"계열사{idx:02d}" for idx in range(len(names) + 1, count + 1)]
+    return names
+
+
+def _styled_cells(ws, values, font=None, fill=None, border=None, alignment=None, number_format=None):
+    """ 쓰기 전용 시트에 추가할 서식 있는 셀 목록을 만드는 함수 """
+    cells = []
+    for value in values:
+        cell = WriteOnlyCell(ws, value=value)
+        if font is not None:
+            cell.font = font
+        if fill is not None:
+            cell.fill = fill
+        if border is not None:
+            cell.border = border
+        if alignment is not None:
+            cell.alignment = alignment
+        if number_format is not None:
+            cell.number_format = number_format
+        cells.append(cell)
+    return cells
+
+
+def _roster_row(idx, english, rng, base_date):
+    """ 인원 현황 한 행의 값을 만드는 함수 """
+    hire = base_date - timedelta(days=rng.randint(0, 365 * 15))
+    resigned = rng.random() < 0.15
+    resign = hire + timedelta(days=rng.randint(30, 365 * 5)) if resigned else None
+    if resign is not None and resign > base_date:
+        resign = base_date - timedelta(days=rng.randint(0, 60))
+    resident_id = f"{rng.randint(60, 99)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}-{rng.randint(1, 2)}******"
+    phone = f"010-{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}"
+
+    if english:
+        return [
+            idx, f"EMP NAME {idx}", f"직원{idx}", f"부서{idx % 12}", f"직급{idx % 6}", hire,
+            rng.choice(["FDC", "UDC", "UDC", "UDC"]),
+            "Resigned and last working day" if resigned else None,
+            resident_id, phone,
+        ]
+    return [
+        idx, f"직원{idx}", f"E{idx:06d}", f"부서{idx % 12}", f"직급{idx % 6}",
+        rng.choices(EMPLOYEE_TYPE_ORDER, weights=[1, 70, 20, 9])[0], hire, resign,
+        resident_id, f"{rng.randint(0, 20)}년", phone,
+    ]
+
+
+def write_roster(path, affiliate, rows, rng, base_date):
+    """
+    계열사 인원 현황 합성 파일을 만드는 함수
+    - 제목 행(병합 셀) + 기준일 행 다음에 "No" 헤더 행이 오는 구조
+    - 영문 양식 계열사는 English Name / Starting Date / Contract Type / Remark 컬럼 사용
+    """
+    english = affiliate in ENGLISH_AFFILIATES
+    headers = ENGLISH_HEADERS if english else KOREAN_HEADERS
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("인원현황")
+    ws.column_dimensions["B"].width = 16
+
+    ws.append(_styled_cells(ws, [f"{affiliate} 인원 현황"], font=TITLE_FONT))
+    ws.merged_cells.add(CellRange(min_col=1, min_row=1, max_col=len(headers), max_row=1))
+    ws.append([f"기준일: {base_date:%Y-%m-%d}"])
+    ws.append(_styled_cells(ws, headers, font=HEADER_FONT, fill=HEADER_FILL, border=HEADER_BORDER, alignment=HEADER_ALIGNMENT))
+
+    for idx in range(1, rows + 1):
+        ws.append(_roster_row(idx, english, rng, base_date))
+
+    wb.save(path)
+
+
+def injected_error_count(rows, sheets):
+    """ 4대보험 합성 파일 하나에 넣은 보험료 오류 수 """
+    return rows // INJECTED_ERROR_EVERY * sheets
+
+
+def write_insurance_workbook(path, company, sheets, rows, rng):
+    """
+    4대보험 합성 파일을 만드는 함수 (시트마다 제목 병합 셀, 서식 있는 헤더, 금액 서식, 합계 수식 포함)
+    - 보험료는 요율표(PREMIUM_MONTH)로 계산하고, INJECTED_ERROR_EVERY 행마다 보험 하나에 오류를 넣음
+    """
+    rates = rates_for_month(streamlit_app_insurance.RATE_TABLE, PREMIUM_MONTH)
+    wb = Workbook(write_only=True)
+
+    for kind in INSURANCE_KINDS[:sheets] + [f"추가{idx}" for idx in range(len(INSURANCE_KINDS) + 1, sheets + 1)]:
+        ws = wb.create_sheet(f"{company}_{kind}")
+        ws.column_dimensions["B"].width = 14
+        ws.row_dimensions[1].height = 28
+
+        ws.append(_styled_cells(ws, [f"{company} 4대보험 {kind} 내역"], font=TITLE_FONT, alignment=HEADER_ALIGNMENT))
+        ws.merged_cells.add(CellRange(min_col=1, min_row=1, max_col=len(INSURANCE_HEADERS), max_row=1))
+        ws.append(_styled_cells(ws, INSURANCE_HEADERS, font=HEADER_FONT, fill=HEADER_FILL, border=HEADER_BORDER, alignment=HEADER_ALIGNMENT))
+
+        salaries = pd.Series([rng.randint(200, 900) * 10000 for _ in range(rows)])
+        expected = pd.DataFrame(compute_expected_premiums(salaries, rates))[INSURANCE_NAMES].astype(int)
+
+        for idx, salary, premiums in zip(range(1, rows + 1), salaries, expected.itertuples(index=False)):
+            row_number = idx + 2
+            premiums = list(premiums)
+            if idx % INJECTED_ERROR_EVERY == 0:
+                premiums[idx // INJECTED_ERROR_EVERY % len(premiums)] += INJECTED_ERROR_AMOUNT
+            fill = ROW_FILLS[idx % 2]
+            ws.append(
+                _styled_cells(ws, [f"E{idx:06d}", f"직원{idx}"], fill=fill, border=HEADER_BORDER)
+                + _styled_cells(ws, [int(salary), *premiums], fill=fill, border=HEADER_BORDER, number_format="#,##0")
+                + _styled_cells(ws, [f"=SUM(D{row_number}:G{row_number})"], fill=fill, border=HEADER_BORDER)
+            )
+
+    wb.save(path)
+
+
+def generate_dataset(data_dir, files, rows, insurance_files, insurance_sheets, seed=42, base_date=None):
+    """
+    벤치마크용 합성 파일을 만드는 함수 (같은 설정으로 이미 만든 파일이 있으면 재사용)
+    반환값: (인원 현황 파일 경로 목록, 4대보험 파일 경로 목록)
+    """
+    base_date = base_date or datetime(2025, 9, 30)
+    dataset_dir = os.path.join(data_dir, f"rows{rows}_files{files}_ins{insurance_files}x{insurance_sheets}_seed{seed}_v{DATASET_VERSION}")
+    os.makedirs(dataset_dir, exist_ok=True)
+    rng = random.Random(seed)
+
+    roster_paths = []
+    for affiliate in affiliate_names(files):
+        path = os.path.join(dataset_dir, f"{affiliate}.xlsx")
+        if not os.path.exists(path):
+            write_roster(path, affiliate, rows, rng, base_date)
+        roster_paths.append(path)
+
+    insurance_paths = []
+    for idx in range(1, insurance_files + 1):
+        path = os.path.join(dataset_dir, f"보험_회사{idx:02d}.xlsx")
+        if not os.path.exists(path):
+            write_insurance_workbook(path, f"회사{idx:02d}", insurance_sheets, rows, rng)
+        insurance_paths.append(path)
+
+    return roster_paths, insurance_paths
+
+
+def _as_upload(path):
+    """ 경로의 파일을 업로드 파일처럼 이름이 있는 메모리 버퍼로 읽는 함수 """
+    with open(path, "rb") as f:
+        return NamedBuffer(f.read(), os.path.basename(path))
+
+
+@contextmanager
+def bench_stage(metrics, pipeline, stage, trace_memory=False):
+    """ 단계 하나를 측정하는 with 블록 (trace_memory 이면 파이썬 힙 최대 사용량도 기록) """
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        with metrics.stage(stage, file=pipeline) as counts:
+            yield counts
+    finally:
+        heap_peak = None
+        if trace_memory:
+            heap_peak = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+            tracemalloc.stop()
+        metrics.records[-1]["heap_peak_mb"] = heap_peak
+
+
+def run_hr_pipeline(metrics, roster_paths, workers, trace_memory, month="2025-09"):
+    """ 인원 분석 파이프라인: 파싱 → 병합 → 분석 → 저장 """
+    previous_month, previous_month_last_day = "2025-08", "2025-08-31"
+    sheet_order = DEFAULT_SHEET_ORDER
+
+    with bench_stage(metrics, "hr", "parse", trace_memory) as counts:
+        parsed = parse_excel_files(roster_paths, ["주민", "경력"], max_workers=workers, identity_keywords=DEFAULT_IDENTITY_KEYWORDS, compact_dtypes=True)
+        counts["rows"], counts["cells"] = frame_counts([df for _, frames, _, _ in parsed for _, df, _ in frames])
+
+    with bench_stage(metrics, "hr", "merge", trace_memory) as counts:
+        merged_sheets, _ = merge_parsed_files(parsed, sheet_order)
+        counts["rows"], counts["cells"] = frame_counts(merged_sheets.values())
+
+    with bench_stage(metrics, "hr", "analyze", trace_memory) as counts:
+        _, result_sheets = analyze_sheets(merged_sheets, month, previous_month, previous_month_last_day, DATE_COLUMNS)
+        counts["rows"], counts["cells"] = frame_counts(merged_sheets.values())
+
+    with bench_stage(metrics, "hr", "write", trace_memory) as counts:
+        output_sheets = {**merged_sheets, **result_sheets}
+        write_merged_workbook(output_sheets, DATE_COLUMNS)
+        counts["rows"], counts["cells"] = frame_counts(output_sheets.values())
+
+
+def run_insurance_pipeline(metrics, insurance_paths, trace_memory, expected_errors=None):
+    """
+    4대보험 병합 파이프라인: 서식 유지 병합 → 보험료 검증 → 저장
+    - expected_errors 를 주면 검증 단계가 찾은 불일치 수가 합성 파일에 넣은 오류 수와 같은지 확인 (다르면 ValueError)
+    """
+    uploads = [_as_upload(path) for path in insurance_paths]
+
+    with bench_stage(metrics, "insurance", "merge", trace_memory) as counts:
+        merged_wb, _ = streamlit_app_insurance.merge_insurance_files(uploads)
+        rows = sum(ws.max_row for ws in merged_wb.worksheets)
+        cells = sum(ws.max_row * ws.max_column for ws in merged_wb.worksheets)
+        counts["rows"], counts["cells"] = rows, cells
+
+    with bench_stage(metrics, "insurance", "verify", trace_memory) as counts:
+        ledger, _ = read_ledger(merged_wb, streamlit_app_insurance.RATE_TABLE)
+        _, discrepancies = verify_premiums(ledger, streamlit_app_insurance.RATE_TABLE, PREMIUM_MONTH)
+        counts["rows"], counts["cells"] = len(ledger), ledger.size
+
+    if expected_errors is not None and len(discrepancies) != expected_errors:
+        raise ValueError(f"보험료 검증 결과가 맞지 않습니다: 넣은 오류 {expected_errors}건, 찾은 불일치 {len(discrepancies)}건")
+
+    with bench_stage(metrics, "insurance", "write", trace_memory) as counts:
+        merged_wb.save(io.BytesIO())
+        counts["rows"], counts["cells"] = rows, cells
+
+
+def run_generic_pipeline(metrics, roster_paths, roster_rows, trace_memory):
+    """ 범용 엑셀 병합기: 읽기 + 서식 정보 추출 → 저장 """
+    # 범용 병합기는 헤더 행 위치를 찾지 않으므로 원본 행 수(제목 2행 + 헤더 포함) 기준으로 집계
+    rows = cells = 0
+    for path, rows_per_file in zip(roster_paths, roster_rows):
+        width = len(ENGLISH_HEADERS if get_file_stem(path) in ENGLISH_AFFILIATES else KOREAN_HEADERS)
+        rows, cells = rows + rows_per_file + 3, cells + (rows_per_file + 3) * width
+    uploads = [_as_upload(path) for path in roster_paths]
+
+    with bench_stage(metrics, "generic", "merge_and_write", trace_memory) as counts:
+        streamlit_app_merge.merge_excel_files(uploads)
+        counts["rows"], counts["cells"] = rows, cells
+
+
+def report_frame(records):
+    """ 측정 결과를 처리량(행/초, 셀/초)이 포함된 보고용 DataFrame으로 만드는 함수 """
+    frame = pd.DataFrame(records)
+    frame["pipeline"] = frame.pop("file")
+    wall = frame["wall_s"].where(frame["wall_s"] > 0)
+    frame["rows_per_s"] = (frame["rows"] / wall).round(0)
+    frame["cells_per_s"] = (frame["cells"] / wall).round(0)
+    return frame.reindex(columns=list(REPORT_COLUMNS))
+
+
+def run_benchmark(data_dir, rows_list, files, insurance_files, insurance_sheets, pipelines=PIPELINES, workers=1, trace_memory=False, seed=42):
+    """ 크기별로 합성 파일을 만들고 각 파이프라인 단계를 측정하는 함수 (반환값: 크기별 결과 목록) """
+    runs = []
+    for rows in rows_list:
+        roster_paths, insurance_paths = generate_dataset(data_dir, files, rows, insurance_files, insurance_sheets, seed)
+        metrics = PipelineMetrics("benchmark", log_path=None)
+
+        if "hr" in pipelines:
+            run_hr_pipeline(metrics, roster_paths, workers, trace_memory)
+        if "insurance" in pipelines:
+            run_insurance_pipeline(metrics, insurance_paths, trace_memory, injected_error_count(rows, insurance_sheets) * insurance_files)
+        if "generic" in pipelines:
+            run_generic_pipeline(metrics, roster_paths, [rows] * len(roster_paths), trace_memory)
+
+        runs.append({"rows": rows, "files": files, "records": metrics.records})
+    return runs
+
+
+def environment_info(workers):
+    """ 결과 비교를 위한 실행 환경 정보 """
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pandas": pd.__version__,
+        "openpyxl": openpyxl.__version__,
+        "writer_engine": resolve_engine(DEFAULT_WRITER_ENGINE),
+        "workers": workers,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="합성 엑셀 파일로 인원 분석 / 4대보험 병합 / 범용 병합의 단계별 처리량과 메모리를 측정합니다.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000], help="파일(시트)당 행 수, 여러 개 지정 시 차례로 측정 (예: 1000 50000 500000)")
+    parser.add_argument("--files", type=int, default=3, help="계열사 인원 현황 파일 수 (1~30)")
+    parser.add_argument("--insurance-files", type=int, default=2, help="4대보험 파일 수")
+    parser.add_argument("--insurance-sheets", type=int, default=3, help="4대보험 파일당 시트 수")
+    parser.add_argument("--pipelines", nargs="+", choices=PIPELINES, default=list(PIPELINES), help="측정할 파이프라인")
+    parser.add_argument("--workers", type=int, default=1, help="인원 현황 파싱 프로세스 수 (1 = 순차 처리)")
+    parser.add_argument("--data-dir", default=None, help="합성 파일 저장 폴더 (지정하면 다음 실행에서 재사용)")
+    parser.add_argument("--seed", type=int, default=42, help="합성 데이터 난수 시드")
+    parser.add_argument("--trace-memory", action="store_true", help="단계별 파이썬 힙 최대 사용량 측정 (실행이 느려짐)")
+    parser.add_argument("--json", dest="json_path", default=None, help="결과를 저장할 JSON 파일 경로")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="hr_benchmark_")
+
+    runs = run_benchmark(
+        data_dir, args.rows, args.files, args.insurance_files, args.insurance_sheets,
+        pipelines=args.pipelines, workers=args.workers, trace_memory=args.trace_memory, seed=args.seed
+    )
+
+    for run in runs:
+        print(f"\n📊 파일 {run['files']}개 × {run['rows']:,}행")
+        print(report_frame(run["records"]).rename(columns=REPORT_COLUMNS).to_string(index=False))
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment_info(args.workers), "data_dir": data_dir, "runs": runs}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 결과 저장: {args.json_path}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
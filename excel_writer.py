@@ -0,0 +1,232 @@
+import os
+import io
+import numbers
+from datetime import datetime, date
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Border, Side, Alignment
+from openpyxl.utils import get_column_letter
+from openpyxl.xml import LXML
+
+try:
+    import xlsxwriter
+except ImportError:  # xlsxwriter 가 없으면 openpyxl 계열 엔진 사용
+    xlsxwriter = None
+
+# 📌 엑셀 저장 엔진 (auto / xlsxwriter / openpyxl-write-only / openpyxl) — 환경 변수 EXCEL_WRITER_ENGINE 로 변경 가능
+DEFAULT_WRITER_ENGINE = os.environ.get("EXCEL_WRITER_ENGINE", "auto")
+WRITER_ENGINES = ("xlsxwriter", "openpyxl-write-only", "openpyxl")
+
+# 📌 자주 쓰는 표시 형식
+DATE_FORMAT = "YYYY-MM-DD"
+DATETIME_FORMAT = "YYYY-MM-DD HH:MM:SS"
+THOUSANDS_FORMAT = "#,##0"  # 1000 단위 콤마
+
+# 📌 값 종류별 기본 표시 형식 (pandas 기본값과 동일 — 숫자는 서식 없음)
+DEFAULT_VALUE_FORMATS = {"datetime": DATETIME_FORMAT, "date": DATE_FORMAT, "number": None}
+
+
+def resolve_engine(engine=DEFAULT_WRITER_ENGINE):
+    """
+    사용할 저장 엔진 이름을 결정하는 함수
+    - auto: xlsxwriter → (lxml 이 있으면) openpyxl 쓰기 전용 → openpyxl 순으로 선택
+    - xlsxwriter 가 설치되어 있지 않으면 openpyxl 계열로 대체
+    """
+    if engine not in WRITER_ENGINES + ("auto",):
+        raise ValueError(f"지원하지 않는 엑셀 저장 엔진입니다: {engine}")
+    if engine in ("auto", "xlsxwriter"):
+        if xlsxwriter is not None:
+            return "xlsxwriter"
+        # 쓰기 전용 모드는 lxml 이 없으면 기존 방식보다 느림
+        return "openpyxl-write-only" if LXML else "openpyxl"
+    return engine
+
+
+def _frame_rows(df):
+    """ DataFrame을 엑셀에 쓸 수 있는 값(빈 값은 None)의 행 단위로 변환하는 함수 """
+    values = df.astype(object).where(pd.notna(df), None)
+    return values.itertuples(index=False, name=None)
+
+
+def value_kind(value):
+    """ 표시 형식을 정할 때 사용하는 값 종류 (datetime / date / number, 문자열·빈 값·불리언은 None) """
+    if isinstance(value, datetime):
+        return "datetime"
+    if isinstance(value, date):
+        return "date"
+    if isinstance(value, numbers.Real) and not isinstance(value, bool):
+        return "number"
+    return None
+
+
+def resolve_format(value, column_format=None, value_formats=DEFAULT_VALUE_FORMATS):
+    """
+    셀 값 하나에 적용할 표시 형식을 결정하는 함수
+    - 문자열(수식 포함)·빈 값에는 서식을 적용하지 않음
+    - 컬럼 지정 형식 → 값 종류별 형식 순으로 적용
+    """
+    kind = value_kind(value)
+    if kind is None:
+        return None
+    return column_format or value_formats.get(kind)
+
+
+def date_column_formats(date_columns, number_format=DATE_FORMAT):
+    """ 날짜 컬럼 목록을 {컬럼명: 표시 형식} 사양으로 만드는 함수 """
+    return {col: number_format for col in date_columns}
+
+
+def _sheet_formats(df, column_formats):
+    """ 컬럼 위치별 지정 표시 형식 목록을 만드는 함수 """
+    column_formats = column_formats or {}
+    return [column_formats.get(col) for col in df.columns]
+
+
+def _write_xlsxwriter(sheets, output, column_formats, value_formats, layouts):
+    """ xlsxwriter 상수 메모리 모드로 행 단위 스트리밍 저장 """
+    wb = xlsxwriter.Workbook(output, {"constant_memory": True})
+    header_format = wb.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+    formats = {}
+
+    def get_format(number_format):
+        """ 같은 표시 형식은 Format 객체 하나를 공유 """
+        if number_format not in formats:
+            formats[number_format] = wb.add_format({"num_format": number_format})
+        return formats[number_format]
+
+    for sheet_name, df in sheets.items():
+        ws = wb.add_worksheet(sheet_name)
+        layout = layouts.get(sheet_name, {})
+        row_heights = layout.get("row_heights", {})
+        cell_formats = layout.get("cell_formats", {})
+        col_formats = _sheet_formats(df, column_formats)
+
+        for col_idx, width in layout.get("column_widths", {}).items():
+            ws.set_column(col_idx - 1, col_idx - 1, width)
+
+        # 헤더 행
+        if 1 in row_heights:
+            ws.set_row(0, row_heights[1])
+        for col_idx, header in enumerate(df.columns):
+            ws.write(0, col_idx, header, header_format)
+
+        # 데이터 행 (상수 메모리 모드는 행 순서대로 써야 함)
+        for row_idx, row in enumerate(_frame_rows(df), start=1):
+            if row_idx + 1 in row_heights:
+                ws.set_row(row_idx, row_heights[row_idx + 1])
+            for col_idx, value in enumerate(row):
+                number_format = cell_formats.get((row_idx + 1, col_idx + 1))
+                if number_format is None:
+                    number_format = resolve_format(value, col_formats[col_idx], value_formats)
+
+                cell_format = get_format(number_format) if number_format else None
+                if value is None:
+                    if cell_format is not None:
+                        ws.write_blank(row_idx, col_idx, None, cell_format)
+                elif isinstance(value, (datetime, date)):
+                    ws.write_datetime(row_idx, col_idx, value, cell_format)
+                else:
+                    ws.write(row_idx, col_idx, value, cell_format)
+
+    wb.close()
+
+
+def _write_openpyxl_write_only(sheets, output, column_formats, value_formats, layouts):
+    """ openpyxl 쓰기 전용 모드로 행 단위 스트리밍 저장 (셀 객체 모델을 만들지 않음) """
+    wb = Workbook(write_only=True)
+    thin = Side(style="thin")
+    header_font = Font(bold=True)
+    header_border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    header_alignment = Alignment(horizontal="center", vertical="top")
+
+    for sheet_name, df in sheets.items():
+        ws = wb.create_sheet(sheet_name)
+        layout = layouts.get(sheet_name, {})
+        cell_formats = layout.get("cell_formats", {})
+        col_formats = _sheet_formats(df, column_formats)
+
+        # 열 너비 / 행 높이는 행을 쓰기 전에 설정해야 함
+        for col_idx, width in layout.get("column_widths", {}).items():
+            ws.column_dimensions[get_column_letter(col_idx)].width = width
+        for row_idx, height in layout.get("row_heights", {}).items():
+            ws.row_dimensions[row_idx].height = height
+
+        header = []
+        for value in df.columns:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.font, cell.border, cell.alignment = header_font, header_border, header_alignment
+            header.append(cell)
+        ws.append(header)
+
+        for row_idx, row in enumerate(_frame_rows(df), start=2):
+            cells = []
+            for col_idx, value in enumerate(row, start=1):
+                number_format = cell_formats.get((row_idx, col_idx))
+                if number_format is None:
+                    number_format = resolve_format(value, col_formats[col_idx - 1], value_formats)
+
+                if number_format is None:
+                    cells.append(value)
+                else:
+                    cell = WriteOnlyCell(ws, value=value)
+                    cell.number_format = number_format
+                    cells.append(cell)
+            ws.append(cells)
+
+    wb.save(output)
+
+
+def _write_openpyxl(sheets, output, column_formats, value_formats, layouts):
+    """ 기존 방식 (pandas + openpyxl 전체 객체 모델) — 다른 엔진을 사용할 수 없을 때의 대체 경로 """
+    # pandas 가 날짜/시간 기본 형식은 직접 적용하므로 그 외 값 종류 형식이 있을 때만 전체 셀을 확인
+    extra_kinds = {kind for kind, number_format in value_formats.items() if number_format != DEFAULT_VALUE_FORMATS.get(kind)}
+
+    with pd.ExcelWriter(output, engine="openpyxl") as writer:
+        for sheet_name, df in sheets.items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+            ws = writer.sheets[sheet_name]
+            layout = layouts.get(sheet_name, {})
+
+            # 컬럼 / 값 종류별 서식 적용 (저장 전 메모리에서)
+            for col_idx, column_format in enumerate(_sheet_formats(df, column_formats), start=1):
+                if column_format is None and not extra_kinds:
+                    continue
+                for (cell,) in ws.iter_rows(min_row=2, min_col=col_idx, max_col=col_idx):
+                    number_format = resolve_format(cell.value, column_format, value_formats)
+                    if number_format is not None:
+                        cell.number_format = number_format
+
+            for col_idx, width in layout.get("column_widths", {}).items():
+                ws.column_dimensions[get_column_letter(col_idx)].width = width
+            for row_idx, height in layout.get("row_heights", {}).items():
+                ws.row_dimensions[row_idx].height = height
+            for (row_idx, col_idx), number_format in layout.get("cell_formats", {}).items():
+                if row_idx <= len(df) + 1 and col_idx <= len(df.columns):
+                    ws.cell(row=row_idx, column=col_idx).number_format = number_format
+
+
+def write_excel(sheets, output=None, column_formats=None, layouts=None, engine=DEFAULT_WRITER_ENGINE, value_formats=None):
+    """
+    여러 DataFrame을 하나의 엑셀 파일로 저장하는 함수 (저장 엔진 선택 가능)
+    - sheets: {시트명: DataFrame}
+    - column_formats: {컬럼명: 표시 형식} — 해당 컬럼의 날짜/숫자 값에 저장 시점에 적용 (예: "YYYY-MM-DD")
+    - value_formats: {"datetime" / "date" / "number": 표시 형식} — 컬럼 지정이 없는 값에 적용 (예: {"number": "#,##0"})
+    - layouts: {시트명: {"column_widths": {열 번호: 너비}, "row_heights": {행 번호: 높이}, "cell_formats": {(행, 열): 표시 형식}}}
+      (행/열 번호는 1부터, 헤더가 1행)
+    - output: 파일 경로 또는 파일 객체, 없으면 BytesIO 를 만들어 반환
+    """
+    buffer = output if output is not None else io.BytesIO()
+    layouts = layouts or {}
+    value_formats = {**DEFAULT_VALUE_FORMATS, **(value_formats or {})}
+
+    writers = {
+        "xlsxwriter": _write_xlsxwriter,
+        "openpyxl-write-only": _write_openpyxl_write_only,
+        "openpyxl": _write_openpyxl,
+    }
+    writers[resolve_engine(engine)](sheets, buffer, column_formats, value_formats, layouts)
+
+    if output is None:
+        buffer.seek(0)
+    return buffer
@@ -0,0 +1,91 @@
+"""
+Streamlit 화면 없이 폴더의 계열사 인원 현황 엑셀을 병합·분석하는 배치 실행기 (월말 야간 실행용)
+
+사용 예:
+    python hr_batch.py ./rosters --month 2025-09 --output merged_2025-09.xlsx
+    python hr_batch.py ./rosters --month 2025-09 --month-range 2024-10 2025-09 --save-snapshot --metrics-json run.json
+    python hr_batch.py ./rosters --month 2025-09 --save-snapshot --diff-month 2025-08
+"""
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+from excel_writer import WRITER_ENGINES, DEFAULT_WRITER_ENGINE
+from hr_engine import DEFAULT_MAX_WORKERS
+from hr_pipeline import (
+    DEFAULT_SHEET_ORDER, DEFAULT_DELETE_KEYWORDS, order_sheets, parse_list_option, previous_month_of,
+    list_excel_files, run_hr_batch
+)
+
+
+def month_arg(value):
+    """ 'YYYY-MM' 형식의 명령행 인자를 검증하는 함수 """
+    try:
+        return datetime.strptime(value, "%Y-%m").strftime("%Y-%m")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"기준 월은 YYYY-MM 형식이어야 합니다: {value}")
+
+
+def parse_args(argv=None):
+    """ 명령행 인자를 읽는 함수 """
+    parser = argparse.ArgumentParser(description="계열사 인원 현황 엑셀 병합 및 인원 분석 (배치 실행)")
+    parser.add_argument("input_dir", help="계열사 엑셀(.xlsx) 파일이 있는 폴더")
+    parser.add_argument("--month", type=month_arg, default=previous_month_of(), help="기준 월 YYYY-MM (기본값: 전월)")
+    parser.add_argument("--sheet-order", default=", ".join(DEFAULT_SHEET_ORDER), help="시트 정렬 순서 (쉼표로 구분)")
+    parser.add_argument("--delete-keywords", default=", ".join(DEFAULT_DELETE_KEYWORDS), help="컬럼명에 포함되면 삭제할 키워드 (쉼표로 구분)")
+    parser.add_argument("--month-range", nargs=2, type=month_arg, metavar=("START", "END"), help="월별 인원 추이 계산 기간")
+    parser.add_argument("--output", help="결과 엑셀 경로 (기본값: merged_excel_<기준 월>.xlsx)")
+    parser.add_argument("--metrics-json", help="실행 요약(JSON) 경로 (기본값: 결과 엑셀과 같은 이름의 .json)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help="병렬 파싱 프로세스 수 (1 = 순차 처리)")
+    parser.add_argument("--engine", choices=("auto",) + WRITER_ENGINES, default=DEFAULT_WRITER_ENGINE, help="엑셀 저장 엔진")
+    parser.add_argument("--save-snapshot", action="store_true", help="병합 결과를 기준 월 스냅샷으로 로스터 저장소에 저장")
+    parser.add_argument("--diff-month", type=month_arg, help="로스터 저장소의 이 월 스냅샷과 비교하여 추가 / 삭제 / 변경 인원 시트 추가")
+
+    args = parser.parse_args(argv)
+    if args.month_range and args.month_range[0] > args.month_range[1]:
+        parser.error("시작 월이 종료 월보다 늦습니다.")
+    if not os.path.isdir(args.input_dir):
+        parser.error(f"폴더가 없습니다: {args.input_dir}")
+    return args
+
+
+def main(argv=None):
+    """ 배치 실행 진입점 (반환값: 종료 코드 — 0 성공, 1 병합할 시트 없음, 2 일부 파일 오류) """
+    args = parse_args(argv)
+    output_file = args.output or f"merged_excel_{args.month}.xlsx"
+    metrics_file = args.metrics_json or os.path.splitext(output_file)[0] + ".json"
+
+    files = list_excel_files(args.input_dir)
+    if not files:
+        print(f"❌ `{args.input_dir}` 에 엑셀 파일이 없습니다.", file=sys.stderr)
+        return 1
+
+    summary = run_hr_batch(
+        files, output_file, args.month,
+        sheet_order=order_sheets(parse_list_option(args.sheet_order)),
+        delete_keywords=parse_list_option(args.delete_keywords),
+        max_workers=args.workers,
+        month_range=tuple(args.month_range) if args.month_range else None,
+        save_snapshots=args.save_snapshot,
+        engine=args.engine,
+        diff_month=args.diff_month,
+    )
+
+    with open(metrics_file, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    for message in summary["messages"]:
+        print(message["message"], file=sys.stderr)
+
+    if summary["output_file"] is None:
+        print("❌ 병합할 시트가 없어 결과 엑셀을 만들지 않았습니다.", file=sys.stderr)
+        return 1
+
+    print(f"✅ {len(summary['headcount'])}개 시트 병합·분석 완료 ({summary['total_wall_s']}초): {output_file}")
+    print(f"📊 실행 요약: {metrics_file}")
+    return 2 if any(message["level"] == "error" for message in summary["messages"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,418 @@
+import os
+import re
+import time
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from operator import itemgetter
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from upload_sources import get_source_name, to_picklable_source
+from pipeline_metrics import RssSampler, frame_counts
+from hr_rules import load_rules, DEFAULT_RULES_PATH
+
+try:
+    import pyarrow  # noqa: F401 — 고유값이 많은 문자열 컬럼(성명, 연락처 등)을 Arrow 문자열로 보관
+    COMPACT_STRING_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:  # 없으면 해당 컬럼은 object 로 유지
+    COMPACT_STRING_DTYPE = None
+
+# 📌 스트리밍 읽기 시 한 번에 DataFrame으로 변환할 행 수
+DEFAULT_CHUNK_SIZE = 5000
+
+# 📌 병렬 파싱 기본 프로세스 수 (환경 변수 HR_PARSE_WORKERS 로 변경 가능)
+DEFAULT_MAX_WORKERS = int(os.environ.get("HR_PARSE_WORKERS", min(os.cpu_count() or 1, 4)))
+
+# 📌 계열사 간 동일인 확인에 쓰는 식별 컬럼 키워드 (환경 변수 HR_IDENTITY_KEYWORDS 로 변경 가능) — 값은 컬럼 삭제 전에 해시로만 보관
+DEFAULT_IDENTITY_KEYWORDS = [k.strip() for k in os.environ.get("HR_IDENTITY_KEYWORDS", "주민").split(",") if k.strip()]
+
+# 📌 식별 해시 컬럼명 (분석에만 사용하고 결과 엑셀 / 스냅샷에는 저장하지 않음)
+IDENTITY_COLUMN = "_식별키"
+
+# 📌 식별 해시 키 (환경 변수 HR_IDENTITY_SALT, 없으면 서버 실행마다 새로 생성 — 해시로 원래 값을 역산할 수 없도록)
+IDENTITY_SALT = os.environ.get("HR_IDENTITY_SALT", "").encode()[:64] or os.urandom(16)
+
+# 📌 범주형(category)으로 바꿀 문자열 컬럼의 최대 고유값 비율 (고유값 수 / 행 수, 환경 변수 HR_CATEGORY_MAX_RATIO 로 변경 가능)
+DEFAULT_CATEGORY_MAX_RATIO = float(os.environ.get("HR_CATEGORY_MAX_RATIO", 0.5))
+
+
+def get_file_stem(file):
+    """ 파일 경로(또는 name 속성이 있는 업로드 파일)에서 확장자를 제외한 파일명을 반환하는 함수 """
+    name = file if isinstance(file, str) else file.name
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+def sort_files_by_sheet_order(files, sheet_order):
+    """ 시트 정렬 순서에 따라 파일 목록을 정렬하는 함수 """
+    files.sort(key=lambda x: sheet_order.index(get_file_stem(x)) if get_file_stem(x) in sheet_order else len(sheet_order))
+    return files
+
+
+def _rows_to_frame(rows, headers):
+    """ 행 목록을 헤더 길이에 맞춰 DataFrame으로 변환하는 함수 """
+    width = len(headers)
+    rows = [row[:width] if len(row) >= width else row + (None,) * (width - len(row)) for row in rows]
+    return pd.DataFrame(rows, columns=headers)
+
+
+def compile_keyword_matcher(delete_keywords):
+    """ 삭제 키워드 목록을 정규식 하나로 컴파일하는 함수 (키워드가 없으면 None) """
+    keywords = sorted({keyword for keyword in delete_keywords if keyword}, key=len, reverse=True)
+    if not keywords:
+        return None
+    return re.compile("|".join(map(re.escape, keywords)))
+
+
+def identity_fingerprint(value, salt=IDENTITY_SALT):
+    """ 식별 값(예: 주민등록번호)을 숫자 / 영문자만 남겨 키가 있는 해시로 바꾸는 함수 (값이 없으면 None) """
+    if value is None:
+        return None
+    text = re.sub(r"[^0-9A-Za-z]", "", str(value))
+    if not text:
+        return None
+    return hashlib.blake2b(text.encode(), key=salt, digest_size=8).hexdigest()
+
+
+def _column_projector(headers, matcher, identity_matcher=None, identity_salt=IDENTITY_SALT):
+    """
+    헤더 행에서 삭제 키워드가 포함된 컬럼(공백 제거 후 검사)을 찾아 남길 컬럼만 꺼내는 함수를 만드는 함수
+    - identity_matcher 에 걸리는 첫 컬럼은 값의 해시를 식별키 컬럼으로 마지막에 추가 (원래 컬럼은 삭제 키워드에 따라 처리)
+    반환값: (남길 헤더, 행 변환 함수 또는 None(삭제하거나 추가할 컬럼 없음), 삭제된 컬럼명 목록)
+    """
+    keep = []
+    removed = []
+    identity = None
+    for idx, header in enumerate(headers):
+        name = header.strip() if isinstance(header, str) else header
+        if identity is None and identity_matcher is not None and isinstance(name, str) and identity_matcher.search(name):
+            identity = idx
+        if matcher is not None and isinstance(name, str) and matcher.search(name):
+            removed.append(name)
+        else:
+            keep.append(idx)
+
+    if not removed and identity is None:
+        return headers, None, removed
+
+    width = len(headers)
+    getter = itemgetter(*keep) if keep else (lambda row: ())
+    single = len(keep) == 1
+
+    def project(row):
+        """ 행을 헤더 길이에 맞춘 뒤 남길 컬럼 값만 꺼내는 내부 함수 """
+        if len(row) < width:
+            row = row + (None,) * (width - len(row))
+        values = (getter(row),) if single else getter(row)
+        if identity is not None:
+            values += (identity_fingerprint(row[identity], identity_salt),)
+        return values
+
+    identity_header = (IDENTITY_COLUMN,) if identity is not None else ()
+    return tuple(headers[idx] for idx in keep) + identity_header, project, removed
+
+
+def read_sheet_streaming(ws, chunk_size=DEFAULT_CHUNK_SIZE, matcher=None, identity_matcher=None, identity_salt=IDENTITY_SALT):
+    """
+    읽기 전용 워크시트를 한 행씩 읽으면서 "No" 헤더 행을 찾고 DataFrame을 청크 단위로 만드는 함수
+    - "No" 행이 없으면 첫 번째 행을 헤더로 사용 (기존 병합 로직과 동일)
+    - matcher(compile_keyword_matcher)에 걸리는 컬럼은 헤더를 찾는 즉시 제외하여 행 버퍼와 DataFrame에 담지 않음
+    - identity_matcher 에 걸리는 컬럼은 삭제 전에 값의 해시만 식별키 컬럼으로 남김
+    반환값: (DataFrame 또는 None(시트가 비어 있음), 삭제된 컬럼명 목록)
+    """
+    headers = None
+    project = None
+    removed_cols = []
+    header_found = False
+    chunks = []
+    buffer = []
+    has_value = False
+
+    for row in ws.iter_rows(values_only=True):
+        if not has_value and any(value is not None for value in row):
+            has_value = True
+
+        # ✅ "No" 헤더 행을 만나면 그 이전까지 읽은 행은 버리고 새로 시작
+        if not header_found and row and row[0] == "No":
+            headers, project, removed_cols = _column_projector(row, matcher, identity_matcher, identity_salt)
+            header_found = True
+            chunks = []
+            buffer = []
+            continue
+
+        # ✅ "No" 행을 찾기 전까지는 첫 번째 행을 임시 헤더로 사용
+        if headers is None:
+            headers, project, removed_cols = _column_projector(row, matcher, identity_matcher, identity_salt)
+            continue
+
+        buffer.append(row if project is None else project(row))
+        if len(buffer) >= chunk_size:
+            chunks.append(_rows_to_frame(buffer, headers))
+            buffer = []
+
+    if not has_value:
+        return None, []
+
+    if buffer or not chunks:
+        chunks.append(_rows_to_frame(buffer, headers))
+
+    df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    return df, removed_cols
+
+
+def compact_roster_frame(df, max_ratio=DEFAULT_CATEGORY_MAX_RATIO, employee_type_order=None):
+    """
+    엑셀에서 읽은 object 컬럼을 메모리가 적은 dtype 으로 바꾸는 함수 (DataFrame 을 직접 변경하고 반환)
+    - 날짜만 있는 컬럼 → datetime64 (변환할 수 없는 값이 있으면 그대로 유지)
+    - 고유값이 적은 문자열 컬럼(부서명, 직급명 등) → category, 나머지 문자열 컬럼(성명 등) → Arrow 문자열
+    - 사원구분명 → 사원구분 정렬 순서가 들어 있는 순서형 category
+    - 여러 타입이 섞인 컬럼은 그대로 유지
+    """
+    for column in df.columns[df.dtypes == object]:
+        values = df[column]
+        kind = pd.api.types.infer_dtype(values, skipna=True)
+
+        if kind in ("datetime", "date"):
+            converted = pd.to_datetime(values, errors="coerce")
+            if converted.isna().sum() == values.isna().sum():
+                df[column] = converted
+        elif kind == "string" and column == "사원구분명":
+            df[column] = values.astype(employee_type_dtype(values, employee_type_order or EMPLOYEE_TYPE_ORDER))
+        elif kind == "string" and values.nunique() <= max_ratio * len(values):
+            df[column] = values.astype("category")
+        elif kind == "string" and COMPACT_STRING_DTYPE is not None:
+            df[column] = values.astype(COMPACT_STRING_DTYPE)
+
+    return df
+
+
+def parse_excel_file(file, delete_keywords, chunk_size=DEFAULT_CHUNK_SIZE, identity_keywords=None, identity_salt=IDENTITY_SALT, compact_dtypes=False):
+    """
+    엑셀 파일 하나를 읽기 전용 모드로 스트리밍하여 정리된 시트 목록을 반환하는 함수
+    - identity_keywords 를 주면 해당 컬럼 값의 해시를 식별키 컬럼(IDENTITY_COLUMN)으로 추가
+    - compact_dtypes 가 True 이면 날짜 / 범주형 컬럼을 메모리가 적은 dtype 으로 변환 (compact_roster_frame)
+    반환값: ([(시트명, DataFrame, 삭제된 컬럼 목록), ...], [경고 메시지, ...])
+    """
+    frames = []
+    warnings = []
+    file_name = get_source_name(file)
+    matcher = compile_keyword_matcher(delete_keywords)  # 키워드 검사는 파일당 한 번 컴파일한 정규식으로 처리
+    identity_matcher = compile_keyword_matcher(identity_keywords or [])
+
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        if not wb.sheetnames:
+            warnings.append(f"⚠️ 파일 `{file_name}` 에 사용 가능한 시트가 없어 건너뜁니다.")
+            return frames, warnings
+
+        for sheet_name in wb.sheetnames:
+            # ✅ **키워드 기반 삭제 처리** (헤더를 찾는 즉시 제외 — 삭제 컬럼 값은 DataFrame으로 만들지 않음)
+            df, removed_cols = read_sheet_streaming(wb[sheet_name], chunk_size=chunk_size, matcher=matcher,
+                                                    identity_matcher=identity_matcher, identity_salt=identity_salt)
+
+            if df is None:
+                warnings.append(f"⚠️ 파일 `{file_name}` 의 시트 `{sheet_name}` 가 비어 있어 건너뜁니다.")
+                continue
+
+            # 컬럼명 공백 제거
+            df.columns = df.columns.str.strip()
+            if compact_dtypes:
+                compact_roster_frame(df)
+
+            frames.append((sheet_name, df, removed_cols))
+    finally:
+        wb.close()  # 읽기 전용 모드는 파일 핸들을 직접 닫아야 함
+
+    return frames, warnings
+
+
+def _parse_excel_file_safe(file, delete_keywords, chunk_size, identity_keywords=None, identity_salt=IDENTITY_SALT, compact_dtypes=False):
+    """
+    파일 하나를 파싱하고 예외는 메시지로 돌려주는 함수 (프로세스 풀 작업 단위)
+    반환값: (시트 목록, 경고 목록, 오류 메시지 또는 None, 측정 결과 {시간, 행 수, 셀 수, 종료 / 최대 RSS, RSS 증가량})
+    """
+    start = time.perf_counter()
+    with RssSampler() as sampler:  # 작업 프로세스에서 실행되면 그 프로세스의 RSS 를 측정
+        try:
+            frames, warnings = parse_excel_file(file, delete_keywords, chunk_size=chunk_size, identity_keywords=identity_keywords,
+                                                identity_salt=identity_salt, compact_dtypes=compact_dtypes)
+            error = None
+        except Exception as e:
+            frames, warnings, error = [], [], str(e)
+
+    rows, cells = frame_counts([df for _, df, _ in frames])
+    stats = {"wall_s": time.perf_counter() - start, "rows": rows, "cells": cells,
+             "rss": sampler.end_mb, "peak_rss": sampler.peak_mb, "rss_delta": sampler.delta_mb}
+    return frames, warnings, error, stats
+
+
+def parse_excel_files(files, delete_keywords, max_workers=None, chunk_size=DEFAULT_CHUNK_SIZE, metrics=None, identity_keywords=None, compact_dtypes=False):
+    """
+    여러 엑셀 파일을 프로세스 풀에서 병렬로 파싱하는 함수
+    - 결과는 입력 파일 순서(시트 정렬 순서)를 그대로 유지
+    - max_workers 가 1 이하이거나 파일이 하나뿐이면 순차 처리
+    - 프로세스 풀을 사용할 수 없는 환경이면 순차 처리로 대체
+    - metrics(PipelineMetrics)를 주면 파일별 처리 시간 / 행·셀 수 / 파일 처리 중 최대 RSS 와 증가량을 기록
+    - identity_keywords 를 주면 식별 컬럼 값의 해시를 식별키 컬럼으로 추가 (해시 키는 이 프로세스의 IDENTITY_SALT 를 작업 프로세스에 전달)
+    - compact_dtypes 가 True 이면 날짜 / 범주형 컬럼을 메모리가 적은 dtype 으로 변환
+    반환값: [(파일, 시트 목록, 경고 목록, 오류 메시지 또는 None), ...]
+    """
+    results = _parse_excel_files(files, delete_keywords, max_workers, chunk_size, identity_keywords, compact_dtypes)
+
+    if metrics is not None:
+        for file, (_, _, _, stats) in zip(files, results):
+            metrics.add("parse_file", stats["wall_s"], file=get_source_name(file),
+                        rows=stats["rows"], cells=stats["cells"], rss=stats["rss"], peak_rss=stats["peak_rss"], rss_delta=stats["rss_delta"])
+
+    return [(file, frames, warnings, error) for file, (frames, warnings, error, _) in zip(files, results)]
+
+
+def _parse_excel_files(files, delete_keywords, max_workers, chunk_size, identity_keywords=None, compact_dtypes=False):
+    """ 파일별 파싱 작업을 프로세스 풀(또는 순차)로 실행하고 작업 결과를 입력 순서대로 반환하는 함수 """
+    if max_workers is None:
+        max_workers = DEFAULT_MAX_WORKERS
+    max_workers = min(max_workers, len(files))
+
+    if max_workers > 1:
+        try:
+            # ✅ Streamlit 서버는 멀티스레드이므로 fork 대신 spawn 사용
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                results = list(executor.map(
+                    _parse_excel_file_safe,
+                    [to_picklable_source(file) for file in files],  # 업로드 버퍼는 디스크를 거치지 않고 전달
+                    [delete_keywords] * len(files),
+                    [chunk_size] * len(files),
+                    [identity_keywords] * len(files),
+                    [IDENTITY_SALT] * len(files),  # spawn 프로세스는 모듈을 새로 읽으므로 해시 키를 직접 전달
+                    [compact_dtypes] * len(files),
+                ))
+            return results
+        except (BrokenProcessPool, OSError, NotImplementedError):
+            pass  # 순차 처리로 대체
+
+    return [_parse_excel_file_safe(file, delete_keywords, chunk_size, identity_keywords, IDENTITY_SALT, compact_dtypes) for file in files]
+
+
+# 📌 사원구분 정렬 순서
+EMPLOYEE_TYPE_ORDER = ["임원", "정규직", "계약직", "파견직"]
+
+# 📌 계열사별 정리 규칙 (컬럼명 변경, 제외 인원, 사원구분 매핑, 퇴사 표시) — 시작 시 규칙 파일을 검사하고 컴파일
+SHEET_RULES = load_rules(DEFAULT_RULES_PATH, EMPLOYEE_TYPE_ORDER)
+
+
+def employee_type_dtype(values=(), employee_type_order=EMPLOYEE_TYPE_ORDER):
+    """ 사원구분 정렬 순서를 담은 순서형 category dtype 을 만드는 함수 (순서에 없는 사원구분은 가나다순으로 뒤에 추가) """
+    extra = sorted({str(value) for value in pd.unique(pd.Series(values, dtype=object).dropna())} - set(employee_type_order))
+    return pd.CategoricalDtype(list(employee_type_order) + extra, ordered=True)
+
+
+def month_str_to_ordinal(month_str):
+    """ 'YYYY-MM' 또는 'YYYY-MM-DD' 문자열을 정수 월 서수(연도 * 12 + 월 - 1)로 변환하는 함수 """
+    year, month = month_str.split("-")[:2]
+    return int(year) * 12 + int(month) - 1
+
+
+def to_month_ordinal(values):
+    """ 날짜 컬럼을 정수 월 서수로 변환하는 함수 (변환할 수 없는 값은 NaN) """
+    dates = pd.to_datetime(values, errors="coerce")
+    return dates.dt.year * 12 + dates.dt.month - 1
+
+
+def compute_headcount_metrics(hire_month, resign_month, employee_type, month_ordinal, employee_type_order=EMPLOYEE_TYPE_ORDER):
+    """
+    기준 월의 입사자, 퇴사자, 재직자 수를 한 번의 그룹 집계로 계산하는 함수
+    반환값: (전체 합계 Series, 사원구분별 DataFrame) — 컬럼은 입사자 / 퇴사자 / 재직자
+    """
+    # ✅ 각 조건 마스크는 한 번만 계산
+    masks = pd.DataFrame({
+        "입사자": hire_month == month_ordinal,
+        "퇴사자": resign_month == month_ordinal,
+        "재직자": (hire_month <= month_ordinal) & (resign_month.isna() | (resign_month > month_ordinal)),
+    })
+
+    by_type = masks.groupby(employee_type, dropna=False, observed=True).sum()
+    totals = by_type.sum()
+    by_type = by_type.reindex(employee_type_order, fill_value=0)
+
+    return totals, by_type
+
+
+def ordinal_to_month_str(month_ordinal):
+    """ 정수 월 서수를 'YYYY-MM' 문자열로 변환하는 함수 """
+    return f"{month_ordinal // 12:04d}-{month_ordinal % 12 + 1:02d}"
+
+
+def compute_headcount_timeseries(hire_month, resign_month, employee_type, start_ordinal, end_ordinal, employee_type_order=EMPLOYEE_TYPE_ORDER):
+    """
+    기간 내 모든 월의 입사자, 퇴사자, 재직자 수를 한 번에 계산하는 함수
+    - 월별로 DataFrame을 다시 필터링하지 않고 입사/퇴사 이벤트의 누적 합으로 재직자 수를 계산
+    반환값: 기준월 / 사원구분명 / 입사자 / 퇴사자 / 재직자 컬럼의 DataFrame (사원구분명 "전체"는 합계)
+    """
+    n_months = end_ordinal - start_ordinal + 1
+    n_groups = len(employee_type_order) + 1  # 마지막 그룹은 사원구분이 없거나 순서에 없는 인원 (전체 합계에만 포함)
+
+    type_codes = pd.Categorical(employee_type, categories=employee_type_order).codes.astype(np.int64)
+    type_codes[type_codes < 0] = len(employee_type_order)
+
+    hire = hire_month.to_numpy(dtype=float)
+    resign = resign_month.to_numpy(dtype=float)
+
+    # 퇴사월이 입사월보다 빠른 경우는 재직 기간이 없으므로 종료월을 입사월로 맞춤
+    end = np.where(resign < hire, hire, resign)
+
+    def count_events(months, valid):
+        """ 그룹별·월별 이벤트 수를 세는 내부 함수 (0번 칸은 기간 시작 이전 누적분) """
+        valid = valid & (months <= end_ordinal)
+        offsets = np.clip(months[valid] - start_ordinal + 1, 0, None).astype(np.int64)
+        index = type_codes[valid] * (n_months + 1) + offsets
+        return np.bincount(index, minlength=n_groups * (n_months + 1)).reshape(n_groups, n_months + 1)
+
+    has_hire = ~np.isnan(hire)
+    hire_events = count_events(hire, has_hire)
+    end_events = count_events(end, has_hire & ~np.isnan(end))
+    resign_events = count_events(resign, ~np.isnan(resign))
+
+    hires = hire_events[:, 1:]
+    resigned = resign_events[:, 1:]
+    active = (hire_events.cumsum(axis=1) - end_events.cumsum(axis=1))[:, 1:]
+
+    months = [ordinal_to_month_str(ordinal) for ordinal in range(start_ordinal, end_ordinal + 1)]
+    labels = ["전체"] + list(employee_type_order)
+    values = {
+        "입사자": np.vstack([hires.sum(axis=0), hires[:-1]]),
+        "퇴사자": np.vstack([resigned.sum(axis=0), resigned[:-1]]),
+        "재직자": np.vstack([active.sum(axis=0), active[:-1]]),
+    }
+
+    return pd.DataFrame({
+        "기준월": np.tile(months, len(labels)),
+        "사원구분명": np.repeat(labels, n_months),
+        **{name: matrix.ravel() for name, matrix in values.items()},
+    })
+
+
+def prepare_employee_data(df, sheet_name, previous_month_last_day, date_columns, employee_type_order=EMPLOYEE_TYPE_ORDER):
+    """
+    직원 데이터를 분석할 수 있도록 정리하는 함수
+    - 컬럼명 변경 / 제외 인원 / 사원구분 매핑 / 퇴사 표시는 계열사별 규칙(hr_rules.json)을 한 번에 적용
+    반환값: (정리된 DataFrame, 입사월 서수 Series, 퇴사월 서수 Series)
+    """
+    # 📌 계열사 규칙 적용 (병합된 원본 DataFrame은 변경하지 않음)
+    df, resign_marked = SHEET_RULES.for_sheet(sheet_name).apply(df)
+
+    # ✅ **사원구분명은 정렬 순서가 들어 있는 순서형 category 로 변환하여 코드 순서로 정렬** (순서에 없는 사원구분 / 빈 값은 뒤로)
+    employee_type = df["사원구분명"]
+    if not (isinstance(employee_type.dtype, pd.CategoricalDtype) and employee_type.cat.ordered
+            and list(employee_type.cat.categories[:len(employee_type_order)]) == list(employee_type_order)):
+        df["사원구분명"] = employee_type.astype(employee_type_dtype(employee_type, employee_type_order))
+    df = df.sort_values(by="사원구분명", kind="stable", na_position="last")
+
+    # 📌 날짜 변환 (문자열 대신 정수 월 서수로 한 번만 변환)
+    if "퇴사일" not in df.columns:
+        df["퇴사일"] = None
+    month_ordinals = {col: to_month_ordinal(df[col]) for col in date_columns}
+    if resign_marked is not None:
+        month_ordinals["퇴사일"] = month_ordinals["퇴사일"].mask(resign_marked, month_str_to_ordinal(previous_month_last_day))
+
+    return df, month_ordinals["입사일"], month_ordinals["퇴사일"]
@@ -0,0 +1,351 @@
+import os
+import pandas as pd
+from datetime import datetime, timedelta
+from hr_engine import (
+    parse_excel_files, get_file_stem, DEFAULT_MAX_WORKERS, DEFAULT_IDENTITY_KEYWORDS, IDENTITY_COLUMN,
+    EMPLOYEE_TYPE_ORDER, SHEET_RULES, month_str_to_ordinal, prepare_employee_data, compute_headcount_metrics,
+    compute_headcount_timeseries
+)
+from excel_writer import write_excel, date_column_formats, DEFAULT_WRITER_ENGINE
+from pipeline_metrics import PipelineMetrics, measure, frame_counts
+from roster_store import save_snapshot, load_month
+from roster_diff import diff_months
+from affiliate_matcher import (
+    TRANSFER_SHEET_NAME, DUPLICATE_SHEET_NAME, TRANSFER_COLUMNS, person_frame, match_affiliates, flag_transfers
+)
+from upload_sources import get_source_name
+
+# 📌 분석 대상 날짜 컬럼
+DATE_COLUMNS = ["입사일", "퇴사일"]
+
+# 📌 인원 집계 항목
+HEADCOUNT_COLUMNS = ["입사자", "퇴사자", "재직자"]
+
+# 📌 기본 삭제 키워드 (개인정보 컬럼)
+DEFAULT_DELETE_KEYWORDS = ["주민", "경력", "인정"]
+
+# ✅ 기본 시트 정렬 순서
+DEFAULT_SHEET_ORDER = [
+    "도이치아우토", "브리티시오토", "바이에른오토", "이탈리아오토모빌리",
+    "브리타니아오토", "디티네트웍스", "DT네트웍스", "도이치파이낸셜",
+    "BAMC", "차란차", "디티이노베이션", "DT이노베이션",
+    "도이치오토월드", "DAFS", "사직오토랜드"
+]
+
+
+def order_sheets(custom_order, sheet_order=DEFAULT_SHEET_ORDER):
+    """ 기본 시트 정렬 순서를 사용자가 입력한 순서대로 다시 정렬하는 함수 (입력에 없는 시트는 뒤에 기존 순서대로) """
+    return sorted(sheet_order, key=lambda x: custom_order.index(x) if x in custom_order else len(custom_order))
+
+
+def parse_list_option(text):
+    """ 쉼표로 구분된 문자열을 공백을 제거한 목록으로 변환하는 함수 """
+    return [item.strip() for item in text.split(",") if item.strip()]
+
+
+def month_last_day(month_str):
+    """ 'YYYY-MM' 기준 월의 마지막 날(datetime)을 반환하는 함수 """
+    first_day = datetime.strptime(month_str, "%Y-%m")
+    return (first_day + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+
+def previous_month_of(today=None):
+    """ 기준일(기본값: 오늘)의 전월 'YYYY-MM' 문자열을 반환하는 함수 """
+    today = today or datetime.today()
+    return (today.replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
+
+
+def merged_sheet_name(file, sheet_index, sheet_name):
+    """
+    병합 결과에서 사용할 시트 이름을 만드는 함수 (엑셀 제한에 맞춰 31자로 자름)
+    - 파일의 첫 번째 시트는 파일명(계열사명), 두 번째 시트부터는 "파일명_시트명"
+    """
+    stem = get_file_stem(file)
+    return (stem if sheet_index == 0 else f"{stem}_{sheet_name}")[:31]
+
+
+def merge_parsed_files(parsed_files, sheet_order):
+    """
+    파싱된 여러 엑셀 파일을 시트 정렬 순서대로 병합하는 함수 (키워드 포함 컬럼은 파싱 단계에서 삭제됨)
+    병합 결과는 파일로 저장하지 않고 {시트명: DataFrame} 형태로 메모리에 유지
+    - 시트가 여러 개인 파일은 두 번째 시트부터 "파일명_시트명" 으로 저장하고 경고 표시 (계열사 규칙은 파일명 시트에만 적용)
+    반환값: ({시트명: DataFrame}, [("warning" 또는 "error", 메시지), ...])
+    """
+    # 시트 정렬 순서에 따라 정렬
+    sheet_rank = {name: idx for idx, name in enumerate(sheet_order)}
+    parsed_files = sorted(parsed_files, key=lambda x: sheet_rank.get(get_file_stem(x[0]), len(sheet_order)))
+
+    merged_sheets = {}
+    messages = []
+    for file, frames, warnings, error in parsed_files:
+        messages.extend(("warning", warning) for warning in warnings)
+
+        if error is not None:
+            messages.append(("error", f"🚨 파일 `{get_source_name(file)}` 처리 중 오류 발생: {error}"))
+            continue
+
+        for sheet_index, (sheet_name, df, removed_cols) in enumerate(frames):
+            # 시트 이름이 31자를 초과하지 않도록 잘라서 저장
+            merged_sheets[merged_sheet_name(file, sheet_index, sheet_name)] = df
+
+        if len(frames) > 1:
+            extra_sheets = ", ".join(f"`{merged_sheet_name(file, idx, name)}`" for idx, (name, _, _) in enumerate(frames) if idx > 0)
+            messages.append(("warning", f"⚠️ 파일 `{get_source_name(file)}` 에 시트가 {len(frames)}개 있어 {extra_sheets} 시트로 따로 병합했습니다."))
+
+    return merged_sheets, messages
+
+
+def analyze_sheet(df, sheet_name, selected_month_str, previous_month, previous_month_last_day, date_columns, month_range=None):
+    """
+    시트 하나의 입사자, 퇴사자, 재직자 수 등을 계산하는 함수 (화면 출력 없음)
+    month_range 가 주어지면 기간 내 월별 인원 추이도 함께 계산
+    반환값: {"totals": 전체 합계, "by_type": 사원구분별 집계, "new_hires": DataFrame 또는 None, "resigned": DataFrame 또는 None, "timeseries": DataFrame 또는 None,
+            "people": 계열사 간 비교용 성명 / 식별키 / 입사월 / 퇴사월 DataFrame 또는 None}
+    """
+    # 📌 컬럼명 정리, 특정 인원 제외, 사원구분 정렬, 날짜를 정수 월 서수로 변환
+    df, hire_month, resign_month = prepare_employee_data(df, sheet_name, previous_month_last_day, date_columns)
+
+    # 📌 기준 월 입사자 / 퇴사자 / 재직자 수 (전체 및 사원구분별) 한 번에 집계
+    totals, by_type = compute_headcount_metrics(hire_month, resign_month, df["사원구분명"], month_str_to_ordinal(selected_month_str), EMPLOYEE_TYPE_ORDER)
+
+    # 📌 입사자 및 퇴사자 정보
+    previous_month_ordinal = month_str_to_ordinal(previous_month)
+    new_hires = resigned = None
+
+    if {"입사일", "사원구분명", "부서명", "성명", "직급명"}.issubset(df.columns):
+        new_hires = df.loc[hire_month == previous_month_ordinal, ["사원구분명", "부서명", "성명", "직급명"]]
+        new_hires = None if new_hires.empty else new_hires.assign(시트명=sheet_name)
+
+    if {"퇴사일", "사원구분명", "부서명", "성명", "직급명"}.issubset(df.columns):
+        resigned = df.loc[resign_month == previous_month_ordinal, ["사원구분명", "부서명", "성명", "직급명"]]
+        resigned = None if resigned.empty else resigned.assign(시트명=sheet_name)
+
+    # 📌 기간 내 월별 인원 추이 (누적 합 방식으로 한 번에 계산)
+    timeseries = None
+    if month_range is not None:
+        timeseries = compute_headcount_timeseries(
+            hire_month, resign_month, df["사원구분명"],
+            month_str_to_ordinal(month_range[0]), month_str_to_ordinal(month_range[1]), EMPLOYEE_TYPE_ORDER
+        )
+        timeseries.insert(0, "시트명", sheet_name)
+
+    # 📌 계열사 간 이동 / 중복 재직 확인용 인원 정보 (입사자 / 퇴사자 리스트와 같은 행 라벨)
+    people = person_frame(df, hire_month, resign_month, sheet_name)
+
+    return {"totals": totals, "by_type": by_type, "new_hires": new_hires, "resigned": resigned, "timeseries": timeseries, "people": people}
+
+
+def analysis_settings(selected_month_str, previous_month, previous_month_last_day, date_columns, month_range=None):
+    """ 분석 결과에 영향을 주는 설정을 캐시 키로 쓸 수 있는 튜플로 묶는 함수 """
+    return (selected_month_str, previous_month, previous_month_last_day, tuple(date_columns), tuple(month_range) if month_range else None)
+
+
+def analyze_sheets(merged_sheets, selected_month_str, previous_month, previous_month_last_day, date_columns, month_range=None, metrics=None, sheet_keys=None, cache=None):
+    """
+    병합된 모든 시트를 분석하는 함수 (metrics 가 있으면 시트별 처리 시간 기록)
+    - sheet_keys({시트명: 원본 파일 캐시 키})와 cache(dict)를 주면 원본 파일과 설정이 같은 시트는 이전 분석 결과를 재사용
+    - cache 에는 이번에 사용한 항목만 남김 (교체된 파일의 이전 결과는 삭제)
+    - 모든 시트의 인원을 한 번에 색인하여 계열사 간 이동(퇴사 후 다른 계열사 입사)과 중복 재직을 찾고, 입사자 / 퇴사자 리스트에 이동 여부를 표시
+    반환값: ({시트명: analyze_sheet 결과}, 결과 엑셀에 추가할 {시트명: DataFrame})
+    """
+    settings = analysis_settings(selected_month_str, previous_month, previous_month_last_day, date_columns, month_range)
+    use_cache = sheet_keys is not None and cache is not None
+    used = {}
+
+    sheet_results = {}
+    for sheet_name, df in merged_sheets.items():
+        key = (sheet_keys.get(sheet_name), sheet_name, settings) if use_cache else None
+        if key is not None and key[0] is not None and key in cache:
+            sheet_results[sheet_name] = cache[key]
+            if metrics is not None:
+                metrics.add("analyze_sheet_cached", 0.0, file=sheet_name, rows=len(df), cells=df.size)
+        else:
+            with measure(metrics, "analyze_sheet", file=sheet_name) as counts:
+                sheet_results[sheet_name] = analyze_sheet(df, sheet_name, selected_month_str, previous_month, previous_month_last_day, date_columns, month_range)
+                counts["rows"], counts["cells"] = len(df), df.size
+
+        if key is not None and key[0] is not None:
+            used[key] = sheet_results[sheet_name]
+
+    if use_cache:
+        cache.clear()
+        cache.update(used)
+
+    all_new_hires = [r["new_hires"] for r in sheet_results.values() if r["new_hires"] is not None]
+    all_resigned = [r["resigned"] for r in sheet_results.values() if r["resigned"] is not None]
+    all_timeseries = [r["timeseries"] for r in sheet_results.values() if r["timeseries"] is not None]
+
+    # 📌 계열사 간 이동 / 중복 재직 (입사자 / 퇴사자 리스트 기준 월, 재직은 기준 월)
+    transfers, duplicates = match_affiliates(
+        [r["people"] for r in sheet_results.values()], month_str_to_ordinal(previous_month), month_str_to_ordinal(selected_month_str)
+    )
+
+    # 📌 입사자 및 퇴사자 데이터를 시트로 추가
+    result_sheets = {}
+    if all_new_hires:
+        result_sheets["입사자_리스트"] = flag_transfers(pd.concat(all_new_hires), transfers, "전입 시트", "전입 행", "전출 시트", "전입 ←")
+    if all_resigned:
+        result_sheets["퇴사자_리스트"] = flag_transfers(pd.concat(all_resigned), transfers, "전출 시트", "전출 행", "전입 시트", "전출 →")
+    for name in ("입사자_리스트", "퇴사자_리스트"):
+        if name in result_sheets:
+            result_sheets[name]["시트명"] = pd.Categorical(result_sheets[name]["시트명"], categories=list(sheet_results))
+    if not transfers.empty:
+        result_sheets[TRANSFER_SHEET_NAME] = transfers[TRANSFER_COLUMNS]
+    if not duplicates.empty:
+        result_sheets[DUPLICATE_SHEET_NAME] = duplicates
+
+    # 📌 월별 인원 추이 (시트별 · 사원구분별)
+    if all_timeseries:
+        result_sheets["월별_인원추이"] = pd.concat(all_timeseries, ignore_index=True)
+
+    return sheet_results, result_sheets
+
+
+def headcount_summary(sheet_results):
+    """ 시트별 분석 결과를 JSON 으로 저장할 수 있는 인원 집계로 변환하는 함수 """
+    return {
+        sheet_name: {
+            "totals": {name: int(count) for name, count in result["totals"].items()},
+            "by_type": {
+                name: {emp_type: int(count) for emp_type, count in column.items()}
+                for name, column in result["by_type"].items()
+            },
+        }
+        for sheet_name, result in sheet_results.items()
+    }
+
+
+def headcount_table(sheet_results):
+    """ 시트별 기준 월 입사자 / 퇴사자 / 재직자 수를 시트당 한 행으로 합친 표를 만드는 함수 (마지막 행은 전체 합계) """
+    table = pd.DataFrame(
+        [result["totals"] for result in sheet_results.values()],
+        index=pd.Index(list(sheet_results), name="시트명"),
+        columns=HEADCOUNT_COLUMNS,
+    ).fillna(0).astype(int)
+    table.loc["전체"] = table.sum()
+    return table.reset_index()
+
+
+def total_timeseries(timeseries):
+    """ 시트별 월별 인원 추이를 기준월 · 사원구분별 전체 합계로 합치는 함수 (행 수는 시트 수와 무관) """
+    return timeseries.groupby(["기준월", "사원구분명"], sort=False, as_index=False)[HEADCOUNT_COLUMNS].sum()
+
+
+def write_merged_workbook(sheets, date_columns, output_file=None, engine=DEFAULT_WRITER_ENGINE):
+    """
+    병합 시트와 분석 시트를 날짜 서식까지 적용하여 한 번에 저장하는 함수
+    - 날짜 컬럼의 'YYYY-MM-DD' 형식은 저장하면서 바로 적용 (파일 재로드 없음)
+    - 기본 엔진은 행 단위 스트리밍 저장 (xlsxwriter 상수 메모리 / openpyxl 쓰기 전용)
+    - 식별키(해시) 컬럼은 저장하지 않음
+    output_file 이 없으면 메모리(BytesIO)에 생성하여 반환
+    """
+    sheets = {name: df.drop(columns=IDENTITY_COLUMN, errors="ignore") for name, df in sheets.items()}
+    return write_excel(sheets, output_file, column_formats=date_column_formats(date_columns), engine=engine)
+
+
+def save_roster_snapshots(merged_sheets, month):
+    """
+    병합된 시트를 계열사·기준 월 단위 스냅샷으로 로스터 저장소에 저장하는 함수 (식별키(해시) 컬럼 제외)
+    반환값: (저장한 스냅샷 수, [("warning", 메시지), ...])
+    """
+    saved = 0
+    messages = []
+    for sheet_name, df in merged_sheets.items():
+        try:
+            save_snapshot(df.drop(columns=IDENTITY_COLUMN, errors="ignore"), sheet_name, month)
+            saved += 1
+        except Exception as e:
+            messages.append(("warning", f"⚠️ 시트 `{sheet_name}` 스냅샷 저장 중 오류 발생: {e}"))
+
+    return saved, messages
+
+
+def compare_with_snapshot(merged_sheets, diff_month, sheet_order=DEFAULT_SHEET_ORDER):
+    """
+    병합된 시트를 로스터 저장소의 비교 월 스냅샷과 계열사별로 비교하는 함수 (추가 / 삭제 / 항목 변경)
+    - 두 달 모두 계열사 규칙의 컬럼명 변경(예: Starting Date → 입사일)을 적용한 뒤 비교
+    반환값: (시트별 요약 DataFrame, 결과 엑셀에 추가할 {시트명: DataFrame}, [("warning", 메시지), ...])
+    """
+    previous_sheets = load_month(diff_month, sheet_order)
+    if not previous_sheets:
+        return None, {}, [("warning", f"⚠️ 로스터 저장소에 {diff_month} 스냅샷이 없어 전월 대비 비교를 건너뜁니다.")]
+
+    def renamed(sheets):
+        """ 시트별 컬럼명 변경 규칙을 적용하는 내부 함수 """
+        return {name: df.rename(columns=SHEET_RULES.for_sheet(name).rename_columns) for name, df in sheets.items()}
+
+    return diff_months(renamed(previous_sheets), renamed(merged_sheets))
+
+
+def list_excel_files(input_dir):
+    """ 폴더 안의 엑셀(.xlsx) 파일 경로를 파일명 순서로 반환하는 함수 (엑셀 잠금 파일 '~$' 제외) """
+    return [
+        os.path.join(input_dir, name)
+        for name in sorted(os.listdir(input_dir))
+        if name.lower().endswith(".xlsx") and not name.startswith("~$")
+    ]
+
+
+def run_hr_batch(files, output_file, selected_month_str, sheet_order=DEFAULT_SHEET_ORDER, delete_keywords=DEFAULT_DELETE_KEYWORDS,
+                 date_columns=DATE_COLUMNS, max_workers=DEFAULT_MAX_WORKERS, month_range=None, save_snapshots=False, engine=DEFAULT_WRITER_ENGINE, diff_month=None,
+                 identity_keywords=DEFAULT_IDENTITY_KEYWORDS, compact_dtypes=True):
+    """
+    Streamlit 화면 없이 파싱 → 병합 → (스냅샷 저장) → 분석 → 엑셀 저장을 한 번에 실행하는 함수
+    - 입사자 / 퇴사자 리스트와 퇴사 처리 기준일은 기준 월(selected_month_str) 기준
+    - compact_dtypes 가 True 이면 파싱 단계에서 날짜 / 범주형 컬럼을 메모리가 적은 dtype 으로 변환
+    - diff_month 가 있으면 로스터 저장소의 해당 월 스냅샷과 비교한 추가 / 삭제 / 변경 시트를 함께 저장
+    반환값: JSON 으로 저장할 실행 요약 (측정 결과, 입력 파일, 경고 / 오류 메시지, 시트별 인원 집계)
+    """
+    metrics = PipelineMetrics("hr_batch")
+    selected_month_last_day = month_last_day(selected_month_str).strftime("%Y-%m-%d")
+
+    # 📌 1. 파싱 및 키워드 기반 컬럼 삭제 (파일별 병렬 처리)
+    with metrics.stage("parse") as counts:
+        parsed_files = parse_excel_files(files, delete_keywords, max_workers=max_workers, metrics=metrics,
+                                         identity_keywords=identity_keywords, compact_dtypes=compact_dtypes)
+        counts["rows"], counts["cells"] = frame_counts([df for _, frames, _, _ in parsed_files for _, df, _ in frames])
+
+    # 📌 2. 병합 (메모리에 유지)
+    with metrics.stage("merge") as counts:
+        merged_sheets, messages = merge_parsed_files(parsed_files, sheet_order)
+        counts["rows"], counts["cells"] = frame_counts(merged_sheets.values())
+
+    # 📌 (선택) 병합 결과를 로스터 저장소에 스냅샷으로 저장
+    if save_snapshots:
+        with metrics.stage("snapshot") as counts:
+            _, snapshot_messages = save_roster_snapshots(merged_sheets, selected_month_str)
+            messages.extend(snapshot_messages)
+            counts["rows"], counts["cells"] = frame_counts(merged_sheets.values())
+
+    # 📌 3. 입사자 / 퇴사자 / 재직자 분석
+    with metrics.stage("analyze") as counts:
+        sheet_results, result_sheets = analyze_sheets(merged_sheets, selected_month_str, selected_month_str, selected_month_last_day, date_columns, month_range, metrics)
+        counts["rows"], counts["cells"] = frame_counts(merged_sheets.values())
+
+    # 📌 (선택) 비교 월 스냅샷 대비 추가 / 삭제 / 변경 인원
+    diff_summary = None
+    if diff_month is not None:
+        with metrics.stage("diff") as counts:
+            diff_summary, diff_sheets, diff_messages = compare_with_snapshot(merged_sheets, diff_month, sheet_order)
+            result_sheets.update(diff_sheets)
+            messages.extend(diff_messages)
+            counts["rows"], counts["cells"] = frame_counts(merged_sheets.values())
+
+    # 📌 4. 날짜 형식을 적용하여 최종 엑셀 저장
+    if merged_sheets:
+        with metrics.stage("write") as counts:
+            output_sheets = {**merged_sheets, **result_sheets}
+            write_merged_workbook(output_sheets, date_columns, output_file, engine=engine)
+            counts["rows"], counts["cells"] = frame_counts(output_sheets.values())
+
+    return {
+        **metrics.summary(),
+        "month": selected_month_str,
+        "month_range": list(month_range) if month_range else None,
+        "input_files": [get_source_name(file) for file in files],
+        "output_file": output_file if merged_sheets else None,
+        "messages": [{"level": level, "message": message} for level, message in messages],
+        "headcount": headcount_summary(sheet_results),
+        "affiliate_matches": {name: len(result_sheets.get(name, ())) for name in (TRANSFER_SHEET_NAME, DUPLICATE_SHEET_NAME)},
+        "diff": None if diff_summary is None else {"month": diff_month, "sheets": diff_summary.to_dict(orient="records")},
+    }
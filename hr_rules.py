@@ -0,0 +1,212 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+try:
+    import yaml
+except ImportError:  # YAML 규칙 파일을 사용할 때만 필요 (JSON 은 추가 패키지 없이 사용)
+    yaml = None
+
+# 📌 계열사별 정리 규칙 파일 경로 (환경 변수 HR_RULES_PATH 로 변경 가능, .json / .yaml / .yml)
+DEFAULT_RULES_PATH = os.environ.get("HR_RULES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "hr_rules.json"))
+
+# 📌 규칙 항목과 값의 형식 (dict 는 기본 규칙에 덮어쓰고, list 는 기본 규칙 뒤에 이어 붙임)
+RULE_FIELDS = {
+    "rename_columns": dict,          # {원본 컬럼명: 바꿀 컬럼명}
+    "exclude_columns": list,         # 제외 인원을 찾을 컬럼 (예: 성명, English Name)
+    "exclude_names": list,           # 분석에서 제외할 인원
+    "employee_type_mappings": list,  # [{"column": 컬럼, "contains": {포함 문자열: 사원구분명}}] — 여러 개가 맞으면 마지막 값
+    "resign_markers": list,          # [{"column": 컬럼, "startswith": 시작 문자열}] — 맞는 인원은 기준 월 말일에 퇴사 처리
+}
+
+# 📌 사원구분명 컬럼
+EMPLOYEE_TYPE_COLUMN = "사원구분명"
+
+
+def _is_str_list(value):
+    """ 문자열 목록인지 확인하는 함수 """
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def _is_str_dict(value):
+    """ 키와 값이 모두 문자열인 dict 인지 확인하는 함수 """
+    return isinstance(value, dict) and all(isinstance(k, str) and isinstance(v, str) for k, v in value.items())
+
+
+def _validate_section(section, where, employee_types):
+    """ 규칙 한 묶음(기본 또는 계열사)을 검사하고 오류 메시지 목록을 반환하는 함수 """
+    if not isinstance(section, dict):
+        return [f"{where}: 규칙은 객체여야 합니다."]
+
+    errors = []
+    for field, value in section.items():
+        if field not in RULE_FIELDS:
+            errors.append(f"{where}: 알 수 없는 항목 `{field}` (사용 가능: {', '.join(RULE_FIELDS)})")
+        elif field == "rename_columns" and not _is_str_dict(value):
+            errors.append(f"{where}.rename_columns: {{원본 컬럼명: 바꿀 컬럼명}} 형식이어야 합니다.")
+        elif field in ("exclude_columns", "exclude_names") and not _is_str_list(value):
+            errors.append(f"{where}.{field}: 문자열 목록이어야 합니다.")
+        elif field == "employee_type_mappings":
+            if not isinstance(value, list):
+                errors.append(f"{where}.employee_type_mappings: 목록이어야 합니다.")
+                continue
+            for idx, mapping in enumerate(value):
+                item = f"{where}.employee_type_mappings[{idx}]"
+                if not isinstance(mapping, dict) or set(mapping) != {"column", "contains"}:
+                    errors.append(f"{item}: column, contains 항목만 있어야 합니다.")
+                elif not isinstance(mapping["column"], str) or not _is_str_dict(mapping["contains"]) or not mapping["contains"]:
+                    errors.append(f"{item}: column 은 문자열, contains 는 {{포함 문자열: 사원구분명}} 형식이어야 합니다.")
+                elif employee_types is not None:
+                    unknown = [t for t in mapping["contains"].values() if t not in employee_types]
+                    if unknown:
+                        errors.append(f"{item}: 알 수 없는 사원구분명 {unknown} (사용 가능: {', '.join(employee_types)})")
+        elif field == "resign_markers":
+            if not isinstance(value, list):
+                errors.append(f"{where}.resign_markers: 목록이어야 합니다.")
+                continue
+            for idx, marker in enumerate(value):
+                if not isinstance(marker, dict) or set(marker) != {"column", "startswith"} \
+                        or not all(isinstance(v, str) and v for v in marker.values()):
+                    errors.append(f"{where}.resign_markers[{idx}]: column, startswith 문자열 항목만 있어야 합니다.")
+    return errors
+
+
+def validate_rules(rules, employee_types=None):
+    """ 규칙 파일 내용을 검사하고 오류 메시지 목록을 반환하는 함수 (문제가 없으면 빈 목록) """
+    if not isinstance(rules, dict):
+        return ["규칙 파일의 최상위는 객체여야 합니다."]
+
+    errors = [f"알 수 없는 최상위 항목 `{key}` (사용 가능: default, affiliates)" for key in rules if key not in ("default", "affiliates")]
+    errors += _validate_section(rules.get("default", {}), "default", employee_types)
+
+    affiliates = rules.get("affiliates", {})
+    if not isinstance(affiliates, dict):
+        errors.append("affiliates: {계열사(시트)명: 규칙} 형식이어야 합니다.")
+    else:
+        for name, section in affiliates.items():
+            errors += _validate_section(section, f"affiliates.{name}", employee_types)
+    return errors
+
+
+def _merge_sections(default, override):
+    """ 기본 규칙에 계열사 규칙을 합치는 함수 (dict 는 덮어쓰고 list 는 이어 붙임) """
+    merged = {field: kind() for field, kind in RULE_FIELDS.items()}
+    for section in (default, override):
+        for field, value in section.items():
+            if RULE_FIELDS[field] is dict:
+                merged[field].update(value)
+            else:
+                merged[field].extend(value)
+    return merged
+
+
+def _lookup_by_category(values, match):
+    """
+    컬럼의 서로 다른 값마다 한 번만 match 를 계산하고 코드로 펼치는 함수 (전체 행 문자열 비교 없음)
+    - 값은 문자열로 비교 (결측값은 "nan")
+    반환값: 행별 match 결과 배열
+    """
+    codes, uniques = pd.factorize(values)
+    labels = [str(value) for value in uniques] + ["nan"]  # 결측값 코드(-1)는 마지막 칸을 가리킴
+    return np.array([match(label) for label in labels], dtype=object)[codes]
+
+
+class SheetRules:
+    """
+    시트(계열사) 하나에 적용할 정리 규칙을 컴파일한 결과
+    - 컬럼명 변경은 rename 한 번, 제외 인원은 해시 조회(isin) 마스크 하나로 처리
+    - 사원구분 매핑 / 퇴사 표시는 컬럼의 서로 다른 값마다 한 번만 문자열을 검사하고 코드로 펼침
+    - 행 필터링은 마지막에 한 번만 수행
+    """
+
+    def __init__(self, section):
+        self.rename_columns = dict(section["rename_columns"])
+        self.exclude_columns = list(section["exclude_columns"])
+        self.exclude_names = list(dict.fromkeys(section["exclude_names"]))
+        self.type_mappings = [(m["column"], list(m["contains"].items())) for m in section["employee_type_mappings"]]
+        self.resign_markers = [(m["column"], m["startswith"]) for m in section["resign_markers"]]
+
+    def apply(self, df):
+        """
+        DataFrame 에 규칙을 적용하는 함수 (원본 DataFrame 은 변경하지 않음)
+        반환값: (정리된 DataFrame, 퇴사 표시된 행 여부 Series 또는 None)
+        """
+        df = df.rename(columns=self.rename_columns)
+        df.columns = df.columns.str.strip()
+
+        # 📌 제외 인원 마스크 (필터링은 마지막에 한 번만)
+        excluded = np.zeros(len(df), dtype=bool)
+        if self.exclude_names:
+            for column in self.exclude_columns:
+                if column in df.columns:
+                    excluded |= df[column].isin(self.exclude_names).to_numpy()
+
+        # 📌 "사원구분명" 컬럼 자동 생성 및 매핑 (여러 문자열이 맞으면 마지막 값)
+        if EMPLOYEE_TYPE_COLUMN not in df.columns:
+            df[EMPLOYEE_TYPE_COLUMN] = None
+        for column, patterns in self.type_mappings:
+            if column not in df.columns:
+                continue
+            mapped = _lookup_by_category(df[column], lambda label: next((t for p, t in reversed(patterns) if p in label), None))
+            hit = pd.notna(mapped)
+            if hit.any():
+                values = df[EMPLOYEE_TYPE_COLUMN].to_numpy(dtype=object, copy=True)
+                values[hit] = mapped[hit]
+                df[EMPLOYEE_TYPE_COLUMN] = values
+
+        # 📌 퇴사 표시 (예: Remark 가 "Resigned and last working" 로 시작)
+        resign_marked = None
+        for column, prefix in self.resign_markers:
+            if column not in df.columns:
+                continue
+            marked = _lookup_by_category(df[column], lambda label: label.startswith(prefix)).astype(bool)
+            resign_marked = marked if resign_marked is None else resign_marked | marked
+
+        if excluded.any():
+            df = df.loc[~excluded]
+            if resign_marked is not None:
+                resign_marked = resign_marked[~excluded]
+
+        if resign_marked is not None:
+            resign_marked = pd.Series(resign_marked, index=df.index)
+        return df, resign_marked
+
+
+class RuleBook:
+    """ 규칙 파일 전체를 컴파일한 결과 (계열사 규칙이 없는 시트는 기본 규칙 사용) """
+
+    def __init__(self, rules):
+        default = rules.get("default", {})
+        self.default = SheetRules(_merge_sections(default, {}))
+        self.sheets = {name: SheetRules(_merge_sections(default, section)) for name, section in rules.get("affiliates", {}).items()}
+
+    def for_sheet(self, sheet_name):
+        """ 시트(계열사)에 적용할 규칙을 반환 """
+        return self.sheets.get(sheet_name, self.default)
+
+
+def read_rules_file(path):
+    """ 규칙 파일(JSON 또는 YAML)을 읽는 함수 """
+    with open(path, encoding="utf-8") as f:
+        if path.lower().endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise ValueError(f"YAML 규칙 파일을 읽으려면 PyYAML 이 필요합니다: {path}")
+            return yaml.safe_load(f) or {}
+        return json.load(f)
+
+
+def load_rules(path=DEFAULT_RULES_PATH, employee_types=None):
+    """
+    규칙 파일을 읽고 검사한 뒤 컴파일하는 함수 (앱 시작 시 한 번 호출)
+    - 파일이 없으면 규칙 없이 동작 (컬럼 정리만 수행)
+    - 형식 오류가 있으면 모든 오류를 모아 ValueError 발생
+    """
+    if not os.path.exists(path):
+        return RuleBook({})
+
+    rules = read_rules_file(path)
+    errors = validate_rules(rules, employee_types)
+    if errors:
+        raise ValueError(f"규칙 파일 `{path}` 형식 오류:\n- " + "\n- ".join(errors))
+    return RuleBook(rules)
@@ -0,0 +1,272 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from excel_writer import THOUSANDS_FORMAT
+
+# 📌 4대보험 요율표 경로 (환경 변수 INSURANCE_RATES_PATH 로 변경 가능)
+DEFAULT_RATES_PATH = os.environ.get("INSURANCE_RATES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "insurance_rates.json"))
+
+# 📌 보험료 끝전 처리 단위 (원) — 10원 미만 절사
+DEFAULT_ROUND_UNIT = 10
+
+# 📌 검증 결과 시트 이름
+DISCREPANCY_SHEET_NAME = "보험료_검증"
+
+# 📌 요율표에서 반드시 찾아야 하는 기본 컬럼 (보수월액이 있는 행을 헤더로 인식)
+BASE_COLUMN = "보수월액"
+ID_COLUMNS = ["사번", "성명"]
+
+# 📌 불일치 시트 컬럼
+DISCREPANCY_COLUMNS = ["시트명", "행", "사번", "성명", "보수월액", "보험", "신고액", "계산액", "차이"]
+
+# 📌 검증 요약 컬럼
+SUMMARY_COLUMNS = ["보험", "요율", "검증 건수", "수식 제외 건수", "불일치 건수"]
+
+# 📌 신고액 칸이 수식인지 표시하는 내부 컬럼 접두사 (병합 워크북은 수식을 유지하므로 계산된 값이 없음)
+FORMULA_FLAG_PREFIX = "__수식_"
+
+
+def _is_month(value):
+    """ 'YYYY-MM' 형식 문자열인지 확인하는 함수 """
+    if not isinstance(value, str) or len(value) != 7 or value[4] != "-":
+        return False
+    year, month = value[:4], value[5:]
+    return year.isdigit() and month.isdigit() and 1 <= int(month) <= 12
+
+
+def _is_number(value):
+    """ 숫자(bool 제외)인지 확인하는 함수 """
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_rate_table(table):
+    """ 요율표 내용을 검사하고 오류 메시지 목록을 반환하는 함수 (문제가 없으면 빈 목록) """
+    if not isinstance(table, dict):
+        return ["요율표의 최상위는 객체여야 합니다."]
+
+    errors = []
+    if "tolerance" in table and (not _is_number(table["tolerance"]) or table["tolerance"] < 0):
+        errors.append("tolerance: 0 이상의 숫자여야 합니다.")
+
+    columns = table.get("columns", {})
+    if not isinstance(columns, dict) or BASE_COLUMN not in columns:
+        errors.append(f"columns: `{BASE_COLUMN}` 컬럼 이름 목록이 있어야 합니다.")
+    for key, aliases in (columns.items() if isinstance(columns, dict) else []):
+        if not isinstance(aliases, list) or not aliases or not all(isinstance(a, str) for a in aliases):
+            errors.append(f"columns.{key}: 컬럼 이름(문자열) 목록이어야 합니다.")
+
+    insurances = table.get("insurances")
+    if not isinstance(insurances, list) or not insurances:
+        return errors + ["insurances: 보험 목록이 있어야 합니다."]
+
+    seen = {}  # 앞에 정의된 보험: 첫 적용 시작 월
+    for idx, insurance in enumerate(insurances):
+        where = f"insurances[{idx}]"
+        if not isinstance(insurance, dict) or not isinstance(insurance.get("name"), str):
+            errors.append(f"{where}: name 이 있는 객체여야 합니다.")
+            continue
+        where = f"insurances.{insurance['name']}"
+        unknown = set(insurance) - {"name", "columns", "of", "rates"}
+        if unknown:
+            errors.append(f"{where}: 알 수 없는 항목 {sorted(unknown)}")
+        aliases = insurance.get("columns")
+        if not isinstance(aliases, list) or not aliases or not all(isinstance(a, str) for a in aliases):
+            errors.append(f"{where}.columns: 컬럼 이름(문자열) 목록이어야 합니다.")
+        if "of" in insurance and insurance["of"] not in seen:
+            errors.append(f"{where}.of: 앞에 정의된 보험 이름이어야 합니다 ({', '.join(seen) or '없음'}).")
+
+        rates = insurance.get("rates")
+        if not isinstance(rates, list) or not rates:
+            errors.append(f"{where}.rates: 적용 시작 월별 요율 목록이 있어야 합니다.")
+            continue
+        months = []
+        for rate_idx, rate in enumerate(rates):
+            item = f"{where}.rates[{rate_idx}]"
+            if not isinstance(rate, dict) or not _is_month(rate.get("from")) or not _is_number(rate.get("rate")) or rate["rate"] < 0:
+                errors.append(f"{item}: from(YYYY-MM) 과 0 이상의 rate 가 있어야 합니다.")
+                continue
+            months.append(rate["from"])
+            unknown = set(rate) - {"from", "rate", "base_floor", "base_cap", "base_unit", "round_unit"}
+            if unknown:
+                errors.append(f"{item}: 알 수 없는 항목 {sorted(unknown)}")
+            for key in ("base_floor", "base_cap", "base_unit", "round_unit"):
+                if key in rate and (not _is_number(rate[key]) or rate[key] <= 0):
+                    errors.append(f"{item}.{key}: 0보다 큰 숫자여야 합니다.")
+            if "of" in insurance and ({"base_floor", "base_cap", "base_unit"} & set(rate)):
+                errors.append(f"{item}: 다른 보험료 기준(of) 보험에는 보수월액 하한 / 상한 / 단위를 지정할 수 없습니다.")
+            if _is_number(rate.get("base_floor")) and _is_number(rate.get("base_cap")) and rate["base_floor"] > rate["base_cap"]:
+                errors.append(f"{item}: base_floor 가 base_cap 보다 큽니다.")
+        if months != sorted(months) or len(set(months)) != len(months):
+            errors.append(f"{where}.rates: from 은 중복 없이 오름차순이어야 합니다.")
+        base_start = seen.get(insurance.get("of"))
+        if months and base_start is not None and min(months) < base_start:
+            # 📌 기준 보험의 요율이 없는 월에는 of 보험료를 계산할 수 없음
+            errors.append(f"{where}.rates: 첫 from({min(months)})이 기준 보험 `{insurance['of']}` 의 첫 from({base_start})보다 빠를 수 없습니다.")
+        seen[insurance["name"]] = min(months) if months else None
+    return errors
+
+
+def load_rate_table(path=DEFAULT_RATES_PATH):
+    """ 요율표(JSON)를 읽고 검사하는 함수 (형식 오류가 있으면 모든 오류를 모아 ValueError 발생) """
+    with open(path, encoding="utf-8") as f:
+        table = json.load(f)
+
+    errors = validate_rate_table(table)
+    if errors:
+        raise ValueError(f"요율표 `{path}` 형식 오류:\n- " + "\n- ".join(errors))
+    return table
+
+
+def rates_for_month(table, month):
+    """ 기준 월에 적용되는 보험별 요율을 반환하는 함수 (적용 시작 월이 기준 월 이전인 마지막 요율, 없으면 제외) """
+    rates = {}
+    for insurance in table["insurances"]:
+        applicable = [rate for rate in insurance["rates"] if rate["from"] <= month]
+        if applicable:
+            rates[insurance["name"]] = {**applicable[-1], "of": insurance.get("of")}
+    return rates
+
+
+def _find_columns(row, aliases):
+    """ 헤더 행에서 컬럼별 위치를 찾는 함수 (반환값: {컬럼: 위치}) """
+    names = {}
+    for idx, value in enumerate(row):
+        if isinstance(value, str):
+            names.setdefault(value.strip(), idx)
+
+    positions = {}
+    for key, candidates in aliases.items():
+        idx = next((names[name] for name in candidates if name in names), None)
+        if idx is not None:
+            positions[key] = idx
+    return positions
+
+
+def read_ledger(wb, table, max_header_rows=20):
+    """
+    병합된 4대보험 워크북에서 검증에 필요한 컬럼만 읽어 DataFrame 하나로 만드는 함수
+    - 시트마다 보수월액 컬럼이 있는 행(앞쪽 max_header_rows 행 이내)을 헤더로 인식
+    - 보수월액이 숫자인 행만 사용 (합계 / 빈 행 제외)
+    - 신고액이 수식("=...")인 칸은 값이 없으므로 비워 두고, 보험별 FORMULA_FLAG_PREFIX 컬럼에 표시 (검증 요약에서 건수 표시)
+    반환값: (시트명 / 행 / 사번 / 성명 / 보수월액 / 보험별 신고액 / 보험별 수식 표시 컬럼의 DataFrame, 헤더를 찾지 못한 시트 목록)
+    """
+    aliases = dict(table["columns"])
+    aliases.update({insurance["name"]: insurance["columns"] for insurance in table["insurances"]})
+    insurance_names = [insurance["name"] for insurance in table["insurances"]]
+    value_columns = ID_COLUMNS + [BASE_COLUMN] + insurance_names
+    flag_columns = [FORMULA_FLAG_PREFIX + name for name in insurance_names]
+
+    frames = []
+    skipped = []
+    for ws in wb.worksheets:
+        if ws.title == DISCREPANCY_SHEET_NAME:
+            continue
+
+        rows = ws.iter_rows(values_only=True)
+        positions = None
+        for header_row, row in enumerate(rows, start=1):
+            found = _find_columns(row, aliases)
+            if BASE_COLUMN in found:
+                positions = found
+                break
+            if header_row >= max_header_rows:
+                break
+
+        if positions is None:
+            skipped.append(ws.title)
+            continue
+
+        data = pd.DataFrame.from_records(list(rows))
+        frame = pd.DataFrame({
+            column: data[positions[column]] if column in positions and positions[column] in data.columns else None
+            for column in value_columns
+        }, index=data.index)
+        frame.insert(0, "행", frame.index + header_row + 1)
+        frame.insert(0, "시트명", ws.title)
+
+        for name, flag in zip(insurance_names, flag_columns):
+            values = frame[name]
+            frame[flag] = values.str.startswith("=", na=False) if values.dtype == object and values.notna().any() else False
+
+        numeric = [BASE_COLUMN] + insurance_names
+        frame[numeric] = frame[numeric].apply(pd.to_numeric, errors="coerce")
+        frames.append(frame.loc[frame[BASE_COLUMN].notna()])
+
+    if not frames:
+        return pd.DataFrame(columns=["시트명", "행"] + value_columns + flag_columns), skipped
+    return pd.concat(frames, ignore_index=True), skipped
+
+
+def _truncate(values, unit):
+    """ unit 단위 미만을 절사하는 함수 (부동소수 오차로 한 단위 내려가지 않도록 보정) """
+    return np.floor(values / unit + 1e-9) * unit
+
+
+def compute_expected_premiums(base_salary, rates):
+    """
+    보수월액으로 보험별 본인 부담 보험료를 한 번에 계산하는 함수
+    - 보수월액은 하한 / 상한 적용 후 base_unit 미만 절사, 보험료는 round_unit(기본 10원) 미만 절사
+    - of 가 있는 보험(예: 장기요양)은 기준 보험의 계산액에 요율을 곱함
+    반환값: {보험: 계산액 Series}
+    """
+    base_salary = base_salary.astype(float)
+    expected = {}
+    for name, rate in rates.items():
+        if rate["of"] is not None:
+            base = expected[rate["of"]]
+        else:
+            base = base_salary.clip(lower=rate.get("base_floor"), upper=rate.get("base_cap"))
+            base = _truncate(base, rate.get("base_unit", 1))
+        expected[name] = _truncate(base * rate["rate"], rate.get("round_unit", DEFAULT_ROUND_UNIT))
+    return expected
+
+
+def verify_premiums(ledger, table, month):
+    """
+    신고된 보험료를 기준 월 요율로 다시 계산한 금액과 비교하는 함수
+    - 신고액이 숫자인 경우만 검증 (빈 칸은 제외, 수식 칸은 제외하고 보험별 `수식 제외 건수` 로 표시)
+    반환값: (보험별 요약 DataFrame, 불일치 DataFrame)
+    """
+    rates = rates_for_month(table, month)
+    tolerance = table.get("tolerance", 0)
+    expected = compute_expected_premiums(ledger[BASE_COLUMN], rates)
+
+    summary = []
+    discrepancies = []
+    for name, amounts in expected.items():
+        reported = ledger[name]
+        checked = reported.notna()
+        diff = reported - amounts
+        mismatched = checked & (diff.abs() > tolerance)
+        formulas = ledger[FORMULA_FLAG_PREFIX + name] if FORMULA_FLAG_PREFIX + name in ledger.columns else pd.Series(False, index=ledger.index)
+        summary.append({
+            "보험": name, "요율": rates[name]["rate"], "검증 건수": int(checked.sum()),
+            "수식 제외 건수": int(formulas.astype(bool).sum()), "불일치 건수": int(mismatched.sum()),
+        })
+
+        if mismatched.any():
+            rows = ledger.loc[mismatched, ["시트명", "행", "사번", "성명", BASE_COLUMN]]
+            discrepancies.append(rows.assign(보험=name, 신고액=reported[mismatched], 계산액=amounts[mismatched], 차이=diff[mismatched]))
+
+    summary = pd.DataFrame(summary, columns=SUMMARY_COLUMNS)
+    if not discrepancies:
+        return summary, pd.DataFrame(columns=DISCREPANCY_COLUMNS)
+    return summary, pd.concat(discrepancies, ignore_index=True).sort_values(["시트명", "행"], kind="stable", ignore_index=True)
+
+
+def add_discrepancy_sheet(wb, discrepancies):
+    """ 불일치 내역을 워크북의 검증 결과 시트로 추가하는 함수 (같은 이름의 시트가 있으면 교체) """
+    if DISCREPANCY_SHEET_NAME in wb.sheetnames:
+        wb.remove(wb[DISCREPANCY_SHEET_NAME])
+    ws = wb.create_sheet(DISCREPANCY_SHEET_NAME)
+
+    ws.append(DISCREPANCY_COLUMNS)
+    amount_columns = [DISCREPANCY_COLUMNS.index(column) for column in (BASE_COLUMN, "신고액", "계산액", "차이")]
+    for row in discrepancies[DISCREPANCY_COLUMNS].itertuples(index=False):
+        ws.append([None if pd.isna(value) else value for value in row])
+
+    for row in ws.iter_rows(min_row=2):
+        for idx in amount_columns:
+            row[idx].number_format = THOUSANDS_FORMAT
+    return ws
@@ -0,0 +1,247 @@
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from collections import deque
+from pipeline_metrics import RssSampler
+
+# 📌 동시에 실행할 무거운 작업(병합·분석) 수 (환경 변수 HR_JOB_WORKERS 로 변경 가능, 기본값: CPU 수와 2 중 작은 값)
+DEFAULT_JOB_WORKERS = int(os.environ.get("HR_JOB_WORKERS", max(1, min(os.cpu_count() or 1, 2))))
+
+# 📌 동시에 실행 중인 작업의 예상 메모리 합계 한도 (MB, 환경 변수 HR_JOB_MEMORY_MB 로 변경 가능)
+DEFAULT_JOB_MEMORY_MB = int(os.environ.get("HR_JOB_MEMORY_MB", 2048))
+
+# 📌 업로드 파일 크기 대비 처리 중 예상 메모리 배수 (압축된 xlsx 를 DataFrame / 워크북으로 펼친 크기, 환경 변수 HR_JOB_MEMORY_FACTOR)
+#    작업이 끝나면 실제 RSS 증가량(rss_delta_mb)을 기록하므로, 로그의 estimate_mb 와 비교하여 배수를 조정
+JOB_MEMORY_FACTOR = float(os.environ.get("HR_JOB_MEMORY_FACTOR", 20))
+
+# 📌 끝난 작업 결과를 작업 ID 로 가져올 수 있는 시간 (초, 환경 변수 HR_JOB_RESULT_TTL 로 변경 가능)
+DEFAULT_RESULT_TTL = int(os.environ.get("HR_JOB_RESULT_TTL", 1800))
+
+# 📌 작업 상태
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+logger = logging.getLogger("hr_pipeline.jobs")
+
+
+def estimate_job_bytes(sizes, factor=JOB_MEMORY_FACTOR):
+    """ 처리할 파일 크기(바이트) 목록으로 작업의 예상 메모리 사용량을 계산하는 함수 (측정값이 아닌 추정값, 크기를 모르면 0) """
+    return int(sum(sizes) * factor)
+
+
+class JobScheduler:
+    """
+    여러 Streamlit 세션의 무거운 처리를 정해진 수의 작업 스레드에서 실행하는 작업 관리자
+    - submit(): 작업을 대기열에 넣고 작업 ID 반환 (요청 스레드는 status() / wait() 로 진행 상황 확인)
+    - 대기열은 들어온 순서대로 실행 (맨 앞 작업이 시작될 수 없으면 뒤 작업도 기다림 — 큰 작업이 계속 밀리지 않도록)
+    - 실행 중인 작업의 예상 메모리(estimate_bytes) 합계가 한도를 넘으면 새 작업을 시작하지 않음
+      · 시작 여부는 제출 시 추정값으로만 판단 (실행 중 실제 메모리로 막지는 않음 — 추정이 빗나가면 HR_JOB_MEMORY_FACTOR 로 조정)
+      · 실행 중인 작업이 없으면 한도보다 커도 실행 (한도보다 큰 작업이 영원히 기다리지 않도록), 예상 메모리가 0 인 작업은 항상 실행 가능
+    - 작업별로 예상 메모리, 실행 중 RSS(시작 / 최대 / 종료, 시작 대비 증가량), 대기 / 실행 시간을 기록 (작업이 끝나면 JSON 한 줄로 로거에 남김)
+      · RSS 는 프로세스 전체 값이므로 동시에 실행된 다른 작업의 메모리도 포함될 수 있음
+    - 끝난 작업의 결과는 result_ttl 동안 작업 ID 로 가져올 수 있음
+    - Streamlit 세션(스레드) 간에 공유되므로 잠금을 사용
+    """
+
+    def __init__(self, max_workers=DEFAULT_JOB_WORKERS, memory_budget_mb=DEFAULT_JOB_MEMORY_MB, result_ttl=DEFAULT_RESULT_TTL):
+        self.max_workers = max(1, int(max_workers))
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.result_ttl = result_ttl
+        self._jobs = {}  # 작업 ID: 작업 정보
+        self._queue = deque()  # 대기 중인 작업 ID (들어온 순서)
+        self._running = 0
+        self._reserved_bytes = 0  # 실행 중인 작업의 예상 메모리 합계
+        self._threads = []
+        self._cond = threading.Condition()
+
+    def submit(self, fn, *args, label=None, owner=None, estimate_bytes=0, **kwargs):
+        """ fn(*args, **kwargs) 를 대기열에 넣고 작업 ID 를 반환 (fn 은 화면 출력 없이 결과만 반환해야 함) """
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            "id": job_id,
+            "label": label or fn.__name__,
+            "owner": owner,
+            "call": (fn, args, kwargs),
+            "state": JOB_QUEUED,
+            "estimate_bytes": max(0, int(estimate_bytes)),
+            "submitted": time.time(),
+            "started": None,
+            "finished": None,
+            "rss": None,  # 실행 중 RSS 측정기 (RssSampler)
+            "result": None,
+            "error": None,
+        }
+        with self._cond:
+            self._expire()
+            self._jobs[job_id] = job
+            self._queue.append(job_id)
+            self._ensure_workers()
+            self._cond.notify_all()
+        return job_id
+
+    def _ensure_workers(self):
+        """ 작업 스레드를 max_workers 개까지 띄우는 함수 (처음 작업이 들어올 때 시작, 잠금 안에서 호출) """
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        while len(self._threads) < self.max_workers:
+            thread = threading.Thread(target=self._work, name=f"hr-job-{len(self._threads) + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _can_start(self, job):
+        """ 작업을 지금 시작해도 되는지 확인하는 함수 (작업 수 / 메모리 한도, 잠금 안에서 호출) """
+        if self._running >= self.max_workers:
+            return False
+        return self._running == 0 or self._reserved_bytes + job["estimate_bytes"] <= self.memory_budget  # 실행 중인 작업이 없으면 추정값과 관계없이 시작
+
+    def _next_job(self):
+        """ 대기열 맨 앞 작업을 시작할 수 있을 때까지 기다렸다가 실행 상태로 바꿔 반환하는 함수 """
+        with self._cond:
+            while not (self._queue and self._can_start(self._jobs[self._queue[0]])):
+                self._cond.wait()
+
+            job = self._jobs[self._queue.popleft()]
+            job["state"] = JOB_RUNNING
+            job["started"] = time.time()
+            self._running += 1
+            self._reserved_bytes += job["estimate_bytes"]
+            return job
+
+    def _work(self):
+        """ 작업 스레드 본체: 대기열에서 작업을 꺼내 실행하고 결과 / 오류를 기록 """
+        while True:
+            job = self._next_job()
+            fn, args, kwargs = job["call"]
+            job["rss"] = RssSampler()
+            with job["rss"]:
+                try:
+                    result, error = fn(*args, **kwargs), None
+                except Exception as e:  # 오류는 결과를 가져갈 때 요청 스레드에서 다시 발생
+                    logger.exception("작업 %s (%s) 실패", job["id"], job["label"])
+                    result, error = None, e
+
+            with self._cond:
+                job.update(
+                    state=JOB_DONE if error is None else JOB_FAILED, result=result, error=error,
+                    finished=time.time(), call=None,
+                )
+                self._running -= 1
+                self._reserved_bytes -= job["estimate_bytes"]
+                self._cond.notify_all()
+                status = self._status(job)
+            logger.info(json.dumps(status, ensure_ascii=False))
+
+    def _expire(self):
+        """ 보관 시간이 지난 끝난 작업을 지우는 함수 (잠금 안에서 호출) """
+        cutoff = time.time() - self.result_ttl
+        for job_id in [job_id for job_id, job in self._jobs.items() if job["finished"] is not None and job["finished"] < cutoff]:
+            del self._jobs[job_id]
+
+    def _status(self, job):
+        """ 작업 정보를 화면 표시용 상태 dict 로 바꾸는 함수 (잠금 안에서 호출) """
+        now = time.time()
+        rss = job["rss"]
+        return {
+            "id": job["id"],
+            "label": job["label"],
+            "owner": job["owner"],
+            "state": job["state"],
+            "position": self._queue.index(job["id"]) + 1 if job["state"] == JOB_QUEUED else 0,  # 대기열 순서 (1 = 다음 실행)
+            "queued": len(self._queue),
+            "wait_s": round((job["started"] or job["finished"] or now) - job["submitted"], 1),
+            "run_s": None if job["started"] is None else round((job["finished"] or now) - job["started"], 1),
+            "estimate_mb": round(job["estimate_bytes"] / 1024 / 1024, 1),
+            "rss_start_mb": None if rss is None else rss.start_mb,
+            "rss_peak_mb": None if rss is None else rss.peak_mb,  # 실행 중이면 지금까지의 최대값
+            "rss_end_mb": None if rss is None else rss.end_mb,
+            "rss_delta_mb": None if rss is None else rss.delta_mb,  # 시작 대비 최대 증가량 (예상 메모리와 비교)
+            "error": None if job["error"] is None else str(job["error"]),
+        }
+
+    def status(self, job_id):
+        """ 작업 상태를 반환 (없거나 보관 시간이 지난 작업이면 None) """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return None if job is None else self._status(job)
+
+    def wait(self, job_id, timeout=None, on_update=None, poll_s=0.5):
+        """
+        작업이 끝날 때까지 기다리고 마지막 상태를 반환하는 함수
+        - on_update 를 주면 기다리는 동안 poll_s 초마다 상태 dict 를 넘겨 호출 (대기열 순서 표시 등)
+        - timeout 초가 지나면 끝나지 않았어도 현재 상태를 반환
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            status = self.status(job_id)
+            if status is None or status["state"] in FINISHED_STATES:
+                return status
+            if deadline is not None and time.monotonic() >= deadline:
+                return status
+            if on_update is not None:
+                on_update(status)
+            with self._cond:
+                self._cond.wait(poll_s if deadline is None else max(0, min(poll_s, deadline - time.monotonic())))
+
+    def result(self, job_id):
+        """ 끝난 작업의 결과를 반환 (작업에서 난 오류는 그대로 다시 발생) """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise ValueError(f"작업 `{job_id}` 을(를) 찾을 수 없습니다 (보관 시간이 지났거나 잘못된 작업 ID).")
+            if job["state"] not in FINISHED_STATES:
+                raise ValueError(f"작업 `{job_id}` 이(가) 아직 끝나지 않았습니다 ({job['state']}).")
+            if job["state"] == JOB_CANCELLED:
+                raise ValueError(f"작업 `{job_id}` 은(는) 취소되었습니다.")
+            if job["error"] is not None:
+                raise job["error"]
+            return job["result"]
+
+    def cancel(self, job_id):
+        """ 대기 중인 작업을 취소 (이미 실행 중이거나 끝난 작업은 취소할 수 없음, 반환값: 취소 여부) """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job["state"] != JOB_QUEUED:
+                return False
+            self._queue.remove(job_id)
+            job.update(state=JOB_CANCELLED, finished=time.time(), call=None)
+            self._cond.notify_all()  # 맨 앞 작업이 빠지면 다음 작업이 시작될 수 있음
+            return True
+
+    def forget(self, job_id):
+        """ 끝난 작업의 결과를 보관 시간 전에 지움 (대기 중이면 취소, 실행 중이면 지우지 않음, 반환값: 삭제 여부) """
+        self.cancel(job_id)
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job["state"] not in FINISHED_STATES:
+                return False
+            del self._jobs[job_id]
+            return True
+
+    def stats(self):
+        """ 작업 스레드 수 / 실행 중 / 대기 중 작업 수와 예약 메모리(MB)를 반환 """
+        with self._cond:
+            self._expire()
+            return {
+                "workers": self.max_workers,
+                "running": self._running,
+                "queued": len(self._queue),
+                "reserved_mb": round(self._reserved_bytes / 1024 / 1024, 1),
+                "budget_mb": round(self.memory_budget / 1024 / 1024, 1),
+                "jobs": len(self._jobs),
+            }
+
+    def active_jobs(self):
+        """ 실행 중 / 대기 중인 작업의 상태 목록 (실행 중인 작업 먼저, 대기 작업은 대기열 순서) """
+        with self._cond:
+            running = [self._status(job) for job in self._jobs.values() if job["state"] == JOB_RUNNING]
+            return running + [self._status(self._jobs[job_id]) for job_id in self._queue]
+
+
+# ✅ 서버 프로세스 전체에서 공유하는 작업 관리자 (모든 세션의 병합·분석이 같은 대기열을 사용)
+JOB_SCHEDULER = JobScheduler()
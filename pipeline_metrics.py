@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+import pandas as pd
+
+# 📌 단계별 측정 결과를 JSON Lines 로 남길 파일 경로 (환경 변수 HR_METRICS_LOG, 없으면 로거로만 출력)
+METRICS_LOG_PATH = os.environ.get("HR_METRICS_LOG")
+
+# 📌 단계 실행 중 RSS 를 읽는 간격 (초, 환경 변수 HR_RSS_SAMPLE_S 로 변경 가능)
+RSS_SAMPLE_INTERVAL = float(os.environ.get("HR_RSS_SAMPLE_S", 0.05))
+
+logger = logging.getLogger("hr_pipeline.metrics")
+
+# 📌 디버그 패널 표시용 컬럼명
+METRICS_COLUMNS = {
+    "stage": "단계",
+    "file": "파일",
+    "wall_s": "시간(초)",
+    "rows": "행 수",
+    "cells": "셀 수",
+    "rss_mb": "종료 RSS(MB)",
+    "peak_rss_mb": "단계 최대 RSS(MB)",
+    "rss_delta_mb": "단계 증가(MB)",
+}
+
+
+def current_rss_mb():
+    """ 현재 프로세스의 RSS(MB)를 반환하는 함수 (/proc 이 없는 환경이면 None) """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024, 1)
+
+
+class RssSampler:
+    """
+    with 블록이 실행되는 동안 별도 스레드에서 현재 RSS 를 주기적으로 읽어 블록 안의 최대값을 구하는 측정기
+    - ru_maxrss(프로세스 시작 이후 최대값)와 달리 블록마다 따로 측정되므로 어느 단계가 메모리를 썼는지 구분 가능
+    - RSS 는 프로세스 전체 값이므로 같은 서버에서 동시에 실행 중인 다른 작업의 메모리도 포함될 수 있음
+    - /proc 이 없는 환경(Windows, macOS)에서는 모든 값이 None
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.start_mb = None
+        self.end_mb = None
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        """ 현재 RSS 를 읽어 최대값을 갱신 """
+        rss = current_rss_mb()
+        if rss is not None and (self.peak_mb is None or rss > self.peak_mb):
+            self.peak_mb = rss
+        return rss
+
+    def _run(self):
+        """ 측정 스레드 본체 (내부 함수) """
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self.start_mb = self._sample()
+        if self.start_mb is not None:
+            self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.end_mb = self._sample()
+        return False
+
+    @property
+    def delta_mb(self):
+        """ 블록 시작 대비 최대 RSS 증가량 (MB) """
+        if self.start_mb is None or self.peak_mb is None:
+            return None
+        return round(self.peak_mb - self.start_mb, 1)
+
+
+def frame_counts(frames):
+    """ DataFrame 목록의 (행 수, 셀 수)를 반환하는 함수 """
+    rows = sum(len(df) for df in frames)
+    cells = sum(df.size for df in frames)
+    return rows, cells
+
+
+class PipelineMetrics:
+    """
+    파이프라인 한 번 실행의 단계별 / 파일별 측정 결과 (시간, 단계 중 최대 RSS 와 시작 대비 증가량, 처리 행·셀 수)
+    - stage(): with 블록 하나를 단계로 측정 (RssSampler 로 블록 실행 중의 RSS 를 주기적으로 읽음)
+    - add(): 다른 곳(프로세스 풀 작업 등)에서 측정한 결과를 추가
+    - 기록할 때마다 JSON 한 줄을 로거(및 HR_METRICS_LOG 파일)에 남김
+    """
+
+    def __init__(self, pipeline, log_path=METRICS_LOG_PATH):
+        self.pipeline = pipeline
+        self.run_id = uuid.uuid4().hex[:12]
+        self.log_path = log_path
+        self.records = []
+
+    @contextmanager
+    def stage(self, name, file=None):
+        """ with 블록의 처리 시간과 메모리를 측정 (블록 안에서 counts["rows"], counts["cells"] 지정 가능) """
+        counts = {"rows": None, "cells": None}
+        start = time.perf_counter()
+        sampler = RssSampler()
+        try:
+            with sampler:
+                yield counts
+        finally:
+            self.add(name, time.perf_counter() - start, file=file, rows=counts["rows"], cells=counts["cells"],
+                     rss=sampler.end_mb, peak_rss=sampler.peak_mb, rss_delta=sampler.delta_mb)
+
+    def add(self, stage, wall_s, file=None, rows=None, cells=None, rss=None, peak_rss=None, rss_delta=None):
+        """ 측정 결과 한 건을 기록 (다른 곳에서 RssSampler 로 측정한 값을 넘김, rss 를 주지 않으면 현재 프로세스 기준) """
+        record = {
+            "stage": stage,
+            "file": file,
+            "wall_s": round(wall_s, 3),
+            "rows": None if rows is None else int(rows),
+            "cells": None if cells is None else int(cells),
+            "rss_mb": rss if rss is not None else current_rss_mb(),
+            "peak_rss_mb": peak_rss,
+            "rss_delta_mb": rss_delta,
+        }
+        self.records.append(record)
+        self._log(record)
+        return record
+
+    def _log(self, record):
+        """ 측정 결과를 구조화된 JSON 한 줄로 기록 """
+        line = json.dumps({
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "run_id": self.run_id,
+            "pipeline": self.pipeline,
+            **record,
+        }, ensure_ascii=False)
+        logger.info(line)
+
+        if self.log_path:
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                logger.warning("측정 로그 파일 기록 실패: %s", e)
+
+    def to_frame(self):
+        """ 측정 결과를 디버그 패널에 표시할 DataFrame으로 반환 """
+        frame = pd.DataFrame(self.records, columns=list(METRICS_COLUMNS)).astype({"rows": "Int64", "cells": "Int64"})
+        return frame.rename(columns=METRICS_COLUMNS)
+
+    def summary(self):
+        """ 실행 전체 요약 (JSON 저장용) """
+        return {
+            "run_id": self.run_id,
+            "pipeline": self.pipeline,
+            "total_wall_s": round(sum(r["wall_s"] for r in self.records if r["file"] is None), 3),
+            "peak_rss_mb": max((r["peak_rss_mb"] for r in self.records if r["peak_rss_mb"] is not None), default=None),
+            "stages": self.records,
+        }
+
+
+def measure(metrics, name, file=None):
+    """ metrics 가 있으면 stage() 로 측정하고, 없으면 아무것도 하지 않는 with 블록을 반환하는 함수 """
+    if metrics is None:
+        return nullcontext({"rows": None, "cells": None})
+    return metrics.stage(name, file=file)
@@ -0,0 +1,71 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+# 📌 파싱 결과 캐시의 최대 메모리 사용량 (환경 변수 HR_CACHE_MAX_MB 로 변경 가능)
+DEFAULT_CACHE_MAX_BYTES = int(os.environ.get("HR_CACHE_MAX_MB", 512)) * 1024 * 1024
+
+
+def make_cache_key(content, *settings):
+    """ 파일 내용의 SHA-256 해시와 파싱 설정을 묶어 캐시 키를 만드는 함수 """
+    return (hashlib.sha256(content).hexdigest(), *settings)
+
+
+def estimate_frames_bytes(frames):
+    """ 파싱된 시트 목록이 차지하는 메모리 크기를 추정하는 함수 """
+    return sum(int(df.memory_usage(index=True, deep=True).sum()) for _, df, _ in frames)
+
+
+class ParsedFileCache:
+    """
+    업로드 파일 내용 해시 + 설정을 키로 파싱된 시트를 보관하는 LRU 캐시
+    - 전체 크기가 max_bytes 를 넘으면 가장 오래 사용하지 않은 항목부터 제거
+    - Streamlit 세션(스레드) 간에 공유되므로 잠금을 사용
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # 키: (값, 크기)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """ 캐시된 값을 반환하고 최근 사용 항목으로 표시 (없으면 None) """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, size):
+        """ 값을 저장하고 메모리 예산을 넘는 만큼 오래된 항목을 제거 """
+        if size > self.max_bytes:
+            return  # 예산보다 큰 항목은 캐시하지 않음
+
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)[1]
+
+            self._entries[key] = (value, size)
+            self._total_bytes += size
+
+            while self._total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+
+    def clear(self):
+        """ 캐시를 모두 비움 """
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        """ (항목 수, 사용 중인 바이트 수) 반환 """
+        with self._lock:
+            return len(self._entries), self._total_bytes
+
+
+# ✅ 서버 프로세스 전체에서 공유하는 파싱 결과 캐시 (스크립트 재실행 시에도 유지)
+PARSED_FILE_CACHE = ParsedFileCache()
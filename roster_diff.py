@@ -0,0 +1,179 @@
+import os
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+
+# 📌 직원을 구분하는 안정 키 후보 (환경 변수 HR_DIFF_KEY_COLUMNS 로 변경 가능, 앞에서부터 두 달 모두에 있는 컬럼 사용)
+DEFAULT_KEY_COLUMNS = [c.strip() for c in os.environ.get("HR_DIFF_KEY_COLUMNS", "사번,사원번호,직원번호").split(",") if c.strip()]
+
+# 📌 안정 키 컬럼이 없을 때 사용하는 키
+FALLBACK_KEY_COLUMNS = ["성명", "입사일"]
+
+# 📌 비교하지 않는 컬럼 (행 번호 등)
+IGNORED_COLUMNS = ["No"]
+
+# 📌 결과 시트 이름
+DIFF_SHEET_NAMES = {"added": "전월대비_추가", "removed": "전월대비_삭제", "changed": "전월대비_변경"}
+
+# 📌 변경 시트 / 요약 표 컬럼
+CHANGE_COLUMNS = ["항목", "이전 값", "현재 값"]
+SUMMARY_COLUMNS = ["시트명", "추가", "삭제", "변경 인원", "변경 항목"]
+
+# 📌 한 달에 같은 키가 여러 번 나올 때 몇 번째인지 구분하는 내부 컬럼
+_OCCURRENCE_COLUMN = "__순번"
+
+
+def _to_text(value):
+    """ 셀 값 하나를 비교용 문자열로 바꾸는 함수 (날짜는 YYYY-MM-DD, 정수인 실수는 정수, 결측값은 None) """
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, (datetime, date)):
+        if isinstance(value, datetime) and (value.hour, value.minute, value.second) != (0, 0, 0):
+            return value.strftime("%Y-%m-%d %H:%M:%S")
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return str(int(value))
+    text = str(value).strip()
+    return text or None
+
+
+def normalize_values(values):
+    """
+    컬럼 값을 비교용 문자열 배열로 바꾸는 함수
+    - 서로 다른 값마다 한 번만 변환하고 코드로 펼침 (엑셀 셀 형식 차이: 날짜/문자열, 1/1.0 등은 같은 값으로 취급)
+    """
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Index(uniques)
+
+    # ✅ 문자열만 있는 컬럼과 날짜 컬럼은 서로 다른 값 전체를 한 번에 변환
+    if isinstance(uniques, pd.DatetimeIndex):
+        labels = np.where(uniques == uniques.normalize(), uniques.strftime("%Y-%m-%d"), uniques.strftime("%Y-%m-%d %H:%M:%S")).astype(object)
+    elif pd.api.types.is_numeric_dtype(uniques) and not pd.api.types.is_bool_dtype(uniques):
+        numbers = uniques.to_numpy(dtype=float)
+        integral = np.isfinite(numbers) & (numbers == np.floor(numbers))
+        labels = np.where(integral, np.where(integral, numbers, 0).astype(np.int64).astype(str), numbers.astype(str)).astype(object)
+    elif pd.api.types.infer_dtype(uniques, skipna=False) == "string":
+        labels = uniques.str.strip().to_numpy(dtype=object)
+        labels[labels == ""] = None
+    else:
+        labels = np.array([_to_text(value) for value in uniques], dtype=object)
+
+    labels = np.append(labels, None)  # 결측값 코드(-1)는 마지막 칸을 가리킴
+    return labels[codes]
+
+
+def choose_key_columns(previous, current, key_columns=None):
+    """
+    두 달 로스터를 맞춰 볼 키 컬럼을 고르는 함수
+    - key_columns 를 주면 그대로 사용, 아니면 안정 키 후보 중 두 달 모두에 있고 값이 있는 첫 컬럼, 없으면 성명 + 입사일
+    """
+    if key_columns:
+        missing = [c for c in key_columns if c not in previous.columns or c not in current.columns]
+        if missing:
+            raise ValueError(f"키 컬럼 {missing} 이(가) 두 달 로스터에 모두 있어야 합니다.")
+        return list(key_columns)
+
+    for column in DEFAULT_KEY_COLUMNS:
+        if column in previous.columns and column in current.columns and previous[column].notna().any() and current[column].notna().any():
+            return [column]
+
+    fallback = [c for c in FALLBACK_KEY_COLUMNS if c in previous.columns and c in current.columns]
+    if "성명" not in fallback:
+        raise ValueError(f"직원을 구분할 키 컬럼({', '.join(DEFAULT_KEY_COLUMNS + FALLBACK_KEY_COLUMNS)})이 없습니다.")
+    return fallback
+
+
+def _key_frame(df, key_columns):
+    """ 키 컬럼을 비교용 문자열로 바꾸고 같은 키의 몇 번째 행인지 붙인 DataFrame 을 만드는 함수 (행 위치는 인덱스) """
+    keys = pd.DataFrame({column: normalize_values(df[column]) for column in key_columns}).fillna("")
+    keys[_OCCURRENCE_COLUMN] = keys.groupby(key_columns, sort=False).cumcount()
+    return keys
+
+
+def diff_rosters(previous, current, key_columns=None, compare_columns=None):
+    """
+    전월 / 당월 로스터를 키로 해시 조인하여 추가 · 삭제 · 변경 인원을 찾는 함수 (행 수에 비례하는 비용)
+    - 같은 키가 여러 번 나오면 나온 순서대로 짝지음
+    - compare_columns 를 생략하면 두 달에 모두 있는 컬럼(키 / 행 번호 제외)을 비교
+    반환값: {"added": 당월에만 있는 행, "removed": 전월에만 있는 행, "changed": 키 + 항목 / 이전 값 / 현재 값 DataFrame, "key_columns": 사용한 키}
+    """
+    key_columns = choose_key_columns(previous, current, key_columns)
+    if compare_columns is None:
+        compare_columns = [c for c in previous.columns if c in current.columns and c not in key_columns and c not in IGNORED_COLUMNS]
+
+    previous_keys = _key_frame(previous, key_columns)
+    current_keys = _key_frame(current, key_columns)
+    on = key_columns + [_OCCURRENCE_COLUMN]
+
+    # ✅ 해시 조인 한 번으로 양쪽 행 위치를 짝지음
+    joined = previous_keys.reset_index(names="__이전").merge(current_keys.reset_index(names="__현재"), on=on, how="outer", indicator=True)
+    both = joined[joined["_merge"] == "both"]
+    previous_pos = both["__이전"].to_numpy(dtype=np.int64)
+    current_pos = both["__현재"].to_numpy(dtype=np.int64)
+
+    added = current.iloc[np.sort(joined.loc[joined["_merge"] == "right_only", "__현재"].to_numpy(dtype=np.int64))]
+    removed = previous.iloc[np.sort(joined.loc[joined["_merge"] == "left_only", "__이전"].to_numpy(dtype=np.int64))]
+
+    # 📌 짝지은 행의 항목별 변경 (컬럼마다 한 번의 벡터 비교)
+    order = np.argsort(current_pos, kind="stable")  # 당월 행 순서로 표시
+    previous_pos, current_pos = previous_pos[order], current_pos[order]
+    matched_keys = current.iloc[current_pos][key_columns].reset_index(drop=True)
+
+    changes = []
+    for column in compare_columns:
+        before = pd.Series(normalize_values(previous[column].iloc[previous_pos]))
+        after = pd.Series(normalize_values(current[column].iloc[current_pos]))
+        changed = (before.fillna("") != after.fillna("")).to_numpy()
+        if changed.any():
+            changes.append(matched_keys.loc[changed].assign(
+                __행=np.flatnonzero(changed), 항목=column, **{"이전 값": before[changed].to_numpy(), "현재 값": after[changed].to_numpy()}
+            ))
+
+    if changes:
+        changed = pd.concat(changes, ignore_index=True).sort_values("__행", kind="stable").drop(columns="__행").reset_index(drop=True)
+    else:
+        changed = pd.DataFrame(columns=key_columns + CHANGE_COLUMNS)
+
+    return {"added": added, "removed": removed, "changed": changed, "key_columns": key_columns}
+
+
+def diff_months(previous_sheets, current_sheets, key_columns=None):
+    """
+    계열사(시트)별로 전월 / 당월 로스터를 비교하는 함수
+    - 한쪽 달에만 있는 시트는 모든 행을 추가 또는 삭제로 처리
+    반환값: (시트별 요약 DataFrame, 결과 엑셀에 추가할 {시트명: DataFrame}, [("warning", 메시지), ...])
+    """
+    summary = []
+    results = {name: [] for name in DIFF_SHEET_NAMES}
+    messages = []
+
+    for sheet_name in list(current_sheets) + [name for name in previous_sheets if name not in current_sheets]:
+        previous = previous_sheets.get(sheet_name)
+        current = current_sheets.get(sheet_name)
+
+        if previous is None or current is None:
+            diff = {"added": current, "removed": previous, "changed": None}
+        else:
+            try:
+                diff = diff_rosters(previous, current, key_columns)
+            except ValueError as e:
+                messages.append(("warning", f"⚠️ 시트 `{sheet_name}` 전월 대비 비교를 건너뜁니다: {e}"))
+                continue
+
+        changed = diff["changed"]
+        summary.append({
+            "시트명": sheet_name,
+            "추가": 0 if diff["added"] is None else len(diff["added"]),
+            "삭제": 0 if diff["removed"] is None else len(diff["removed"]),
+            "변경 인원": 0 if changed is None else len(changed.drop(columns=CHANGE_COLUMNS).drop_duplicates()),
+            "변경 항목": 0 if changed is None else len(changed),
+        })
+        for name in DIFF_SHEET_NAMES:
+            if diff[name] is not None and len(diff[name]):
+                results[name].append(diff[name].assign(시트명=sheet_name))
+
+    result_sheets = {
+        DIFF_SHEET_NAMES[name]: pd.concat(frames, ignore_index=True)
+        for name, frames in results.items() if frames
+    }
+    return pd.DataFrame(summary, columns=SUMMARY_COLUMNS), result_sheets, messages
@@ -0,0 +1,148 @@
+import os
+import re
+import shutil
+import tempfile
+from datetime import datetime
+import pandas as pd
+from hr_engine import month_str_to_ordinal
+
+# 📌 로스터 스냅샷 저장 경로 (환경 변수 HR_ROSTER_STORE_DIR 로 변경 가능)
+ROSTER_STORE_DIR = os.environ.get("HR_ROSTER_STORE_DIR", os.path.join(os.path.expanduser("~"), ".hr_roster_store"))
+
+# 📌 개인정보 보관 기간 (개월) — 기준 월이 이 기간보다 오래된 스냅샷은 자동 삭제
+DEFAULT_RETENTION_MONTHS = int(os.environ.get("HR_ROSTER_RETENTION_MONTHS", 12))
+
+# 📌 저장 형식별 파일 확장자
+STORE_FORMATS = {"parquet": ".parquet", "feather": ".feather"}
+
+MONTH_PATTERN = re.compile(r"^\d{4}-\d{2}$")
+
+
+def _snapshot_path(store_dir, month, affiliate, store_format):
+    """ 스냅샷 파일 경로를 만드는 함수 ({저장소}/{YYYY-MM}/{계열사}.{형식}) """
+    if not MONTH_PATTERN.match(month):
+        raise ValueError(f"기준 월 형식이 올바르지 않습니다: {month}")
+    affiliate = affiliate.replace(os.sep, "_")
+    return os.path.join(store_dir, month, affiliate + STORE_FORMATS[store_format])
+
+
+def _to_storable(df):
+    """
+    엑셀에서 읽은 DataFrame을 컬럼형 파일로 저장할 수 있도록 정리하는 함수
+    - 컬럼명은 문자열로 변환
+    - 여러 타입이 섞인 object 컬럼은 문자열로 변환 (날짜/숫자만 있는 컬럼은 그대로 유지)
+    """
+    df = df.copy()
+    df.columns = [str(col) for col in df.columns]
+
+    for col in df.columns[df.dtypes == object]:
+        inferred = pd.api.types.infer_dtype(df[col], skipna=True)
+        if inferred not in ("string", "empty", "datetime", "date", "integer", "floating", "mixed-integer-float", "boolean"):
+            df[col] = df[col].map(lambda x: x if pd.isna(x) else str(x))
+
+    return df.reset_index(drop=True)
+
+
+def save_snapshot(df, affiliate, month, store_dir=ROSTER_STORE_DIR, store_format="parquet"):
+    """ 정리된 시트 하나를 계열사·기준 월 단위 스냅샷으로 저장하는 함수 """
+    path = _snapshot_path(store_dir, month, affiliate, store_format)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # ✅ 임시 파일에 쓴 뒤 교체하여 저장 도중 실패해도 기존 스냅샷이 깨지지 않도록 함
+    #    (임시 파일명은 저장마다 달라 여러 세션이 같은 스냅샷을 동시에 저장해도 섞이지 않음, 실패하면 개인정보가 남지 않도록 삭제)
+    storable = _to_storable(df)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        if store_format == "feather":
+            storable.to_feather(temp_path)
+        else:
+            storable.to_parquet(temp_path, index=False)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return path
+
+
+def load_snapshot(affiliate, month, store_dir=ROSTER_STORE_DIR):
+    """ 계열사·기준 월의 스냅샷을 읽어오는 함수 (없으면 None) """
+    for store_format in STORE_FORMATS:
+        path = _snapshot_path(store_dir, month, affiliate, store_format)
+        if os.path.exists(path):
+            return pd.read_feather(path) if store_format == "feather" else pd.read_parquet(path)
+    return None
+
+
+def list_snapshots(store_dir=ROSTER_STORE_DIR):
+    """ 저장된 스냅샷 목록을 기준월 / 계열사 / 형식 / 크기(KB) / 저장 시각 DataFrame으로 반환하는 함수 """
+    records = []
+    if os.path.isdir(store_dir):
+        for month in sorted(os.listdir(store_dir)):
+            month_dir = os.path.join(store_dir, month)
+            if not MONTH_PATTERN.match(month) or not os.path.isdir(month_dir):
+                continue
+            for file_name in sorted(os.listdir(month_dir)):
+                affiliate, ext = os.path.splitext(file_name)
+                store_format = next((name for name, suffix in STORE_FORMATS.items() if suffix == ext), None)
+                if store_format is None:
+                    continue
+                stat = os.stat(os.path.join(month_dir, file_name))
+                records.append({
+                    "기준월": month,
+                    "계열사": affiliate,
+                    "형식": store_format,
+                    "크기(KB)": round(stat.st_size / 1024, 1),
+                    "저장 시각": datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S"),
+                })
+    return pd.DataFrame(records, columns=["기준월", "계열사", "형식", "크기(KB)", "저장 시각"])
+
+
+def load_month(month, affiliates=None, store_dir=ROSTER_STORE_DIR):
+    """ 기준 월의 스냅샷을 {계열사: DataFrame} 형태로 읽어오는 함수 (affiliates 순서 우선) """
+    snapshots = list_snapshots(store_dir)
+    stored = snapshots.loc[snapshots["기준월"] == month, "계열사"].tolist()
+
+    if affiliates is not None:
+        rank = {name: idx for idx, name in enumerate(affiliates)}
+        stored.sort(key=lambda x: rank.get(x, len(affiliates)))
+
+    return {affiliate: load_snapshot(affiliate, month, store_dir) for affiliate in stored}
+
+
+def purge_snapshots(month=None, affiliate=None, store_dir=ROSTER_STORE_DIR):
+    """
+    스냅샷을 삭제하는 함수
+    - month, affiliate 를 모두 생략하면 저장소 전체 삭제
+    반환값: 삭제된 스냅샷 수
+    """
+    snapshots = list_snapshots(store_dir)
+    if month is not None:
+        snapshots = snapshots[snapshots["기준월"] == month]
+    if affiliate is not None:
+        snapshots = snapshots[snapshots["계열사"] == affiliate]
+
+    for record in snapshots.itertuples(index=False):
+        os.remove(_snapshot_path(store_dir, record.기준월, record.계열사, record.형식))
+
+    # 비어 있는 월 폴더 정리
+    if os.path.isdir(store_dir):
+        for month_name in os.listdir(store_dir):
+            month_dir = os.path.join(store_dir, month_name)
+            if os.path.isdir(month_dir) and not os.listdir(month_dir):
+                shutil.rmtree(month_dir)
+
+    return len(snapshots)
+
+
+def apply_retention(retention_months=DEFAULT_RETENTION_MONTHS, store_dir=ROSTER_STORE_DIR, today=None):
+    """ 보관 기간이 지난 기준 월의 스냅샷을 삭제하는 함수 (반환값: 삭제된 스냅샷 수) """
+    today = today or datetime.today()
+    cutoff_ordinal = today.year * 12 + today.month - 1 - retention_months
+
+    removed = 0
+    for month in list_snapshots(store_dir)["기준월"].unique():
+        if month_str_to_ordinal(month) < cutoff_ordinal:
+            removed += purge_snapshots(month=month, store_dir=store_dir)
+    return removed
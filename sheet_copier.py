@@ -0,0 +1,92 @@
+from copy import copy
+from openpyxl.styles.cell_style import StyleArray
+from openpyxl.styles.numbers import BUILTIN_FORMATS, BUILTIN_FORMATS_MAX_SIZE, BUILTIN_FORMATS_REVERSE
+from openpyxl.worksheet.dimensions import ColumnDimension
+from excel_writer import resolve_format
+
+
+def _number_format_of(wb, num_fmt_id):
+    """ 워크북의 표시 형식 ID를 표시 형식 문자열로 변환하는 함수 """
+    if num_fmt_id < BUILTIN_FORMATS_MAX_SIZE:
+        return BUILTIN_FORMATS.get(num_fmt_id, "General")
+    return wb._number_formats[num_fmt_id - BUILTIN_FORMATS_MAX_SIZE]
+
+
+class StyleInterner:
+    """
+    원본 워크북의 스타일 ID 조합을 대상 워크북의 스타일 ID 조합으로 변환하는 맵
+    - 서로 다른 스타일 조합마다 한 번만 글꼴 / 채우기 / 테두리 / 맞춤 / 보호 / 표시 형식을 대상 워크북에 등록
+    - 같은 스타일의 셀은 변환된 ID 조합만 복사하므로 셀마다 스타일 객체를 만들지 않음
+    - 원본 워크북마다 하나씩 생성
+    """
+
+    def __init__(self, source_wb, target_wb, font_color=None):
+        self.source_wb = source_wb
+        self.target_wb = target_wb
+        self.font_color = font_color  # 지정하면 모든 글꼴 색상을 이 색으로 변경 (예: "000000")
+        self._styles = {}  # (원본 스타일 ID 조합, 표시 형식) → 대상 StyleArray
+
+    def translate(self, style_array, number_format=None):
+        """ 원본 셀의 스타일 ID 조합을 대상 워크북 기준으로 변환 (number_format 을 주면 표시 형식만 교체) """
+        key = (tuple(style_array), number_format)
+        target = self._styles.get(key)
+        if target is None:
+            target = self._styles[key] = self._register(style_array, number_format)
+        return target
+
+    def _register(self, style_array, number_format):
+        """ 스타일 조합 하나를 대상 워크북에 등록하고 ID 조합을 반환 """
+        src, dst = self.source_wb, self.target_wb
+
+        font = copy(src._fonts[style_array.fontId])
+        if self.font_color is not None:
+            font.color = self.font_color
+
+        if number_format is None:
+            number_format = _number_format_of(src, style_array.numFmtId)
+        num_fmt_id = BUILTIN_FORMATS_REVERSE.get(number_format)
+        if num_fmt_id is None:
+            num_fmt_id = dst._number_formats.add(number_format) + BUILTIN_FORMATS_MAX_SIZE
+
+        return StyleArray([
+            dst._fonts.add(font),
+            dst._fills.add(copy(src._fills[style_array.fillId])),
+            dst._borders.add(copy(src._borders[style_array.borderId])),
+            num_fmt_id,
+            dst._protections.add(copy(src._protections[style_array.protectionId])),
+            dst._alignments.add(copy(src._alignments[style_array.alignmentId])),
+            style_array.pivotButton,
+            style_array.quotePrefix,
+            0,  # 기본 셀 스타일 (Normal)
+        ])
+
+
+def copy_sheet(source_ws, target_ws, interner, value_formats=None):
+    """
+    원본 시트의 값 / 수식 / 서식 / 병합 셀 / 열 너비 / 행 높이를 대상 시트로 복사하는 함수
+    - 실제로 존재하는 셀만 복사 (빈 영역을 순회하지 않음)
+    - value_formats: {"number": "#,##0"} 처럼 값 종류별 표시 형식 사양 (수식·문자열에는 적용하지 않음, 없으면 원본 형식 유지)
+    """
+    # ✅ 값 / 수식 / 스타일 복사 (값은 다시 해석하지 않고 그대로 옮김)
+    for (row, column), cell in source_ws._cells.items():
+        number_format = resolve_format(cell._value, value_formats=value_formats) if value_formats else None
+        new_cell = target_ws.cell(row=row, column=column)
+        new_cell._value = cell._value
+        new_cell.data_type = cell.data_type
+        new_cell._style = copy(interner.translate(cell._style, number_format))
+
+    # ✅ 열 너비 유지 (여러 열을 묶은 범위도 그대로 유지)
+    for key, dim in source_ws.column_dimensions.items():
+        target_ws.column_dimensions[key] = ColumnDimension(
+            target_ws, index=key, width=dim.width, hidden=dim.hidden,
+            min=dim.min, max=dim.max, customWidth=dim.customWidth
+        )
+
+    # ✅ 행 높이 유지
+    for idx, dim in source_ws.row_dimensions.items():
+        if dim.height is not None:
+            target_ws.row_dimensions[idx].height = dim.height
+
+    # ✅ 원본 병합된 셀 유지
+    for merged_range in source_ws.merged_cells.ranges:
+        target_ws.merge_cells(merged_range.coord)
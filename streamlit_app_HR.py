@@ -1,34 +1,20 @@
 import os
-import pandas as pd
 import streamlit as st
-from openpyxl import load_workbook, Workbook
-from openpyxl.styles import NamedStyle, Font, Border, Alignment, PatternFill
-from openpyxl.utils import get_column_letter
 from datetime import datetime, timedelta
-import tempfile
-import shutil
-import time
-
-def apply_excel_date_format(file_path, date_columns):
-    """ 엑셀 파일의 날짜 컬럼을 'YYYY-MM-DD' 형식으로 변경하는 함수 """
-    wb = load_workbook(file_path)  # 엑셀 파일 로드
-    for sheet in wb.sheetnames:  # 모든 시트에 대해 적용
-        ws = wb[sheet]
-        
-        # 날짜 서식 스타일 생성 (YYYY-MM-DD)
-        date_style = NamedStyle(name="datetime", number_format="YYYY-MM-DD")
-        if "datetime" not in wb.named_styles:
-            wb.add_named_style(date_style)
-
-        # 날짜 컬럼 찾아서 스타일 적용
-        for col_idx, col in enumerate(ws.iter_cols(), start=1):
-            col_letter = get_column_letter(col_idx)
-            if ws[col_letter + "1"].value in date_columns:  # 첫 번째 행이 컬럼명
-                for cell in col[1:]:  # 첫 번째 행 제외하고 적용
-                    if isinstance(cell.value, datetime):
-                        cell.style = date_style
-    
-    wb.save(file_path)  # 적용된 파일 저장
+from hr_engine import parse_excel_files, DEFAULT_MAX_WORKERS, DEFAULT_IDENTITY_KEYWORDS
+from hr_pipeline import (
+    DATE_COLUMNS, DEFAULT_SHEET_ORDER, DEFAULT_DELETE_KEYWORDS, order_sheets, parse_list_option, month_last_day,
+    merge_parsed_files, merged_sheet_name, analysis_settings, analyze_sheets, headcount_table, total_timeseries, write_merged_workbook, save_roster_snapshots,
+    compare_with_snapshot
+)
+from roster_cache import PARSED_FILE_CACHE, make_cache_key, estimate_frames_bytes
+from temp_janitor import schedule_removal, DEFAULT_EXPIRE_SECONDS
+from upload_sources import prepare_upload_sources
+from pipeline_metrics import PipelineMetrics, measure, frame_counts
+from affiliate_matcher import TRANSFER_SHEET_NAME, DUPLICATE_SHEET_NAME
+from roster_store import load_month, list_snapshots, purge_snapshots, apply_retention, DEFAULT_RETENTION_MONTHS
+from job_scheduler import JOB_SCHEDULER, estimate_job_bytes
+from streamlit_jobs import run_session_job, show_scheduler_status
 
 def get_date_info():
     """현재 날짜를 기준으로 전월, 당월, 전월의 마지막 날을 계산하는 함수"""
@@ -44,7 +30,7 @@ current_month, previous_month, previous_month_last_day = get_date_info()
 
 def get_analysis_settings():
     """ 분석에 필요한 날짜 컬럼과 사원 구분 리스트 반환 """
-    date_columns = ["입사일", "퇴사일"]
+    date_columns = DATE_COLUMNS
     employee_types = ["정규직", "계약직", "파견직", "임원"]  # 가나다순 정렬
     
     return date_columns, employee_types
@@ -52,13 +38,11 @@ def get_analysis_settings():
 # 분석 대상 컬럼 및 사원 구분 정보 가져오기
 date_columns, employee_types = get_analysis_settings()
 
-# ✅ 기본 시트 정렬 순서
-DEFAULT_SHEET_ORDER = [
-    "도이치아우토", "브리티시오토", "바이에른오토", "이탈리아오토모빌리",
-    "브리타니아오토", "디티네트웍스", "DT네트웍스", "도이치파이낸셜",
-    "BAMC", "차란차", "디티이노베이션", "DT이노베이션",
-    "도이치오토월드", "DAFS", "사직오토랜드"
-]
+# 📌 작업 스레드에 전달하는 세션 캐시 이름 (파싱 결과 / 시트별 분석 결과 / 최종 엑셀)
+SESSION_CACHE_NAMES = ("hr_parsed_files", "hr_sheet_results", "hr_output_workbook")
+
+# 📌 세션별 작업 칸 (세션마다 처리 작업은 하나만 유지)
+HR_JOB_SLOT = "hr_job"
 
 def get_sheet_order():
     """ 기본 시트 정렬 순서를 반환하는 함수 (사용자 지정 가능) """
@@ -70,13 +54,8 @@ def get_sheet_order():
         ", ".join(DEFAULT_SHEET_ORDER)  # 기본값 제공
     )
 
-    # ✅ 입력값을 리스트로 변환
-    custom_order = [s.strip() for s in user_input.split(",") if s.strip()]
-
-    # ✅ 기본 순서에서 입력된 순서 유지
-    sorted_sheets = sorted(DEFAULT_SHEET_ORDER, key=lambda x: custom_order.index(x) if x in custom_order else len(custom_order))
-
-    return sorted_sheets
+    # ✅ 입력값을 리스트로 변환하고 기본 순서에서 입력된 순서 유지
+    return order_sheets(parse_list_option(user_input))
 
 def select_month():
     """ Streamlit UI에서 기준 연도 및 월을 선택하는 함수 """
@@ -87,22 +66,94 @@ def select_month():
     # 선택한 기준 월을 YYYY-MM 형식으로 변환
     selected_date = datetime(selected_year, selected_month, 1)
     selected_month_str = selected_date.strftime("%Y-%m")  # 기준 월 (예: 2023-11)
-    selected_month_last_day = (selected_date.replace(day=1) + timedelta(days=32)).replace(day=1) - timedelta(days=1)  # 기준 월의 마지막 날
+    selected_month_last_day = month_last_day(selected_month_str)  # 기준 월의 마지막 날
 
     st.sidebar.write(f"📌 선택된 기준 월: **{selected_month_str}**")
 
     return selected_month_str, selected_month_last_day
 
 
+def select_month_range():
+    """ Streamlit UI에서 다개월 인원 추이 계산 기간을 선택하는 함수 (사용하지 않으면 None 반환) """
+    st.sidebar.subheader("📈 다개월 인원 추이")
+    if not st.sidebar.checkbox("기간별 입사자/퇴사자/재직자 추이 계산", value=False):
+        return None
+
+    # 선택 가능한 월 목록 (YYYY-MM)
+    today = datetime.today()
+    month_options = [f"{year}-{month:02d}" for year in range(2022, today.year + 1) for month in range(1, 13)]
+    month_options = [month for month in month_options if month <= today.strftime("%Y-%m")]
+
+    start_month = st.sidebar.selectbox("📌 시작 월", month_options, index=max(len(month_options) - 12, 0))
+    end_month = st.sidebar.selectbox("📌 종료 월", month_options, index=len(month_options) - 1)
+
+    if start_month > end_month:
+        st.sidebar.error("❌ 시작 월이 종료 월보다 늦습니다.")
+        return None
+
+    return start_month, end_month
+
+
 def get_delete_keywords():
     """ Streamlit UI에서 키워드 기반 삭제 컬럼을 입력받는 함수 """
     st.sidebar.subheader("🔒 개인정보 보호 설정")
 
     # 사용자가 쉼표로 구분하여 키워드를 입력하면 리스트로 변환
-    delete_keywords_input = st.sidebar.text_area("🔍 키워드로 삭제할 컬럼 입력 (쉼표로 구분)", "주민, 경력, 인정")
-    delete_keywords = [kw.strip() for kw in delete_keywords_input.split(",") if kw.strip()]
-    
-    return delete_keywords
+    delete_keywords_input = st.sidebar.text_area("🔍 키워드로 삭제할 컬럼 입력 (쉼표로 구분)", ", ".join(DEFAULT_DELETE_KEYWORDS))
+    return parse_list_option(delete_keywords_input)
+
+
+def get_parallel_workers():
+    """ Streamlit UI에서 병렬 파싱 프로세스 수를 입력받는 함수 """
+    st.sidebar.subheader("⚙️ 성능 설정")
+
+    # 1을 입력하면 파일을 순차적으로 처리
+    max_workers = st.sidebar.number_input(
+        "🧵 병렬 처리 프로세스 수 (1 = 순차 처리)",
+        min_value=1,
+        max_value=max(os.cpu_count() or 1, DEFAULT_MAX_WORKERS),
+        value=DEFAULT_MAX_WORKERS
+    )
+
+    # ✅ 파싱 결과 캐시 상태 표시 및 비우기
+    cached_files, cached_bytes = PARSED_FILE_CACHE.stats()
+    st.sidebar.caption(f"🗂 파싱 캐시: {cached_files}개 파일 / {cached_bytes / 1024 / 1024:.1f}MB")
+    if st.sidebar.button("🧹 파싱 캐시 비우기"):
+        PARSED_FILE_CACHE.clear()
+
+    # ✅ 서버 전체의 처리 작업 실행 / 대기 현황 표시
+    show_scheduler_status()
+
+    return max_workers
+
+
+def get_roster_store_settings(selected_month_str):
+    """
+    Streamlit UI에서 로스터 스냅샷 저장소 사용 여부를 설정하는 함수
+    반환값: (스냅샷 저장 여부, 업로드 없이 분석할 저장 기준 월 또는 None, 비교할 저장 기준 월 또는 None)
+    """
+    st.sidebar.subheader("💾 로스터 저장소")
+
+    # ✅ 보관 기간이 지난 스냅샷은 자동 삭제 (개인정보)
+    removed = apply_retention()
+    if removed:
+        st.sidebar.caption(f"🔒 보관 기간({DEFAULT_RETENTION_MONTHS}개월)이 지난 스냅샷 {removed}개를 삭제했습니다.")
+
+    save_snapshots = st.sidebar.checkbox(f"병합 결과를 {selected_month_str} 스냅샷으로 저장", value=False)
+
+    snapshots = list_snapshots()
+    stored_months = sorted(snapshots["기준월"].unique(), reverse=True)
+    store_month = st.sidebar.selectbox("📂 업로드 없이 저장된 스냅샷으로 분석", ["사용 안 함"] + stored_months)
+    diff_month = st.sidebar.selectbox("🔀 저장된 스냅샷과 비교 (추가 / 삭제 / 변경 인원)", ["사용 안 함"] + stored_months)
+
+    with st.sidebar.expander("🗑 저장소 관리"):
+        st.dataframe(snapshots, hide_index=True)
+        purge_month = st.selectbox("삭제할 기준 월", ["전체"] + stored_months)
+        if st.button("스냅샷 삭제"):
+            removed = purge_snapshots(month=None if purge_month == "전체" else purge_month)
+            st.warning(f"🔒 스냅샷 {removed}개를 삭제했습니다.")
+
+    return save_snapshots, (None if store_month == "사용 안 함" else store_month), (None if diff_month == "사용 안 함" else diff_month)
 
 
 def upload_excel_files():
@@ -111,244 +162,363 @@ def upload_excel_files():
 
 
 
-def save_uploaded_files(uploaded_files):
-    """ 업로드된 엑셀 파일을 임시 폴더에 저장하는 함수 """
-    temp_dir = tempfile.mkdtemp()  # 임시 폴더 생성
-    merged_excel_path = os.path.join(temp_dir, "merged_excel.xlsx")  # 병합된 파일 저장 경로
+def get_session_cache(name):
+    """ 현재 사용자 세션에만 유지되는 캐시(dict)를 반환하는 함수 """
+    if name not in st.session_state:
+        st.session_state[name] = {}
+    return st.session_state[name]
+
 
-    file_paths = []
+def upload_cache_keys(uploaded_files, delete_keywords):
+    """ 업로드 파일별 캐시 키(파일 내용 해시 + 삭제 / 식별 키워드)를 계산하는 함수 """
+    keys = []
     for uploaded_file in uploaded_files:
-        file_path = os.path.join(temp_dir, uploaded_file.name)
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.read())
-        file_paths.append(file_path)
-    
-    return temp_dir, merged_excel_path, file_paths
+        with uploaded_file.getbuffer() as content:
+            keys.append(make_cache_key(content, uploaded_file.name, tuple(delete_keywords), tuple(DEFAULT_IDENTITY_KEYWORDS)))
+    return keys
 
-# 📌 엑셀 병합 함수 실행
-def merge_excel_files(files, output_file, sheet_order, delete_keywords):
-    """ 여러 개의 엑셀 파일을 병합하고, 특정 키워드가 포함된 컬럼을 삭제하는 함수 """
-    
-    # 시트 정렬 순서에 따라 정렬
-    files.sort(key=lambda x: sheet_order.index(os.path.splitext(os.path.basename(x))[0]) if os.path.splitext(os.path.basename(x))[0] in sheet_order else len(sheet_order))
-
-    with pd.ExcelWriter(output_file, engine="openpyxl") as writer:
-        for file in files:
-            try:
-                wb = load_workbook(file, data_only=True)
-                sheet_names = wb.sheetnames  
-
-                if not sheet_names:
-                    st.warning(f"⚠️ 파일 `{os.path.basename(file)}` 에 사용 가능한 시트가 없어 건너뜁니다.")
-                    continue
-
-                for sheet_name in sheet_names:
-                    ws = wb[sheet_name]
-                    data = [[cell.value for cell in row] for row in ws.iter_rows()]
-                    
-                    if not data or all(all(cell is None for cell in row) for row in data):
-                        st.warning(f"⚠️ 파일 `{os.path.basename(file)}` 의 시트 `{sheet_name}` 가 비어 있어 건너뜁니다.")
-                        continue
-
-                    header_row_index = None
-                    for idx, row in enumerate(data):
-                        if row[0] == "No":
-                            header_row_index = idx
-                            break
-
-                    if header_row_index is not None:
-                        headers = data[header_row_index]
-                        df = pd.DataFrame(data[header_row_index + 1:], columns=headers)
-                    else:
-                        df = pd.DataFrame(data[1:], columns=data[0])
-
-                    # 컬럼명 공백 제거
-                    df.columns = df.columns.str.strip()
-
-                    # ✅ **키워드 기반 삭제 처리**
-                    delete_cols_by_keyword = [col for col in df.columns if any(keyword in col for keyword in delete_keywords)]
-                    
-                    # 컬럼 삭제 (키워드 포함 컬럼만 삭제)
-                    df.drop(columns=[col for col in delete_cols_by_keyword if col in df.columns], errors="ignore", inplace=True)
-
-                    # 시트 이름이 31자를 초과하지 않도록 잘라서 저장
-                    sheet_name_trimmed = os.path.splitext(os.path.basename(file))[0][:31]
-                    df.to_excel(writer, sheet_name=sheet_name_trimmed, index=False)
-
-            except Exception as e:
-                st.error(f"🚨 파일 `{os.path.basename(file)}` 처리 중 오류 발생: {e}")
-
-
-def process_employee_data(df, sheet_name, selected_month_str, previous_month, previous_month_last_day, date_columns):
+
+def parse_uploaded_files(uploaded_files, file_keys, delete_keywords, session_cache, max_workers=None, metrics=None):
     """
-    직원 데이터를 정리하고 입사자, 퇴사자, 재직자 수 등을 계산하는 함수
+    업로드된 엑셀 파일을 파싱하는 함수 (화면 출력이 없어 작업 스레드에서 실행 가능)
+    - 식별 컬럼(주민번호 등)은 삭제 전에 해시로만 남겨 계열사 간 동일인 확인에 사용
+    - 날짜는 datetime64, 고유값이 적은 문자열(부서명, 직급명, 사원구분명 등)은 category 로 변환하여 캐시 메모리 절약
+    - 파일별 캐시 키(upload_cache_keys)로 세션 캐시와 공용 캐시를 조회하여, 캐시에 없는 파일(새로 올리거나 교체된 파일)만 파싱
+    - 세션 캐시는 현재 업로드된 파일의 결과만 유지 (공용 캐시에서 밀려나도 다시 파싱하지 않음)
+    - 업로드 버퍼를 그대로 파서에 전달하고, 크기가 큰 파일만 임시 폴더에 저장 (파싱이 끝나거나 실패하면 삭제 예약)
+    - 기준 월 등 다른 설정이 바뀌어 스크립트가 다시 실행되어도 엑셀을 다시 읽지 않음
+    반환값: (임시 폴더 경로 또는 None, [(파일명, 시트 목록, 경고 목록, 오류 메시지 또는 None), ...])
     """
-    # 📌 컬럼명 정리
-    if "Starting Date" in df.columns:
-        df.rename(columns={"Starting Date": "입사일"}, inplace=True)
-    df.columns = df.columns.str.strip()
-
-    # 📌 특정 인원 제외
-    exclude_conditions = {
-        "도이치오토월드": ["장준호"],
-        "DT네트웍스": ["권혁민"],
-        "디티네트웍스": ["권혁민"],
-        "BAMC": ["YOON JONG LYOL"]
-    }
-    if sheet_name in exclude_conditions and "성명" in df.columns:
-        df = df.loc[~df["성명"].isin(exclude_conditions[sheet_name])]
-    if "English Name" in df.columns:
-        df = df.loc[~df["English Name"].isin(exclude_conditions[sheet_name])]
-
-    # 📌 날짜 변환
-    if "입사일" in df.columns:
-        df["입사일"] = pd.to_datetime(df["입사일"], errors="coerce").dt.strftime("%Y-%m-%d")
-    if "퇴사일" not in df.columns:
-        df["퇴사일"] = None
-    if "Remark" in df.columns:
-        df.loc[df["Remark"].astype(str).str.startswith("Resigned and last working"), "퇴사일"] = previous_month_last_day
-
-    # 📌 "사원구분명" 컬럼 자동 생성
-    if "사원구분명" not in df.columns:
-        df["사원구분명"] = None
-    if "Contract Type" in df.columns:
-        df.loc[df["Contract Type"].astype(str).str.contains("FDC", na=False), "사원구분명"] = "계약직"
-        df.loc[df["Contract Type"].astype(str).str.contains("UDC", na=False), "사원구분명"] = "정규직"
-
-    # 📌 날짜 변환 (YYYY-MM)
-    for col in date_columns:
-        df[col] = pd.to_datetime(df[col], errors="coerce").dt.strftime("%Y-%m")
-
-    # 📌 원하는 정렬 순서 지정
-    employee_type_order = ["임원", "정규직", "계약직", "파견직"]
-
-    # ✅ **사원구분명 정렬을 위한 순서 컬럼 추가**
-    df["사원구분_정렬"] = df["사원구분명"].map(lambda x: employee_type_order.index(x) if x in employee_type_order else len(employee_type_order))
-
-    # ✅ **사원구분명 순서로 정렬**
-    df = df.sort_values(by=["사원구분_정렬"], ascending=True).drop(columns=["사원구분_정렬"])
-
-    # 📌 1. 선택한 월 입사자 수
-    new_hires_selected_month = df[df["입사일"] == selected_month_str].shape[0]
-    st.write(f"📌 1. **{selected_month_str} 입사자 수:** {new_hires_selected_month}명")
-
-    # 📌 2. 선택한 월 퇴사자 수
-    resigned_selected_month = df[df["퇴사일"] == selected_month_str].shape[0]
-    st.write(f"📌 2. **{selected_month_str} 퇴사자 수:** {resigned_selected_month}명")
-
-    # 📌 3. 선택한 월 기준 총 재직자 수
-    active_this_month = df[
-        (df["입사일"] <= selected_month_str) & 
-        (df["퇴사일"].isna() | (df["퇴사일"] > selected_month_str))
-    ].shape[0]
-    st.write(f"📌 3. **{selected_month_str} 기준 총 재직자 수:** {active_this_month}명")
-
-    # 📌 4. 선택한 월 입사자 수 (사원구분별)
-    new_hires_by_type_selected_month = df[df["입사일"] == selected_month_str]["사원구분명"].value_counts()
-    new_hires_by_type_selected_month = new_hires_by_type_selected_month.reindex(employee_type_order, fill_value=0)
-    st.write(f"📌 4. **{selected_month_str} 입사자 수 (사원구분별)**")
-    for emp_type, count in new_hires_by_type_selected_month.items():
-        st.write(f"  - {emp_type}: {count}명")
-
-    # 📌 5. 선택한 월 퇴사자 수 (사원구분별)
-    resigned_by_type_selected_month = df[df["퇴사일"] == selected_month_str]["사원구분명"].value_counts()
-    resigned_by_type_selected_month = resigned_by_type_selected_month.reindex(employee_type_order, fill_value=0)
-    st.write(f"📌 5. **{selected_month_str} 퇴사자 수 (사원구분별)**")
-    for emp_type, count in resigned_by_type_selected_month.items():
-        st.write(f"  - {emp_type}: {count}명")
-
-    # 📌 6. 선택한 월 기준 재직자 수 (사원구분별)
-    active_this_month_by_type = df[
-        (df["입사일"] <= selected_month_str) & 
-        (df["퇴사일"].isna() | (df["퇴사일"] > selected_month_str))
-    ]["사원구분명"].value_counts()
-    active_this_month_by_type = active_this_month_by_type.reindex(employee_type_order, fill_value=0)
-    st.write(f"📌 6. **{selected_month_str} 기준 총 재직자 수 (사원구분별)**")
-    for emp_type, count in active_this_month_by_type.items():
-        st.write(f"  - {emp_type}: {count}명")
-
-    # 📌 입사자 및 퇴사자 정보 저장
-    all_new_hires = []
-    all_resigned = []
-
-    if {"입사일", "사원구분명", "부서명", "성명", "직급명"}.issubset(df.columns):
-        new_hires = df[df["입사일"] == previous_month][["사원구분명", "부서명", "성명", "직급명"]]
-        if not new_hires.empty:
-            new_hires["시트명"] = sheet_name
-            all_new_hires.append(new_hires)
-
-    if {"퇴사일", "사원구분명", "부서명", "성명", "직급명"}.issubset(df.columns):
-        resigned = df[df["퇴사일"] == previous_month][["사원구분명", "부서명", "성명", "직급명"]]
-        if not resigned.empty:
-            resigned["시트명"] = sheet_name
-            all_resigned.append(resigned)
-
-    return all_new_hires, all_resigned
-
-
-
-def analyze_employee_data(merged_excel_path, selected_month_str, previous_month, previous_month_last_day, date_columns, sheet_order):
-    """ 병합된 엑셀에서 입사자 및 퇴사자 분석 후 새로운 시트 추가 """
-    
-    with pd.ExcelWriter(merged_excel_path, engine="openpyxl", mode="a") as writer:
-        sheets = pd.read_excel(merged_excel_path, sheet_name=None, engine="openpyxl")
-
-        all_new_hires = []
-        all_resigned = []
+    results = [None] * len(uploaded_files)
+    misses = []
+
+    for idx, (uploaded_file, key) in enumerate(zip(uploaded_files, file_keys)):
+        cached = session_cache.get(key) or PARSED_FILE_CACHE.get(key)
+        if cached is not None:
+            results[idx] = (uploaded_file.name, *cached, None)
+            if metrics is not None:
+                rows, cells = frame_counts([df for _, df, _ in cached[0]])
+                metrics.add("parse_file_cached", 0.0, file=uploaded_file.name, rows=rows, cells=cells)
+        else:
+            misses.append((idx, key))
+
+    temp_dir = None
+    if misses:
+        temp_dir, sources = prepare_upload_sources([uploaded_files[idx] for idx, _ in misses])
+
+        # ✅ 파일별 파싱은 프로세스 풀에서 병렬 처리 (결과는 입력 순서 유지)
+        try:
+            parsed = parse_excel_files(sources, delete_keywords, max_workers=max_workers, metrics=metrics, identity_keywords=DEFAULT_IDENTITY_KEYWORDS,
+                                       compact_dtypes=True)
+        finally:
+            # ✅ 임시 폴더는 파싱에만 필요하므로 실패해도 일정 시간 후 삭제 (백그라운드에서 처리)
+            if temp_dir is not None:
+                schedule_removal(temp_dir)
+
+        for (idx, key), (_, frames, warnings, error) in zip(misses, parsed):
+            if error is None:
+                PARSED_FILE_CACHE.put(key, (frames, warnings), estimate_frames_bytes(frames))
+            results[idx] = (uploaded_files[idx].name, frames, warnings, error)
+
+    # ✅ 세션 캐시는 현재 업로드된 파일만 유지
+    session_cache.clear()
+    session_cache.update({key: (frames, warnings) for key, (_, frames, warnings, error) in zip(file_keys, results) if error is None})
+
+    return temp_dir, results
+
+
+def show_messages(messages):
+    """ 처리 중 모인 (수준, 메시지) 목록을 화면에 표시하는 함수 """
+    for level, message in messages:
+        if level == "error":
+            st.error(message)
+        else:
+            st.warning(message)
+
+
+def show_sheet_detail(sheet_results, selected_month_str):
+    """ 선택한 시트 하나의 사원구분별 인원과 월별 인원 추이를 표시하는 함수 (선택한 시트만 화면에 전송) """
+    sheet_name = st.selectbox("🔎 시트별 상세 보기", ["선택 안 함"] + list(sheet_results))
+    if sheet_name == "선택 안 함":
+        return
+
+    result = sheet_results[sheet_name]
+    by_type = result["by_type"].rename_axis("사원구분명").reset_index()
+
+    if result["timeseries"] is None:
+        st.write(f"📌 **{sheet_name} · {selected_month_str} 사원구분별 인원**")
+        st.dataframe(by_type, hide_index=True)
+        return
+
+    type_tab, timeseries_tab = st.tabs(["사원구분별 인원", "월별 인원 추이"])
+    with type_tab:
+        st.dataframe(by_type, hide_index=True)
+    with timeseries_tab:
+        st.dataframe(result["timeseries"].drop(columns=["시트명"]), hide_index=True)
+
+
+def show_affiliate_matches(result_sheets, previous_month, selected_month_str):
+    """ 계열사 간 이동(퇴사 후 다른 계열사 입사)과 중복 재직 인원을 표시하는 함수 """
+    transfers = result_sheets.get(TRANSFER_SHEET_NAME)
+    duplicates = result_sheets.get(DUPLICATE_SHEET_NAME)
+    if transfers is None and duplicates is None:
+        return
+
+    st.subheader("🔁 계열사 간 이동 / 중복 재직")
+    if transfers is not None:
+        st.warning(f"⚠️ {previous_month} 입사자 / 퇴사자 중 {len(transfers)}건은 계열사 간 이동입니다 (리스트의 `계열사 이동` 컬럼 참고).")
+        st.dataframe(transfers, hide_index=True)
+    if duplicates is not None:
+        st.warning(f"⚠️ {selected_month_str} 기준 {len(duplicates)}명이 두 개 이상의 계열사에 재직 중으로 집계됩니다.")
+        st.dataframe(duplicates, hide_index=True)
+
+
+def show_employee_analysis(sheet_results, result_sheets, selected_month_str, previous_month, month_range=None):
+    """
+    입사자 및 퇴사자 분석 결과를 표시하는 함수
+    - 모든 시트의 인원 집계는 표 하나로 표시하고, 시트별 상세는 선택한 시트만 표시 (시트 수와 무관하게 화면 요소 수 일정)
+    """
+    # 📌 시트별 입사자 / 퇴사자 / 재직자 수 (표 하나)
+    st.subheader(f"📊 {selected_month_str} 시트별 인원 현황")
+    st.dataframe(headcount_table(sheet_results), hide_index=True)
 
-        for sheet_name, df in sheets.items():
-            st.subheader(f"📄 시트 이름: {sheet_name}")
+    # 📌 월별 인원 추이 (전체 시트 합계, 사원구분별)
+    if "월별_인원추이" in result_sheets:
+        st.subheader(f"📈 월별 인원 추이 ({month_range[0]} ~ {month_range[1]})")
+        st.dataframe(total_timeseries(result_sheets["월별_인원추이"]), hide_index=True)
 
-            new_hires, resigned = process_employee_data(df, sheet_name, selected_month_str, previous_month, previous_month_last_day, date_columns)
+    # 📌 계열사 간 이동 / 중복 재직 (있을 때만 표시)
+    show_affiliate_matches(result_sheets, previous_month, selected_month_str)
 
-            if new_hires:
-                all_new_hires.extend(new_hires)
-            if resigned:
-                all_resigned.extend(resigned)
+    # 📌 시트별 상세 (요청 시에만 표시)
+    show_sheet_detail(sheet_results, selected_month_str)
 
-        # 📌 입사자 및 퇴사자 데이터를 엑셀 시트에 저장
-        if all_new_hires:
-            pd.concat(all_new_hires).to_excel(writer, sheet_name="입사자_리스트", index=False)
-        if all_resigned:
-            pd.concat(all_resigned).to_excel(writer, sheet_name="퇴사자_리스트", index=False)
 
+def show_roster_diff(summary, result_sheets, diff_month):
+    """ 저장된 비교 월 스냅샷 대비 인원 변동 요약과 항목별 변경 내역을 표시하는 함수 """
+    st.subheader(f"🔀 {diff_month} 대비 인원 변동")
+    st.dataframe(summary, hide_index=True)
+    if "전월대비_변경" in result_sheets:
+        with st.expander("항목별 변경 내역"):
+            st.dataframe(result_sheets["전월대비_변경"], hide_index=True)
 
 
-def download_excel_file(file_path, temp_dir, file_name="merged_excel.xlsx"):
-    """ 병합된 엑셀 파일을 다운로드할 수 있도록 제공하는 함수 """
+def download_excel_file(excel_data, temp_dir, file_name="merged_excel.xlsx"):
+    """ 병합된 엑셀 파일(메모리 버퍼)을 다운로드할 수 있도록 제공하는 함수 (임시 폴더는 파싱 단계에서 삭제 예약됨) """
     if st.download_button(
         label="📥 병합된 엑셀 다운로드",
-        data=open(file_path, "rb").read(),
+        data=excel_data.getvalue(),
         file_name=file_name,
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    ):
-        # 일정 시간 후 파일 및 임시 폴더 삭제
-        time.sleep(10)
-        os.remove(file_path)
-        shutil.rmtree(temp_dir)  
-        st.warning("🔒 다운로드 후 10초가 지나 파일이 자동 삭제되었습니다.")
-
-def apply_date_format_to_excel(file_path, date_columns):
-    """ 병합된 엑셀 파일의 날짜 컬럼을 YYYY-MM-DD 형식으로 변환하는 함수 """
-    apply_excel_date_format(file_path, date_columns)
-
-def process_excel_files(uploaded_files, selected_month_str, previous_month, previous_month_last_day, date_columns, sheet_order, delete_keywords):
-    """ 엑셀 파일을 병합, 분석, 서식 적용 후 다운로드할 수 있도록 처리하는 함수 """
-    
-    # 📌 1. 업로드된 파일을 저장
-    temp_dir, merged_excel_path, file_paths = save_uploaded_files(uploaded_files)
-    
-    # 📌 2. 엑셀 병합 및 키워드 기반 컬럼 삭제
-    merge_excel_files(file_paths, merged_excel_path, sheet_order, delete_keywords)
-    
-    # 📌 3. 병합된 데이터에서 입사자 및 퇴사자 분석
-    analyze_employee_data(merged_excel_path, selected_month_str, previous_month, previous_month_last_day, date_columns, sheet_order)
-    
-    # 📌 4. 날짜 형식 적용
-    apply_date_format_to_excel(merged_excel_path, date_columns)
-    
-    # 📌 5. 다운로드 버튼 제공
-    download_excel_file(merged_excel_path, temp_dir)
+    ) and temp_dir is not None:
+        st.warning(f"🔒 업로드 파일은 {DEFAULT_EXPIRE_SECONDS}초 후 자동 삭제됩니다.")
+
+
+def show_analysis_result(result, selected_month_str, previous_month, month_range=None, diff_month=None):
+    """ 작업 결과(경고 / 오류, 스냅샷 저장·불러오기, 인원 분석, 전월 대비 변동, 다운로드 버튼)를 화면에 표시하는 함수 """
+    show_messages(result["messages"])
+
+    if result.get("saved_snapshots"):
+        st.success(f"💾 {selected_month_str} 스냅샷 {result['saved_snapshots']}개를 로스터 저장소에 저장했습니다.")
+    if result.get("store_month") is not None:
+        st.info(f"💾 {result['store_month']} 스냅샷 {result['loaded_snapshots']}개를 로스터 저장소에서 불러왔습니다.")
+
+    show_employee_analysis(result["sheet_results"], result["result_sheets"], selected_month_str, previous_month, month_range)
+
+    if result["diff_summary"] is not None:
+        show_roster_diff(result["diff_summary"], result["result_sheets"], diff_month)
+
+    download_excel_file(result["excel"], result.get("temp_dir"))
+
+
+def run_upload_job(uploaded_files, file_keys, caches, selected_month_str, previous_month, previous_month_last_day, date_columns, sheet_order, delete_keywords, max_workers=None, month_range=None, save_snapshots=False, diff_month=None):
+    """
+    업로드된 엑셀을 파싱, 병합, 분석하고 최종 엑셀을 만드는 함수 (작업 관리자의 작업 스레드에서 실행 — 화면 출력 없음)
+    - caches: 세션 캐시의 복사본 {캐시 이름: dict} (get_job_caches) — 작업 스레드는 이 복사본만 갱신하고 결과로 돌려줌
+    반환값: 화면 표시용 결과 dict (analyze_and_write 결과 + 임시 폴더 / 저장한 스냅샷 수 / 갱신된 캐시)
+    """
+    metrics = PipelineMetrics("hr_analysis")
+    messages = []
+
+    # 📌 1. 업로드된 파일 파싱 및 키워드 기반 컬럼 삭제 (캐시에 없는 파일만 파싱)
+    with metrics.stage("parse") as counts:
+        temp_dir, parsed_files = parse_uploaded_files(uploaded_files, file_keys, delete_keywords, caches["hr_parsed_files"], max_workers, metrics)
+        counts["rows"], counts["cells"] = frame_counts([df for _, frames, _, _ in parsed_files for _, df, _ in frames])
+
+    # 📌 2. 엑셀 병합 (메모리에 유지)
+    with metrics.stage("merge") as counts:
+        merged_sheets, merge_messages = merge_parsed_files(parsed_files, sheet_order)
+        messages.extend(merge_messages)
+        counts["rows"], counts["cells"] = frame_counts(merged_sheets.values())
+
+    # 시트별 원본 파일 캐시 키 (시트명은 병합과 같은 규칙으로 결정 — 같은 이름이면 나중 파일)
+    sheet_keys = {
+        merged_sheet_name(name, idx, sheet_name): key
+        for (name, frames, _, error), key in zip(parsed_files, file_keys) if error is None
+        for idx, (sheet_name, _, _) in enumerate(frames)
+    }
+
+    # 📌 (선택) 병합 결과를 로스터 저장소에 스냅샷으로 저장
+    saved = 0
+    if save_snapshots:
+        with metrics.stage("snapshot") as counts:
+            saved, snapshot_messages = save_roster_snapshots(merged_sheets, selected_month_str)
+            messages.extend(snapshot_messages)
+            counts["rows"], counts["cells"] = frame_counts(merged_sheets.values())
+
+    # 📌 3~4. 분석, 엑셀 저장
+    result = analyze_and_write(merged_sheets, selected_month_str, previous_month, previous_month_last_day, date_columns, sheet_order, month_range, metrics, sheet_keys, caches, diff_month)
+    result["messages"] = messages + result["messages"]
+    result.update(temp_dir=temp_dir, saved_snapshots=saved, caches=caches)
+    return result
+
+
+def run_snapshot_job(store_month, caches, selected_month_str, previous_month, previous_month_last_day, date_columns, sheet_order, month_range=None, diff_month=None):
+    """
+    엑셀을 다시 읽지 않고 로스터 저장소의 스냅샷으로 분석하는 함수 (작업 관리자의 작업 스레드에서 실행 — 화면 출력 없음)
+    반환값: 화면 표시용 결과 dict (analyze_and_write 결과 + 불러온 스냅샷 수 / 갱신된 캐시)
+    """
+    metrics = PipelineMetrics("hr_analysis_snapshot")
+
+    with metrics.stage("load_snapshots") as counts:
+        merged_sheets = load_month(store_month, sheet_order)
+        counts["rows"], counts["cells"] = frame_counts(merged_sheets.values())
+
+    result = analyze_and_write(merged_sheets, selected_month_str, previous_month, previous_month_last_day, date_columns, sheet_order, month_range, metrics, caches=caches, diff_month=diff_month)
+    result.update(store_month=store_month, loaded_snapshots=len(merged_sheets), caches=caches)
+    return result
+
+
+def analyze_and_write(merged_sheets, selected_month_str, previous_month, previous_month_last_day, date_columns, sheet_order, month_range=None, metrics=None, sheet_keys=None, caches=None, diff_month=None):
+    """
+    병합된 시트를 분석하고 최종 엑셀을 메모리 버퍼로 만드는 함수 (metrics 가 있으면 단계별 측정, 화면 출력 없음)
+    - sheet_keys({시트명: 원본 파일 캐시 키})가 있으면 바뀌지 않은 시트의 분석 결과와, 입력이 모두 같을 때의 최종 엑셀을 세션 캐시(caches)에서 재사용
+    - diff_month 가 있으면 저장된 해당 월 스냅샷 대비 추가 / 삭제 / 변경 인원을 결과 엑셀에 추가
+    반환값: {"sheet_results", "result_sheets", "diff_summary", "messages", "excel", "metrics"}
+    """
+    caches = caches if caches is not None else {}
+    messages = []
+
+    # 📌 3. 병합된 데이터에서 입사자 및 퇴사자 분석 (바뀐 시트만 다시 집계)
+    with measure(metrics, "analyze") as counts:
+        analysis_cache = caches.setdefault("hr_sheet_results", {}) if sheet_keys is not None else None
+        sheet_results, result_sheets = analyze_sheets(merged_sheets, selected_month_str, previous_month, previous_month_last_day, date_columns, month_range, metrics, sheet_keys, analysis_cache)
+        counts["rows"], counts["cells"] = frame_counts(merged_sheets.values())
+
+    # 📌 (선택) 저장된 비교 월 스냅샷 대비 인원 변동
+    diff_summary = None
+    if diff_month is not None:
+        with measure(metrics, "diff") as counts:
+            diff_summary, diff_sheets, diff_messages = compare_with_snapshot(merged_sheets, diff_month, sheet_order)
+            messages.extend(diff_messages)
+            result_sheets.update(diff_sheets)
+            counts["rows"], counts["cells"] = frame_counts(merged_sheets.values())
+
+    # 📌 4. 날짜 형식을 적용하여 최종 엑셀을 한 번만 저장 (메모리 버퍼, 입력과 설정이 같으면 이전 결과 재사용)
+    output_key = None
+    if sheet_keys is not None:
+        output_key = (tuple((name, sheet_keys.get(name)) for name in merged_sheets),
+                      analysis_settings(selected_month_str, previous_month, previous_month_last_day, date_columns, month_range), diff_month)
+    output_cache = caches.setdefault("hr_output_workbook", {})
+
+    output_sheets = {**merged_sheets, **result_sheets}
+    cached_output = output_cache.get(output_key) if output_key is not None else None
+    with measure(metrics, "write" if cached_output is None else "write_cached") as counts:
+        merged_excel = cached_output or write_merged_workbook(output_sheets, date_columns)
+        counts["rows"], counts["cells"] = frame_counts(output_sheets.values())
+
+    output_cache.clear()
+    if output_key is not None:
+        output_cache[output_key] = merged_excel
+
+    return {
+        "sheet_results": sheet_results,
+        "result_sheets": result_sheets,
+        "diff_summary": diff_summary,
+        "messages": messages,
+        "excel": merged_excel,
+        "metrics": metrics,
+    }
+
+
+def get_job_caches():
+    """
+    작업 스레드에 전달할 현재 세션 캐시의 복사본 {캐시 이름: dict} 를 반환하는 함수
+    - 작업 스레드가 st.session_state 의 dict 를 직접 고치면 그 사이 재실행된 스크립트와 충돌하므로 복사본을 전달
+    - 작업이 갱신한 캐시는 결과로 돌아오고, 요청 스레드에서 store_job_caches() 로 세션에 반영
+    """
+    return {name: dict(get_session_cache(name)) for name in SESSION_CACHE_NAMES}
+
+
+def store_job_caches(result):
+    """ 작업 결과에 담긴 갱신된 캐시를 현재 세션 캐시로 반영하는 함수 (요청 스레드에서 호출) """
+    for name, cache in result["caches"].items():
+        st.session_state[name] = dict(cache)
+
+
+def process_excel_files(uploaded_files, selected_month_str, previous_month, previous_month_last_day, date_columns, sheet_order, delete_keywords, max_workers=None, month_range=None, save_snapshots=False, diff_month=None):
+    """
+    엑셀 파일을 병합, 분석, 서식 적용 후 다운로드할 수 있도록 처리하는 함수
+    - 처리는 작업 관리자 대기열에서 실행 (동시에 실행하는 작업 수와 예상 메모리 합계를 제한), 기다리는 동안 대기열 순서 표시
+    - 파일과 설정이 같으면 화면 조작으로 다시 실행되어도 이전 작업 결과를 작업 ID 로 가져옴
+    반환값: 단계별 / 파일별 측정 결과 (PipelineMetrics, 작업이 실패하면 None)
+    """
+    file_keys = upload_cache_keys(uploaded_files, delete_keywords)
+    job_key = ("upload", tuple(file_keys), selected_month_str, previous_month, previous_month_last_day, tuple(date_columns), tuple(sheet_order),
+               max_workers, month_range, save_snapshots, diff_month)
+
+    result = run_session_job(
+        HR_JOB_SLOT, job_key, run_upload_job,
+        uploaded_files, file_keys, get_job_caches(), selected_month_str, previous_month, previous_month_last_day, date_columns, sheet_order,
+        delete_keywords, max_workers, month_range, save_snapshots, diff_month,
+        label=f"인원 분석 ({len(uploaded_files)}개 파일)",
+        estimate_bytes=estimate_job_bytes([uploaded_file.size for uploaded_file in uploaded_files]),
+    )
+
+    if result is None:
+        return None  # 작업 실패 (오류는 화면에 표시됨)
+    store_job_caches(result)
+
+    # 📌 5. 결과 표시 및 다운로드 버튼 제공
+    show_analysis_result(result, selected_month_str, previous_month, month_range, diff_month)
+    return result["metrics"]
+
+
+def process_stored_snapshots(store_month, selected_month_str, previous_month, previous_month_last_day, date_columns, sheet_order, month_range=None, diff_month=None):
+    """
+    엑셀을 다시 읽지 않고 로스터 저장소의 스냅샷으로 분석하는 함수 (작업 관리자 대기열에서 실행)
+    반환값: 단계별 측정 결과 (PipelineMetrics, 작업이 실패하면 None)
+    """
+    snapshots = list_snapshots()
+    snapshot_bytes = snapshots.loc[snapshots["기준월"] == store_month, "크기(KB)"].sum() * 1024
+    job_key = ("snapshot", store_month, selected_month_str, previous_month, previous_month_last_day, tuple(date_columns), tuple(sheet_order), month_range, diff_month)
+
+    result = run_session_job(
+        HR_JOB_SLOT, job_key, run_snapshot_job,
+        store_month, get_job_caches(), selected_month_str, previous_month, previous_month_last_day, date_columns, sheet_order, month_range, diff_month,
+        label=f"스냅샷 분석 ({store_month})",
+        estimate_bytes=estimate_job_bytes([snapshot_bytes]),
+    )
+    if result is None:
+        return None  # 작업 실패 (오류는 화면에 표시됨)
+    store_job_caches(result)
+
+    show_analysis_result(result, selected_month_str, previous_month, month_range, diff_month)
+    return result["metrics"]
+
+
+def show_metrics_panel(metrics, job_status=None):
+    """ 사이드바 디버그 패널에 단계별 / 파일별 처리 시간과 메모리, 작업 대기 / 실행 현황을 표시하는 함수 """
+    summary = metrics.summary()
+    st.sidebar.subheader("🛠 단계별 처리 현황")
+    st.sidebar.caption(f"실행 ID {summary['run_id']} · 전체 {summary['total_wall_s']}초 · 단계 중 최대 RSS {summary['peak_rss_mb']}MB")
+    if job_status is not None:
+        st.sidebar.caption(
+            f"작업 ID {job_status['id']} · 대기 {job_status['wait_s']}초 · 실행 {job_status['run_s']}초 · "
+            f"예상 메모리 {job_status['estimate_mb']}MB · 실제 증가 {job_status['rss_delta_mb']}MB "
+            f"(RSS {job_status['rss_start_mb']} → 최대 {job_status['rss_peak_mb']} → {job_status['rss_end_mb']}MB)"
+        )
+    st.sidebar.dataframe(metrics.to_frame(), hide_index=True)
 
 
 def run_excel_analysis():
@@ -361,15 +531,34 @@ def run_excel_analysis():
     # ✅ 기준 월 선택
     selected_month_str, selected_month_last_day = select_month()
 
+    # ✅ 다개월 인원 추이 기간 선택 (선택 사항)
+    month_range = select_month_range()
+
     # ✅ 개인정보 보호 설정 (삭제할 키워드 입력)# 삭제할 키워드 리스트 가져오기
     delete_keywords = get_delete_keywords()
 
+    # ✅ 병렬 처리 프로세스 수 설정
+    max_workers = get_parallel_workers()
+
+    # ✅ (디버그) 단계별 처리 시간 / 메모리 표시 여부
+    show_metrics = st.sidebar.checkbox("🛠 단계별 처리 시간 / 메모리 표시 (디버그)")
+
+    # ✅ 로스터 스냅샷 저장소 설정
+    save_snapshots, store_month, diff_month = get_roster_store_settings(selected_month_str)
+
     # ✅ 다중 엑셀 파일 업로드 # 엑셀 파일 업로드 함수 호출
     uploaded_files = upload_excel_files()
 
+    metrics = None
     if uploaded_files:
         # ✅ # 전체 엑셀 처리 함수 호출 (한 번에 실행)
-        process_excel_files(uploaded_files, selected_month_str, previous_month, previous_month_last_day, date_columns, sheet_order, delete_keywords)
+        metrics = process_excel_files(uploaded_files, selected_month_str, previous_month, previous_month_last_day, date_columns, sheet_order, delete_keywords, max_workers, month_range, save_snapshots, diff_month)
+    elif store_month is not None:
+        # ✅ 업로드가 없으면 저장된 스냅샷으로 분석
+        metrics = process_stored_snapshots(store_month, selected_month_str, previous_month, previous_month_last_day, date_columns, sheet_order, month_range, diff_month)
+
+    if show_metrics and metrics is not None:
+        show_metrics_panel(metrics, JOB_SCHEDULER.status(st.session_state[HR_JOB_SLOT]["id"]))
 
 if __name__ == "__main__":
     # Streamlit UI 실행 함수 호출
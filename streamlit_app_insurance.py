@@ -1,13 +1,27 @@
-import os
+import io
 import pandas as pd
 import streamlit as st
 from openpyxl import load_workbook, Workbook
-from openpyxl.styles import NamedStyle, Font, Border, Alignment, PatternFill
-from openpyxl.utils import get_column_letter
-from datetime import datetime, timedelta
-import tempfile
-import shutil
-import time
+from datetime import datetime
+from excel_writer import THOUSANDS_FORMAT
+from sheet_copier import StyleInterner, copy_sheet
+from temp_janitor import schedule_removal, DEFAULT_EXPIRE_SECONDS
+from upload_sources import prepare_upload_sources, get_source_name
+from insurance_verifier import load_rate_table, read_ledger, verify_premiums, add_discrepancy_sheet, DISCREPANCY_SHEET_NAME
+from job_scheduler import estimate_job_bytes
+from streamlit_jobs import run_session_job
+
+# 📌 병합 결과 표시 형식 사양 (값 종류별) — 숫자는 1000 단위 콤마
+INSURANCE_VALUE_FORMATS = {"number": THOUSANDS_FORMAT}
+
+# 📌 병합 결과 글꼴 색상 (모든 텍스트를 검정색으로 설정)
+INSURANCE_FONT_COLOR = "000000"
+
+# ✅ 4대보험 요율표 (시작 시 형식 검사 — insurance_rates.json)
+RATE_TABLE = load_rate_table()
+
+# 📌 세션별 작업 칸 (세션마다 병합 작업은 하나만 유지)
+INSURANCE_JOB_SLOT = "insurance_job"
 
 def upload_insurance_files():
     """ Streamlit UI에서 4대보험 데이터 엑셀 파일을 업로드하는 함수 """
@@ -17,34 +31,24 @@ def upload_insurance_files():
         accept_multiple_files=True
     )
 
-def save_uploaded_insurance_files(uploaded_files):
-    """ 업로드된 4대보험 엑셀 파일을 임시 폴더에 저장하는 함수 """
-    temp_dir = tempfile.mkdtemp()
-    merged_excel_path = os.path.join(temp_dir, "merged_insurance_data.xlsx")  # 병합 파일 경로
-    
-    file_paths = []
-    for uploaded_file in uploaded_files:
-        file_path = os.path.join(temp_dir, uploaded_file.name)
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.read())
-        file_paths.append(file_path)
-
-    return temp_dir, merged_excel_path, file_paths 
+def merge_insurance_files(file_sources):
+    """
+    여러 개의 4대보험 엑셀 파일(경로 또는 업로드 버퍼)을 병합하고 서식을 유지하는 함수 (화면 출력 없음 — 작업 스레드에서 실행 가능)
+    반환값: (병합된 Workbook 또는 None, [("error", 메시지), ...])
+    """
+    messages = []
 
-def merge_insurance_files(file_paths):
-    """ 여러 개의 4대보험 엑셀 파일을 병합하고 서식을 유지하는 함수 """
-    
     # 📌 병합을 위한 새로운 워크북 생성
     merged_wb = Workbook()
     merged_wb.remove(merged_wb.active)  # 기본 시트 제거
 
-    if not file_paths:  # 📌 업로드된 파일이 없는 경우 처리
-        st.error("❌ 업로드된 4대보험 데이터 파일이 없습니다.")
-        return None
+    if not file_sources:  # 📌 업로드된 파일이 없는 경우 처리
+        return None, [("error", "❌ 업로드된 4대보험 데이터 파일이 없습니다.")]
 
-    for file_path in file_paths:
+    for file_source in file_sources:
         try:
-            source_wb = load_workbook(file_path, data_only=False)  # 수식 유지
+            source_wb = load_workbook(file_source, data_only=False)  # 수식 유지
+            interner = StyleInterner(source_wb, merged_wb, font_color=INSURANCE_FONT_COLOR)  # 모든 텍스트는 검정색
 
             for sheet_name in source_wb.sheetnames:
                 source_ws = source_wb[sheet_name]
@@ -55,99 +59,132 @@ def merge_insurance_files(file_paths):
 
                 new_ws = merged_wb.create_sheet(title=sheet_name)
 
-                # ✅ 열 너비 유지
-                for col in source_ws.column_dimensions:
-                    new_ws.column_dimensions[col].width = source_ws.column_dimensions[col].width
-
-                # ✅ 행 높이 유지
-                for row in source_ws.row_dimensions:
-                    new_ws.row_dimensions[row].height = source_ws.row_dimensions[row].height
-
-                # ✅ 원본 시트 데이터를 복사 (수식 + 서식 유지 + 검정색 텍스트 적용)
-                for row in source_ws.iter_rows():
-                    for cell in row:
-                        new_cell = new_ws[cell.coordinate]
-                        new_cell.value = cell.value  # 수식 또는 값 복사
-
-                        # ✅ 스타일 복사 (서식 유지) + 텍스트 검정색 적용
-                        if cell.font:
-                            new_cell.font = Font(
-                                name=cell.font.name,
-                                size=cell.font.size,
-                                bold=cell.font.bold,
-                                italic=cell.font.italic,
-                                underline=cell.font.underline,
-                                strike=cell.font.strike,
-                                color="000000"  # 모든 텍스트를 검정색으로 설정
-                            )
-                        if isinstance(cell.fill, PatternFill):  # ✅ 배경색 유지
-                            new_cell.fill = PatternFill(
-                                fill_type=cell.fill.fill_type,
-                                fgColor=cell.fill.fgColor,
-                                bgColor=cell.fill.bgColor
-                            )
-                        if cell.border:
-                            new_cell.border = Border(
-                                left=cell.border.left,
-                                right=cell.border.right,
-                                top=cell.border.top,
-                                bottom=cell.border.bottom
-                            )
-                        if cell.alignment:
-                            new_cell.alignment = Alignment(
-                                horizontal=cell.alignment.horizontal,
-                                vertical=cell.alignment.vertical,
-                                wrap_text=cell.alignment.wrap_text
-                            )
-
-                        # ✅ 1000단위 쉼표 적용 (숫자인 경우만)
-                        if isinstance(cell.value, (int, float)) and cell.data_type != "f":  # 수식이 아닌 숫자만 적용
-                            new_cell.number_format = "#,##0"  # 1000 단위 콤마 적용
-
-                # ✅ 원본 병합된 셀 유지
-                for merged_cell in source_ws.merged_cells.ranges:
-                    new_ws.merge_cells(str(merged_cell))
+                # ✅ 값 / 수식 / 서식 / 병합 셀 / 열 너비 / 행 높이 복사 (스타일은 종류별로 한 번만 변환)
+                copy_sheet(source_ws, new_ws, interner, value_formats=INSURANCE_VALUE_FORMATS)
 
         except Exception as e:
-            st.error(f"❌ 파일 `{os.path.basename(file_path)}` 처리 중 오류 발생: {e}")
+            messages.append(("error", f"❌ 파일 `{get_source_name(file_source)}` 처리 중 오류 발생: {e}"))
         
-    return merged_wb  # 📌 `Workbook` 객체 반환
+    return merged_wb, messages  # 📌 `Workbook` 객체와 오류 메시지 반환
         
     
+def select_premium_month():
+    """ Streamlit UI에서 보험료 검증 기준 월을 선택하는 함수 (요율표의 첫 적용 월부터 이번 달까지) """
+    first_month = min(rate["from"] for insurance in RATE_TABLE["insurances"] for rate in insurance["rates"])
+    months = pd.period_range(first_month, datetime.today().strftime("%Y-%m"), freq="M").strftime("%Y-%m").tolist()
+    return st.selectbox("📅 보험료 기준 월", months, index=len(months) - 1)
+
+
+def verify_merged_insurance(merged_wb, month):
+    """
+    병합된 4대보험 내역의 본인 부담 보험료를 요율표로 다시 계산해 비교하고 검증 결과 시트를 추가하는 함수 (화면 출력 없음)
+    반환값: {"skipped": 검증하지 않은 시트, "rows": 검증한 인원 수, "summary": 보험별 요약 또는 None, "discrepancies": 불일치 내역 또는 None}
+    """
+    ledger, skipped = read_ledger(merged_wb, RATE_TABLE)
+    if ledger.empty:
+        return {"skipped": skipped, "rows": 0, "summary": None, "discrepancies": None}
+
+    summary, discrepancies = verify_premiums(ledger, RATE_TABLE, month)
+    add_discrepancy_sheet(merged_wb, discrepancies)
+    return {"skipped": skipped, "rows": len(ledger), "summary": summary, "discrepancies": discrepancies}
+
+
+def show_verification(verification, month):
+    """ 보험료 검증 결과(요약, 불일치 내역)를 화면에 표시하는 함수 """
+    if verification["skipped"]:
+        st.caption(f"보수월액 컬럼이 없어 검증하지 않은 시트: {', '.join(verification['skipped'])}")
+    if verification["summary"] is None:
+        st.warning("⚠️ 보수월액이 있는 행을 찾지 못해 보험료를 검증하지 않았습니다.")
+        return
+
+    st.dataframe(verification["summary"], hide_index=True)
+
+    formula_cells = int(verification["summary"]["수식 제외 건수"].sum())
+    if formula_cells:
+        st.warning(f"⚠️ 보험료가 수식으로 입력된 {formula_cells}칸은 계산된 값이 없어 검증하지 않았습니다 (요약의 `수식 제외 건수` 참고).")
+
+    discrepancies = verification["discrepancies"]
+    if discrepancies.empty:
+        st.success(f"✅ {verification['rows']}명 보험료가 {month} 요율과 모두 일치합니다.")
+    else:
+        st.warning(f"⚠️ 불일치 {len(discrepancies)}건 — 병합 파일의 `{DISCREPANCY_SHEET_NAME}` 시트에도 저장됩니다.")
+        st.dataframe(discrepancies, hide_index=True)
+
+
+def run_insurance_job(uploaded_files, month):
+    """
+    4대보험 파일 병합, 보험료 검증, 결과 엑셀 저장을 처리하는 함수 (작업 관리자의 작업 스레드에서 실행 — 화면 출력 없음)
+    반환값: {"temp_dir", "messages", "verification": 검증 결과 또는 None, "excel": 병합 엑셀 메모리 버퍼 또는 None}
+    """
+    # ✅ 업로드 버퍼를 그대로 사용 (크기가 큰 파일만 임시 폴더에 저장)
+    temp_dir, file_sources = prepare_upload_sources(uploaded_files)
+
+    try:
+        merged_wb, messages = merge_insurance_files(file_sources)
+
+        # ✅ 보험료 검증 (불일치 내역은 병합 파일에 시트로 추가)
+        verification = None
+        merged_excel = None
+        if merged_wb is not None and merged_wb.worksheets:
+            verification = verify_merged_insurance(merged_wb, month)
+            merged_excel = io.BytesIO()
+            merged_wb.save(merged_excel)  # 📌 병합된 엑셀을 메모리 버퍼에 저장 (디스크 저장 없음)
+    finally:
+        # ✅ 임시 폴더(큰 업로드 파일만 저장)는 실패해도 일정 시간 후 자동 삭제 (백그라운드에서 처리)
+        if temp_dir is not None:
+            schedule_removal(temp_dir)
+
+    return {"temp_dir": temp_dir, "messages": messages, "verification": verification, "excel": merged_excel}
+
+
 # ✅ 다운로드 버튼 생성
-def download_merged_insurance_file(merged_wb, merged_excel_path, temp_dir):
-    """ 병합된 4대보험 데이터를 다운로드할 수 있도록 제공하는 함수 """
-    if merged_wb is None:
+def download_merged_insurance_file(merged_excel, temp_dir):
+    """ 병합된 4대보험 데이터(메모리 버퍼)를 다운로드할 수 있도록 제공하는 함수 (임시 폴더는 작업에서 삭제 예약됨) """
+    if merged_excel is None:
         return  # 병합된 파일이 없으면 실행 중지
 
-    merged_wb.save(merged_excel_path)  # 📌 병합된 엑셀 저장
+    st.download_button(
+        label="📥 병합된 4대보험 데이터 다운로드",
+        data=merged_excel.getvalue(),
+        file_name="merged_insurance_data.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
 
-    with open(merged_excel_path, "rb") as file:
-        st.download_button(
-            label="📥 병합된 4대보험 데이터 다운로드",
-            data=file,
-            file_name="merged_insurance_data.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+    if temp_dir is not None:
+        st.warning(f"🔒 업로드 파일은 {DEFAULT_EXPIRE_SECONDS}초 후 자동 삭제됩니다.")
 
-    # ✅ 일정 시간 후 자동 삭제
-    time.sleep(10)
-    shutil.rmtree(temp_dir)  
-    st.warning("🔒 다운로드 후 10초가 지나 파일이 자동 삭제되었습니다.")
 
 # ✅ 4대보험 검증 시스템 실행
 def run_insurance_analysis():
-    """ 4대보험 검증 시스템 실행 함수 """
+    """
+    4대보험 검증 시스템 실행 함수
+    - 병합 / 검증 / 저장은 작업 관리자 대기열에서 실행 (기다리는 동안 대기열 순서 표시)
+    - 파일과 기준 월이 같으면 화면 조작으로 다시 실행되어도 이전 작업 결과를 작업 ID 로 가져옴
+    """
     st.subheader("4대보험료 검증 시스템")
 
     uploaded_insurance_files = upload_insurance_files()
 
     if uploaded_insurance_files:
-        temp_dir, merged_excel_path, file_paths = save_uploaded_insurance_files(uploaded_insurance_files)
+        st.subheader("🧮 보험료 검증")
+        month = select_premium_month()
+
+        job_key = (tuple((f.file_id, f.name, f.size) for f in uploaded_insurance_files), month)
+        result = run_session_job(
+            INSURANCE_JOB_SLOT, job_key, run_insurance_job, uploaded_insurance_files, month,
+            label=f"4대보험 병합 ({len(uploaded_insurance_files)}개 파일)",
+            estimate_bytes=estimate_job_bytes([f.size for f in uploaded_insurance_files]),
+        )
+        if result is None:
+            return  # 작업 실패 (오류는 화면에 표시됨)
+
+        for _, message in result["messages"]:
+            st.error(message)
 
-        merged_wb = merge_insurance_files(file_paths)
+        if result["verification"] is not None:
+            show_verification(result["verification"], month)
 
-        download_merged_insurance_file(merged_wb, merged_excel_path, temp_dir)
+        download_merged_insurance_file(result["excel"], result["temp_dir"])
 
 
 
@@ -1,61 +1,99 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-import io
+from pandas.io.parsers import TextParser
 from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from excel_writer import write_excel, DEFAULT_WRITER_ENGINE
 
 def upload_excel_files():
     """ Streamlit UI에서 다중 엑셀 파일을 업로드하는 함수 """
     return st.file_uploader("📂 엑셀 파일을 선택하세요", type=["xlsx"], accept_multiple_files=True)
 
-def merge_excel_files(uploaded_files):
+def _convert_cell(cell):
+    """ 셀 값을 pd.read_excel 과 같은 규칙으로 변환하는 함수 (빈 셀은 "", 오류는 NaN, 정수로 표현되는 숫자는 int) """
+    value = cell.value
+    if value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return np.nan
+    if cell.data_type == TYPE_NUMERIC:
+        int_value = int(value)
+        return int_value if int_value == value else float(value)
+    return value
+
+def read_sheet_with_layout(ws):
+    """
+    시트를 한 번만 순회하여 DataFrame과 서식 정보(열 너비, 행 높이, 숫자/날짜 표기법)를 함께 추출하는 함수
+    - DataFrame은 pd.read_excel(header=0) 과 같은 결과
+    - 열 너비는 이미 읽은 값의 최대 길이 + 2
+    """
+    data = []
+    last_row_with_data = -1
+    max_lengths = {}
+    cell_formats = {}
+
+    for row_number, row in enumerate(ws.iter_rows()):
+        converted_row = []
+        for cell in row:
+            value = cell.value
+            converted_row.append(_convert_cell(cell))
+
+            # 열 너비 계산용 최대 길이
+            if value:
+                max_lengths[cell.column] = max(max_lengths.get(cell.column, 0), len(str(value)))
+
+            # 숫자 표기법 및 날짜 표기법 (기본 형식 "General" 은 생략)
+            number_format = cell.number_format
+            if number_format and number_format != "General":
+                cell_formats[(cell.row, cell.column)] = number_format
+
+        # 뒤쪽 빈 셀 / 빈 행 정리 (pd.read_excel 과 동일)
+        while converted_row and converted_row[-1] == "":
+            converted_row.pop()
+        if converted_row:
+            last_row_with_data = row_number
+        data.append(converted_row)
+
+    data = data[: last_row_with_data + 1]
+    if data:
+        max_width = max(len(data_row) for data_row in data)
+        data = [data_row + [""] * (max_width - len(data_row)) for data_row in data]
+        sheet_df = TextParser(data, header=0, skip_blank_lines=False).read()
+    else:
+        sheet_df = pd.DataFrame()
+
+    layout = {
+        # 열 너비 자동 조정 (여유 공간을 위해 2 추가)
+        "column_widths": {column: max_lengths.get(column, 0) + 2 for column in range(1, ws.max_column + 1)},
+        # 행 높이 복사
+        "row_heights": {
+            idx: dim.height for idx, dim in ws.row_dimensions.items()
+            if dim.height is not None and idx <= ws.max_row
+        },
+        "cell_formats": cell_formats,
+    }
+    return sheet_df, layout
+
+def merge_excel_files(uploaded_files, engine=DEFAULT_WRITER_ENGINE):
     """ 업로드된 다수의 엑셀 파일을 하나의 파일로 병합 """
-    output = io.BytesIO()
-    
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        for file in uploaded_files:
-            file_name = file.name.split('.')[0]  # 파일명에서 확장자 제거
-            xls = pd.ExcelFile(file, engine='openpyxl')  # openpyxl로 엑셀 파일 로드
-            
-            for sheet_name in xls.sheet_names:
-                sheet_df = pd.read_excel(xls, sheet_name=sheet_name, engine='openpyxl')
-                
-                # 엑셀 파일의 서식을 복사하기 위한 작업
-                wb = load_workbook(file)
-                sheet = wb[sheet_name]
-                
-                new_sheet_name = f"{file_name}"  # 파일명_원래시트명 형식
-                sheet_df.to_excel(writer, sheet_name=new_sheet_name, index=False)
-                
-                # 시트의 열 너비, 행 높이, 숫자 표기법, 날짜 표기법 복사
-                worksheet = writer.sheets[new_sheet_name]
-                
-                # 열 너비 자동 조정
-                for col in sheet.columns:
-                    column = col[0].column_letter  # 열 번호 (A, B, C, ...)
-                    max_length = 0
-                    for cell in col:
-                        try:
-                            if cell.value:
-                                max_length = max(max_length, len(str(cell.value)))
-                        except:
-                            pass
-                    adjusted_width = (max_length + 2)  # 여유 공간을 위해 2 추가
-                    worksheet.column_dimensions[column].width = adjusted_width
-                
-                # 행 높이 복사
-                for row in sheet.iter_rows():
-                    row_height = sheet.row_dimensions[row[0].row].height
-                    worksheet.row_dimensions[row[0].row].height = row_height
-                
-                # 숫자 표기법 및 날짜 표기법 복사
-                for row in sheet.iter_rows():
-                    for cell in row:
-                        new_cell = worksheet[cell.coordinate]
-                        if cell.number_format:
-                            new_cell.number_format = cell.number_format
-
-    output.seek(0)
-    return output
+    sheets = {}
+    layouts = {}
+
+    for file in uploaded_files:
+        file_name = file.name.split('.')[0]  # 파일명에서 확장자 제거
+        wb = load_workbook(file, data_only=True, keep_links=False)  # ✅ 파일마다 한 번만 로드 (수식은 계산된 값으로 읽음)
+
+        for sheet_name in wb.sheetnames:
+            new_sheet_name = f"{file_name}"  # 파일명_원래시트명 형식
+
+            # 값과 서식 정보(열 너비, 행 높이, 숫자 표기법, 날짜 표기법)를 한 번에 추출하고 저장할 때 함께 적용
+            sheets[new_sheet_name], layouts[new_sheet_name] = read_sheet_with_layout(wb[sheet_name])
+
+        wb.close()
+
+    # ✅ 병합 결과를 한 번에 저장 (기본: 행 단위 스트리밍 저장 엔진)
+    return write_excel(sheets, layouts=layouts, engine=engine)
 
 def run_excel_merge():
     """ Streamlit에서 엑셀 병합 기능 실행 """
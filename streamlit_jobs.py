@@ -0,0 +1,69 @@
+import uuid
+import streamlit as st
+from job_scheduler import JOB_SCHEDULER, JOB_QUEUED, JOB_RUNNING, JOB_FAILED
+
+
+def session_owner():
+    """ 현재 사용자 세션을 구분하는 ID 를 반환하는 함수 (작업 현황 표시용) """
+    if "job_owner" not in st.session_state:
+        st.session_state["job_owner"] = uuid.uuid4().hex[:8]
+    return st.session_state["job_owner"]
+
+
+def show_job_status(placeholder, status):
+    """ 대기 중이면 대기열 순서, 실행 중이면 경과 시간을 화면 자리(placeholder)에 표시하는 함수 """
+    if status["state"] == JOB_QUEUED:
+        placeholder.info(
+            f"⏳ 다른 사용자의 작업이 처리 중입니다 — 대기열 {status['position']}번째 "
+            f"(앞선 작업 {status['position'] - 1}개 · {status['wait_s']:.0f}초 대기)"
+        )
+    elif status["state"] == JOB_RUNNING:
+        memory = "" if status["rss_delta_mb"] is None else f" · 메모리 +{status['rss_delta_mb']:.0f}MB"
+        placeholder.info(f"⚙️ 처리 중입니다 — {status['run_s']:.0f}초 경과 (대기 {status['wait_s']:.0f}초){memory}")
+
+
+def run_session_job(slot, job_key, fn, *args, label=None, estimate_bytes=0, **kwargs):
+    """
+    세션의 작업 칸(slot)마다 작업을 하나만 두고 작업 관리자에서 실행한 결과를 반환하는 함수
+    - 입력(job_key)이 이전과 같으면 다시 제출하지 않고 저장해 둔 작업 ID 로 결과를 가져옴 (화면 조작으로 재실행되어도 다시 계산하지 않음)
+    - 입력이 바뀌면 대기 중인 이전 작업은 취소하고, 실행 중이면 끝날 때까지 기다린 뒤 새 작업을 제출 (세션마다 실행 중인 작업은 하나뿐)
+    - 기다리는 동안 대기열 순서 / 경과 시간을 표시
+    - 작업이 실패하면 오류를 화면에 표시하고 작업 칸을 비움 (다음 실행에서 같은 입력으로 다시 제출)
+    반환값: fn 의 반환값 (실패하면 None)
+    """
+    placeholder = st.empty()
+
+    def update(status):
+        """ 대기 상태 표시 (내부 함수) """
+        show_job_status(placeholder, status)
+
+    current = st.session_state.get(slot)
+    if current is not None and (current["key"] != job_key or JOB_SCHEDULER.status(current["id"]) is None):
+        if not JOB_SCHEDULER.cancel(current["id"]):
+            JOB_SCHEDULER.wait(current["id"], on_update=update)
+        JOB_SCHEDULER.forget(current["id"])
+        current = None
+
+    if current is None:
+        job_id = JOB_SCHEDULER.submit(fn, *args, label=label, owner=session_owner(), estimate_bytes=estimate_bytes, **kwargs)
+        st.session_state[slot] = current = {"key": job_key, "id": job_id}
+
+    status = JOB_SCHEDULER.wait(current["id"], on_update=update)
+    placeholder.empty()
+
+    if status is not None and status["state"] == JOB_FAILED:
+        JOB_SCHEDULER.forget(current["id"])
+        del st.session_state[slot]
+        st.error(f"❌ 처리 중 오류가 발생했습니다: {status['error']} (다시 실행하면 새로 처리합니다)")
+        return None
+
+    return JOB_SCHEDULER.result(current["id"])
+
+
+def show_scheduler_status():
+    """ 사이드바에 서버 전체의 작업 실행 / 대기 현황을 표시하는 함수 """
+    stats = JOB_SCHEDULER.stats()
+    st.sidebar.caption(
+        f"🧮 처리 작업: 실행 {stats['running']}/{stats['workers']}개 · 대기 {stats['queued']}개 · "
+        f"예약 메모리 {stats['reserved_mb']:.0f}/{stats['budget_mb']:.0f}MB"
+    )
@@ -0,0 +1,127 @@
+import os
+import time
+import heapq
+import shutil
+import tempfile
+import threading
+
+# 📌 앱이 만드는 임시 폴더 이름 접두사 (정리 대상 식별용)
+TEMP_DIR_PREFIX = "dm_excel_"
+
+# 📌 다운로드 파일 보관 시간 (초) — 환경 변수 HR_TEMP_EXPIRE_SECONDS 로 변경 가능
+DEFAULT_EXPIRE_SECONDS = int(os.environ.get("HR_TEMP_EXPIRE_SECONDS", 10))
+
+# 📌 예약되지 못하고 남은 임시 폴더를 삭제하는 기준 시간 (초) — 환경 변수 HR_TEMP_TTL_SECONDS 로 변경 가능
+DEFAULT_ORPHAN_TTL_SECONDS = int(os.environ.get("HR_TEMP_TTL_SECONDS", 3600))
+
+# 📌 남은 임시 폴더 점검 주기 (초)
+SWEEP_INTERVAL_SECONDS = 300
+
+
+def make_temp_dir():
+    """ 정리 대상 접두사를 붙여 임시 폴더를 만드는 함수 """
+    return tempfile.mkdtemp(prefix=TEMP_DIR_PREFIX)
+
+
+def _remove_path(path):
+    """ 파일 또는 폴더를 삭제하는 함수 (이미 없으면 무시) """
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class TempJanitor:
+    """
+    임시 파일 / 폴더를 백그라운드 스레드에서 삭제하는 관리자
+    - schedule(): 지정한 시간이 지나면 삭제 (요청 스레드는 기다리지 않음)
+    - 주기적으로 접두사가 붙은 임시 폴더 중 orphan_ttl 보다 오래된 것을 삭제 (재실행 등으로 예약되지 못한 폴더)
+    - Streamlit 세션(스레드) 간에 공유되므로 잠금을 사용
+    """
+
+    def __init__(self, base_dir=None, orphan_ttl=DEFAULT_ORPHAN_TTL_SECONDS, sweep_interval=SWEEP_INTERVAL_SECONDS):
+        self.base_dir = base_dir or tempfile.gettempdir()
+        self.orphan_ttl = orphan_ttl
+        self.sweep_interval = sweep_interval
+        self._queue = []  # (삭제 시각, 경로) 힙
+        self._cond = threading.Condition()
+        self._thread = None
+        self._next_sweep = 0.0
+
+    def schedule(self, path, delay=DEFAULT_EXPIRE_SECONDS):
+        """ delay 초 후 path 를 삭제하도록 예약 """
+        with self._cond:
+            heapq.heappush(self._queue, (time.monotonic() + delay, path))
+            self._ensure_thread()
+            self._cond.notify()
+
+    def pending(self):
+        """ 삭제 대기 중인 경로 수 """
+        with self._cond:
+            return len(self._queue)
+
+    def sweep_orphans(self, now=None):
+        """ 접두사가 붙은 임시 폴더 중 orphan_ttl 보다 오래된 폴더를 삭제 (반환값: 삭제한 폴더 수) """
+        now = now or time.time()
+        removed = 0
+        try:
+            names = os.listdir(self.base_dir)
+        except OSError:
+            return 0
+
+        for name in names:
+            if not name.startswith(TEMP_DIR_PREFIX):
+                continue
+            path = os.path.join(self.base_dir, name)
+            try:
+                expired = now - os.path.getmtime(path) > self.orphan_ttl
+            except OSError:
+                continue
+            if expired:
+                _remove_path(path)
+                removed += 1
+        return removed
+
+    def _ensure_thread(self):
+        """ 백그라운드 스레드가 없으면 시작 (잠금을 잡은 상태에서 호출) """
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="temp-janitor", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """ 예약 시각이 된 경로를 삭제하고 주기적으로 남은 임시 폴더를 정리 """
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                due = []
+                while self._queue and self._queue[0][0] <= now:
+                    due.append(heapq.heappop(self._queue)[1])
+
+                sweep = now >= self._next_sweep
+                if sweep:
+                    self._next_sweep = now + self.sweep_interval
+
+                if not due and not sweep:
+                    wake_at = self._next_sweep
+                    if self._queue:
+                        wake_at = min(wake_at, self._queue[0][0])
+                    self._cond.wait(timeout=wake_at - now)
+                    continue
+
+            # 파일 삭제는 잠금 밖에서 처리
+            for path in due:
+                _remove_path(path)
+            if sweep:
+                self.sweep_orphans()
+
+
+# ✅ 서버 프로세스 전체에서 공유하는 임시 파일 관리자 (스크립트 재실행 시에도 유지)
+TEMP_JANITOR = TempJanitor()
+
+
+def schedule_removal(path, delay=DEFAULT_EXPIRE_SECONDS):
+    """ 임시 파일 / 폴더 삭제를 백그라운드 관리자에 예약하는 함수 """
+    TEMP_JANITOR.schedule(path, delay)
@@ -0,0 +1,55 @@
+import io
+import os
+from temp_janitor import make_temp_dir
+
+# 📌 이 크기(MB)보다 큰 업로드 파일만 임시 파일로 저장 (환경 변수 HR_UPLOAD_SPOOL_MB 로 변경 가능, 0 이면 항상 저장)
+UPLOAD_SPOOL_THRESHOLD_BYTES = int(os.environ.get("HR_UPLOAD_SPOOL_MB", 100)) * 1024 * 1024
+
+
+class NamedBuffer(io.BytesIO):
+    """ 파일명을 가진 메모리 버퍼 (프로세스 풀로 보낼 수 있음) """
+
+    def __init__(self, data=b"", name=""):
+        super().__init__(data)
+        self.name = name
+
+
+def get_source_name(source):
+    """ 파일 경로 또는 업로드 파일(버퍼)의 파일명을 반환하는 함수 """
+    if isinstance(source, str):
+        return os.path.basename(source)
+    return os.path.basename(getattr(source, "name", ""))
+
+
+def to_picklable_source(source):
+    """ 다른 프로세스로 보낼 수 있는 입력으로 변환하는 함수 (경로는 그대로, 버퍼는 NamedBuffer 로 복사) """
+    if isinstance(source, (str, NamedBuffer)):
+        return source
+    return NamedBuffer(source.getvalue(), get_source_name(source))
+
+
+def prepare_upload_sources(uploaded_files, threshold_bytes=UPLOAD_SPOOL_THRESHOLD_BYTES):
+    """
+    업로드 파일을 파서에 넘길 입력 목록으로 만드는 함수
+    - 기본: 업로드 버퍼를 복사하지 않고 그대로 사용 (디스크 저장 없음)
+    - threshold_bytes 보다 큰 파일만 임시 폴더에 저장하고 경로를 사용
+    반환값: (임시 폴더 경로 또는 None, [업로드 파일 또는 경로, ...])
+    """
+    temp_dir = None
+    sources = []
+
+    for uploaded_file in uploaded_files:
+        with uploaded_file.getbuffer() as content:
+            if content.nbytes <= threshold_bytes:
+                uploaded_file.seek(0)
+                sources.append(uploaded_file)
+                continue
+
+            if temp_dir is None:
+                temp_dir = make_temp_dir()
+            file_path = os.path.join(temp_dir, get_source_name(uploaded_file))
+            with open(file_path, "wb") as f:
+                f.write(content)  # memoryview 를 그대로 기록 (추가 복사 없음)
+            sources.append(file_path)
+
+    return temp_dir, sources